@@ -1,17 +1,118 @@
 from __future__ import annotations
 
-import json
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 import gradio as gr
-from agents import Runner
 
-from intellitube_agents.context import build_context, IntelliTubeContext
-from intellitube_agents.indexer.agent import build_indexer_agent
-from intellitube_agents.schema import IndexerResult, ScriptResult, VideoVariant
-from intellitube_agents.script.agent import build_script_agent
-from intellitube_agents.tts import TTSConfig, synthesize_tts_to_file
+from intellitube_agents.api import run_intellitube
+from intellitube_agents.context import get_context, IntelliTubeContext
+from intellitube_agents.schema import IntelliTubeRequest, VideoVariant
+from intellitube_agents.script.cache import ScriptCache
+from intellitube_agents.tracing import configure_tracing, get_tracer
+
+
+# Shared across requests so identical reruns can skip the writer (opt-in per run).
+# Created on first use, so importing this module doesn't create cache/scripts.
+_SCRIPT_CACHE: Optional[ScriptCache] = None
+
+
+def _script_cache() -> ScriptCache:
+    global _SCRIPT_CACHE
+    if _SCRIPT_CACHE is None:
+        _SCRIPT_CACHE = ScriptCache()
+    return _SCRIPT_CACHE
+
+
+@dataclass(frozen=True)
+class QueueSettings:
+    max_runs: int = 2               # runs executing at once (Gradio concurrency_limit)
+    queue_size: int = 20            # runs waiting beyond that; further clicks are turned away
+    runs_per_user: int = 1          # runs one user may have executing at once
+    transcribe_workers: int = 4     # Whisper uploads in flight across all runs (context semaphore)
+    user_key: str = "session"       # what counts as one user: "session" (browser tab) or "ip"
+    trust_proxy: bool = False       # with user_key="ip": take the first X-Forwarded-For hop (only behind a proxy that sets it)
+
+    @classmethod
+    def from_env(cls) -> "QueueSettings":
+        def env_int(name: str, default: int) -> int:
+            return max(1, int(os.getenv(name, default)))
+
+        user_key = os.getenv("INTELLITUBE_USER_KEY", cls.user_key).strip().lower()
+        if user_key not in ("session", "ip"):
+            raise ValueError(f"INTELLITUBE_USER_KEY must be 'session' or 'ip', got {user_key!r}")
+        return cls(
+            max_runs=env_int("INTELLITUBE_MAX_RUNS", cls.max_runs),
+            queue_size=env_int("INTELLITUBE_QUEUE_SIZE", cls.queue_size),
+            runs_per_user=env_int("INTELLITUBE_RUNS_PER_USER", cls.runs_per_user),
+            transcribe_workers=env_int("INTELLITUBE_TRANSCRIBE_WORKERS", cls.transcribe_workers),
+            user_key=user_key,
+            trust_proxy=os.getenv("INTELLITUBE_TRUST_PROXY", "").strip().lower() in ("1", "true", "yes"),
+        )
+
+
+_QUEUE = QueueSettings.from_env()
+
+
+class _UserRuns:
+    """Runs in flight per user, so one user can't hold every worker slot."""
+
+    def __init__(self, limit: int) -> None:
+        self._limit = limit
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {}
+        self._durations: Deque[float] = deque(maxlen=20)
+
+    def acquire(self, user: str) -> bool:
+        with self._lock:
+            if self._active.get(user, 0) >= self._limit:
+                return False
+            self._active[user] = self._active.get(user, 0) + 1
+            return True
+
+    def release(self, user: str, seconds: Optional[float] = None) -> None:
+        with self._lock:
+            n = self._active.get(user, 0) - 1
+            if n > 0:
+                self._active[user] = n
+            else:
+                self._active.pop(user, None)
+            if seconds is not None:
+                self._durations.append(seconds)
+
+    def typical_seconds(self) -> Optional[float]:
+        with self._lock:
+            return sorted(self._durations)[len(self._durations) // 2] if self._durations else None
+
+
+_USER_RUNS = _UserRuns(_QUEUE.runs_per_user)
+
+
+def _user_key(request: Optional[gr.Request], settings: QueueSettings = _QUEUE) -> str:
+    """
+    The logged-in username, else the browser session. With ``user_key="ip"`` the
+    client IP instead (X-Forwarded-For only if ``trust_proxy``: clients can forge it).
+    """
+    if request is None:
+        return "local"
+    username = getattr(request, "username", None)
+    if username:
+        return f"user:{username}"
+    if settings.user_key == "ip":
+        headers = getattr(request, "headers", None) or {}
+        forwarded = headers.get("x-forwarded-for") if settings.trust_proxy and hasattr(headers, "get") else None
+        if forwarded:
+            return f"ip:{forwarded.split(',')[0].strip()}"
+        host = getattr(getattr(request, "client", None), "host", None)
+        if host:
+            return f"ip:{host}"
+    session = getattr(request, "session_hash", None)
+    return f"session:{session}" if session else "local"
 
 
 CSS = """
@@ -43,15 +144,6 @@ CSS = """
 """
 
 
-def _read_json_file(p: Path) -> Dict[str, Any] | None:
-    try:
-        with p.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data if isinstance(data, dict) else None
-    except Exception:
-        return None
-
-
 def _fmt_duration(seconds: Optional[int]) -> str:
     if not seconds or seconds <= 0:
         return ""
@@ -77,7 +169,55 @@ def _build_refs_markdown(refs: List[Dict[str, Any]], title: str = "Reference vid
     return "\n".join(lines)
 
 
-def _run_intellitube(
+class _ProgressView:
+    """Current output values; ``render`` sends only what changed, so a player that is already playing keeps playing."""
+
+    SLOTS = ("v1_title", "v1_desc", "v1_audio", "v2_title", "v2_desc", "v2_audio", "refs", "status")
+
+    def __init__(self, status: str) -> None:
+        self.values: Dict[str, Any] = {k: None for k in self.SLOTS}
+        self.values["refs"] = _build_refs_markdown([], title="Reference videos (searching…)")
+        self.set_status(status)
+        self._sent: Dict[str, Any] = {}
+
+    def set_status(self, text: str) -> None:
+        self.values["status"] = f"**Status:** {text}"
+
+    def apply(self, stage: str, fields: Dict[str, Any]) -> None:
+        if stage == "index":
+            self.values["refs"] = _build_refs_markdown(fields.get("references") or [], title="Reference videos (transcribed)")
+            failed = len(fields.get("errors") or {})
+            self.set_status(
+                f"Transcribed {fields.get('transcripts', 0)} of {fields.get('found', 0)} videos"
+                + (f" ({failed} failed)" if failed else "")
+                + "; packing knowledge…"
+            )
+        elif stage == "knowledge":
+            self.values["refs"] = _build_refs_markdown(fields.get("references") or [])
+            self.set_status("Writing two script variants…")
+        elif stage == "script":
+            variants: List[VideoVariant] = list(fields["result"].variants)
+            for n, v in zip(("v1", "v2"), variants):
+                self.values[f"{n}_title"] = v.title
+                self.values[f"{n}_desc"] = v.description
+            self.set_status("Generating audio…" + (" (cached script)" if fields.get("cache_hit") else ""))
+        elif stage == "tts.variant":
+            slot = {"variant_1": "v1_audio", "variant_2": "v2_audio"}.get(str(fields.get("variant")))
+            if slot:
+                self.values[slot] = fields.get("path")
+            waiting = [n for n in ("1", "2") if self.values[f"v{n}_audio"] is None]
+            self.set_status(f"Variant {waiting[0]} audio is still generating…" if waiting else "Finishing up…")
+
+    def render(self) -> Tuple[Any, ...]:
+        out = []
+        for k in self.SLOTS:
+            v = self.values[k]
+            out.append(gr.update() if k in self._sent and self._sent[k] == v else v)
+            self._sent[k] = v
+        return tuple(out)
+
+
+async def _run_intellitube(
     search_query: str,
     topic: str,
     limit: int,
@@ -88,6 +228,13 @@ def _run_intellitube(
     tts_speed: float,
     tts_model: str,
     tts_voice: str,
+    use_indexer_agent: bool = False,
+    use_streaming: bool = False,
+    rank_knowledge: bool = True,
+    knowledge_tokens: int = 60_000,
+    reuse_script: bool = False,
+    tts_format: str = "opus",
+    request: gr.Request = None,
 ):
     q = (search_query or "").strip()
     tp = (topic or "").strip()
@@ -96,87 +243,82 @@ def _run_intellitube(
     if not tp:
         raise gr.Error("Please enter a topic.")
 
-    limit = int(max(1, min(int(limit), 50)))
-    max_duration_seconds = int(max(5, int(max_duration_seconds)))
-    max_knowledge_chars = int(max(10_000, int(max_knowledge_chars)))
-
-    # --- context + agents ---
-    ctx: IntelliTubeContext = build_context(transcribe_model=transcribe_model)
-    indexer = build_indexer_agent()
-    writer = build_script_agent()
-
-    # --- 1) Indexer: search + cache transcripts ---
-    indexer_input = (
-        f"query: {q}\n"
-        f"limit: {limit}\n"
-        f"sort_by_date: {bool(sort_by_date)}\n"
-        f"max_duration_seconds: {max_duration_seconds}\n"
+    run_request = IntelliTubeRequest(
+        search_query=q,
+        topic=tp,
+        limit=int(max(1, min(int(limit), 50))),
+        sort_by_date=bool(sort_by_date),
+        max_duration_seconds=int(max(5, int(max_duration_seconds))),
+        indexer="agent" if use_indexer_agent else "direct",
+        streaming=bool(use_streaming),
+        max_knowledge_chars=int(max(10_000, int(max_knowledge_chars))),
+        knowledge_mode="ranked" if rank_knowledge else "ordered",
+        knowledge_tokens=int(max(1_000, int(knowledge_tokens))),
+        reuse_script=bool(reuse_script),
+        tts=True,
+        tts_model=tts_model,
+        tts_voice=tts_voice,
+        tts_speed=float(tts_speed),
+        tts_format=tts_format,
     )
-    idx_out = Runner.run_sync(indexer, indexer_input, context=ctx, max_turns=10)
-    index_result: IndexerResult = idx_out.final_output
-
-    # --- 2) Build knowledge & refs (read cached JSON files) ---
-    knowledge: List[Dict[str, str]] = []
-    used_refs: List[Dict[str, Any]] = []
-    total = 0
-
-    for art in index_result.transcripts:
-        tp_json = Path(art.transcript_path).expanduser().resolve()
-        data = _read_json_file(tp_json)
-        if not data:
-            continue
-
-        title = str(data.get("title") or "")
-        desc = str(data.get("description") or "")
-        tx = str(data.get("transcript") or "")
-
-        used_refs.append(
-            {
-                "title": title,
-                "url": str(data.get("url") or art.url or ""),
-                "channel": str(data.get("channel") or ""),
-                "duration_seconds": data.get("duration_seconds"),
-            }
-        )
-
-        if not tx.strip():
-            continue
-
-        if total + len(tx) > max_knowledge_chars:
-            break
-
-        knowledge.append({"title": title, "description": desc, "transcript": tx})
-        total += len(tx)
-
-    # --- 3) Script writer: 2 variants ---
-    knowledge_json = json.dumps(knowledge, ensure_ascii=False)
-    writer_input = f"topic: {tp}\n\nREFERENCE_VIDEOS_JSON:\n{knowledge_json}\n"
-
-    out = Runner.run_sync(writer, writer_input, context=ctx, max_turns=6)
-    script_result: ScriptResult = out.final_output
-
-    v1: VideoVariant = script_result.variants[0]
-    v2: VideoVariant = script_result.variants[1]
-
-    # --- 4) TTS ---
-    tts_cfg = TTSConfig(model=tts_model, voice=tts_voice, speed=float(tts_speed))
-    a1 = synthesize_tts_to_file(v1.transcript, cfg=tts_cfg)
-    a2 = synthesize_tts_to_file(v2.transcript, cfg=tts_cfg)
 
-    refs_md = _build_refs_markdown(used_refs)
+    user = _user_key(request)
+    if not _USER_RUNS.acquire(user):
+        raise gr.Error(
+            f"You already have {_QUEUE.runs_per_user} run(s) in progress. Wait for it to finish or press Cancel."
+        )
+    started = time.monotonic()
+    finished = False
+    try:
+        async for update in _stream_run(run_request, transcribe_model):
+            yield update
+        finished = True
+    finally:
+        # only completed runs feed the typical-duration estimate
+        _USER_RUNS.release(user, time.monotonic() - started if finished else None)
+
+
+async def _stream_run(request: IntelliTubeRequest, transcribe_model: str):
+    """Yield output updates as ``run_intellitube`` reports each stage."""
+    # memoized per settings: clients, caches and per-video locks are shared by all sessions;
+    # the transcription semaphore bounds Whisper uploads across every queued run
+    ctx: IntelliTubeContext = get_context(
+        transcribe_model=transcribe_model,
+        max_concurrent_transcriptions=_QUEUE.transcribe_workers,
+    )
 
-    return (
-        v1.title,
-        v1.description,
-        str(a1),
-        v2.title,
-        v2.description,
-        str(a2),
-        refs_md,
+    # Stage events -> queue; each one is yielded to the UI as soon as it arrives.
+    events: asyncio.Queue[Tuple[str, Dict[str, Any]]] = asyncio.Queue()
+    task = asyncio.ensure_future(
+        run_intellitube(request, ctx, script_cache=_script_cache(), on_event=lambda stage, f: events.put_nowait((stage, f)))
+    )
+    typical = _USER_RUNS.typical_seconds()
+    view = _ProgressView(
+        "Searching YouTube and transcribing videos…" + (f" Runs usually take about {typical:.0f} s." if typical else "")
     )
+    try:
+        yield view.render()
+        while not (task.done() and events.empty()):
+            getter = asyncio.ensure_future(events.get())
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                continue
+            view.apply(*getter.result())
+            yield view.render()
+        task.result()  # surface failures
+        view.set_status("Done.")
+        yield view.render()
+    finally:
+        if not task.done():
+            task.cancel()  # browser closed / run abandoned
+        get_tracer().write_prometheus()
 
 
 def build_ui() -> gr.Blocks:
+    # Spans -> cache/traces/spans.jsonl; latency histograms -> cache/traces/metrics.prom after every run.
+    configure_tracing("cache/traces")
+
     # NOTE: ultra-compatible: don't pass theme= or css= to Blocks for older Gradio
     with gr.Blocks() as demo:
         gr.HTML(CSS)
@@ -217,6 +359,22 @@ def build_ui() -> gr.Blocks:
                         max_knowledge_chars = gr.Slider(
                             50_000, 1_500_000, value=250_000, step=10_000, label="Max total transcript chars injected"
                         )
+                        rank_knowledge = gr.Checkbox(
+                            value=True, label="Rank transcript chunks by relevance to the topic (BM25)"
+                        )
+                        knowledge_tokens = gr.Slider(
+                            5_000, 200_000, value=60_000, step=5_000, label="Knowledge token budget (ranked mode)"
+                        )
+                        reuse_script = gr.Checkbox(
+                            value=False, label="Reuse cached script for the same topic + references"
+                        )
+                        use_indexer_agent = gr.Checkbox(
+                            value=False, label="Use LLM indexer agent (slower; default is direct search + transcribe)"
+                        )
+                        use_streaming = gr.Checkbox(
+                            value=False,
+                            label="Stream search → download → transcribe (stops transcribing at the char cap; direct indexer only)",
+                        )
 
                     with gr.Accordion("Audio (TTS) settings", open=True):
                         tts_speed = gr.Slider(0.75, 1.5, value=1.1, step=0.05, label="Playback speed")
@@ -230,11 +388,19 @@ def build_ui() -> gr.Blocks:
                             value="tts-1-hd",
                             label="TTS model",
                         )
+                        tts_format = gr.Dropdown(
+                            choices=["opus", "mp3", "wav"],
+                            value="opus",
+                            label="Audio format (opus/mp3 are loudness-normalized and much smaller)",
+                        )
                         gr.Markdown(
-                            "<div class='small-note'>Tip: install <b>ffmpeg</b> if you want exact speed control (auto-used if present).</div>"
+                            "<div class='small-note'>Tip: install <b>ffmpeg</b> for exact speed control on long clips and for opus/mp3 output (WAV is served without it).</div>"
                         )
 
-                    run_btn = gr.Button("Generate (2 variants + audio)", variant="primary")
+                    with gr.Row():
+                        run_btn = gr.Button("Generate (2 variants + audio)", variant="primary")
+                        cancel_btn = gr.Button("Cancel", variant="stop")
+                    status_md = gr.Markdown("")
                     gr.HTML("</div>")  # end .card
 
             # RIGHT: References sidebar
@@ -267,7 +433,7 @@ def build_ui() -> gr.Blocks:
 
         gr.HTML("</div></div>")  # end .card & #app-wrap
 
-        run_btn.click(
+        run_kwargs = dict(
             fn=_run_intellitube,
             inputs=[
                 search_query,
@@ -280,10 +446,27 @@ def build_ui() -> gr.Blocks:
                 tts_speed,
                 tts_model,
                 tts_voice,
+                use_indexer_agent,
+                use_streaming,
+                rank_knowledge,
+                knowledge_tokens,
+                reuse_script,
+                tts_format,
             ],
-            outputs=[v1_title, v1_desc, v1_audio, v2_title, v2_desc, v2_audio, refs_md],
+            outputs=[v1_title, v1_desc, v1_audio, v2_title, v2_desc, v2_audio, refs_md, status_md],
         )
+        try:
+            # every run shares one pool of _QUEUE.max_runs workers; waiting users see queue position + ETA
+            run_evt = run_btn.click(**run_kwargs, concurrency_limit=_QUEUE.max_runs, concurrency_id="intellitube-run")
+        except TypeError:  # older Gradio: the limit is set on the queue below
+            run_evt = run_btn.click(**run_kwargs)
+        # cancelling closes the handler, which cancels the run (queued runs just leave the queue)
+        cancel_btn.click(fn=None, inputs=None, outputs=None, cancels=[run_evt])
 
+    try:
+        demo.queue(max_size=_QUEUE.queue_size, default_concurrency_limit=_QUEUE.max_runs)
+    except TypeError:  # older Gradio
+        demo.queue(max_size=_QUEUE.queue_size, concurrency_count=_QUEUE.max_runs)
     return demo
 
 
@@ -0,0 +1,349 @@
+"""Offline stand-ins for YouTube, Whisper, OpenAI TTS and the Agents SDK runner.
+
+Each fake sleeps for a latency drawn from its ``Latency`` (lognormal around
+a median), fails at its error rate and returns payloads of a configurable
+size. Everything around them is the real code: search service and memo,
+audio/transcript caches, knowledge packing, script cache, WAV assembly,
+speed pass and encoding. ``bench/load.py`` drives the whole pipeline with
+them.
+
+    profile = FakeProfile().scaled(0.1)
+    ctx = fake_context(profile, Path("work"))
+    with fake_tts(profile):
+        await run_intellitube(request, ctx, writer=FakeWriter(), runner=FakeRunner(profile))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import random
+import sys
+import threading
+import time
+import types
+import wave
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from intellitube_agents.context import IntelliTubeContext, KeyedLocks, SearchMemo
+from intellitube_agents.schema import ScriptResult, VideoVariant
+from intellitube_agents.script.agent import SCRIPT_INSTRUCTIONS
+from youtube_audio.interfaces import VideoAudioInfo
+from youtube_search import DictFormatter, YouTubeSearchService
+from youtube_search.models import SearchResult
+from youtube_transcribe import YouTubeTranscriptService
+
+
+class FakeError(RuntimeError):
+    """An injected failure (``Latency.error_rate``)."""
+
+
+@dataclass(frozen=True)
+class Latency:
+    median_s: float
+    sigma: float = 0.5        # lognormal spread; 0 = always the median
+    error_rate: float = 0.0   # probability a call raises FakeError
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median_s <= 0:
+            return 0.0
+        return self.median_s * (math.exp(rng.gauss(0.0, self.sigma)) if self.sigma > 0 else 1.0)
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """``median[:sigma[:error_rate]]``, e.g. ``8:0.5:0.02``."""
+        parts = [float(p) for p in spec.split(":")]
+        if not 1 <= len(parts) <= 3:
+            raise ValueError(f"Expected median[:sigma[:error_rate]], got {spec!r}")
+        return cls(*parts)
+
+
+@dataclass(frozen=True)
+class FakeProfile:
+    """Latencies roughly as seen against the real services, plus payload sizes."""
+
+    search: Latency = Latency(1.5, 0.4)        # yt-dlp search
+    probe: Latency = Latency(0.8, 0.4)         # yt-dlp metadata
+    download: Latency = Latency(2.5, 0.6)      # audio download (cache misses only)
+    transcribe: Latency = Latency(8.0, 0.5)    # Whisper upload + transcription
+    writer: Latency = Latency(12.0, 0.4)       # script agent turn
+    tts: Latency = Latency(2.0, 0.4)           # one TTS request (per chunk)
+    video_pool: int = 300                      # distinct videos all searches draw from
+    video_seconds: int = 45                    # duration reported by search (<= max_duration keeps it)
+    audio_bytes: int = 1_000_000               # downloaded audio file size
+    transcript_chars: int = 4_000
+    script_chars: int = 900                    # per variant transcript
+    tts_chars_per_second: float = 15.0         # speaking rate of the fake audio
+    seed: int = 0
+
+    def scaled(self, factor: float) -> "FakeProfile":
+        """Every median latency multiplied by ``factor`` (shorter runs, same shape)."""
+        return replace(
+            self,
+            **{
+                name: replace(lat, median_s=lat.median_s * factor)
+                for name, lat in vars(self).items()
+                if isinstance(lat, Latency)
+            },
+        )
+
+
+class FakeCalls:
+    """Thread-safe RNG + per-dependency call counters shared by the fakes."""
+
+    def __init__(self, seed: int) -> None:
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def delay(self, name: str, lat: Latency) -> float:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            seconds = lat.sample(self._rng)
+            fail = self._rng.random() < lat.error_rate
+            if fail:
+                self.errors[name] = self.errors.get(name, 0) + 1
+        if fail:
+            raise FakeError(f"injected {name} failure")
+        return seconds
+
+    def sleep(self, name: str, lat: Latency) -> None:
+        time.sleep(self.delay(name, lat))
+
+    async def asleep(self, name: str, lat: Latency) -> None:
+        await asyncio.sleep(self.delay(name, lat))
+
+
+_WORDS = [
+    "".join(random.Random(i).choice("aeioubcdfghklmnprstvz") for _ in range(3 + i % 7)) for i in range(2_000)
+]
+
+
+def fake_text(chars: int, seed: str) -> str:
+    """Deterministic word salad with sentence breaks, ``chars`` long (roughly)."""
+    rng = random.Random(hashlib.sha1(seed.encode("utf-8")).hexdigest())
+    words: List[str] = []
+    n = 0
+    while n < chars:
+        w = rng.choice(_WORDS)
+        if rng.random() < 0.08:
+            w += "."
+        words.append(w)
+        n += len(w) + 1
+    return " ".join(words).rstrip(".") + "."
+
+
+def _video_id(i: int) -> str:
+    return f"fake{i:07d}"
+
+
+def _url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+class FakeSearchClient:
+    """``SearchClient``: each query maps to a fixed slice of a shared video pool."""
+
+    def __init__(self, profile: FakeProfile, calls: FakeCalls) -> None:
+        self._p = profile
+        self._calls = calls
+
+    def search(self, query: str, limit: int, sort_by_date: bool = False) -> List[SearchResult]:
+        self._calls.sleep("search", self._p.search)
+        rng = random.Random(f"{self._p.seed}|{query}")
+        ids = rng.sample(range(self._p.video_pool), min(limit, self._p.video_pool))
+        return [
+            SearchResult(
+                id=_video_id(i),
+                title=f"Fake video {i}",
+                url=_url(_video_id(i)),
+                channel=f"channel{i % 40}",
+                duration_seconds=self._p.video_seconds,
+                upload_date="20240101",
+            )
+            for i in ids
+        ]
+
+
+class FakeAudioClient:
+    """``AudioDownloadClient``: probe always, "download" (a sparse file) on cache misses."""
+
+    def __init__(self, profile: FakeProfile, calls: FakeCalls, cache_dir: Path) -> None:
+        self._p = profile
+        self._calls = calls
+        self._cache = cache_dir.resolve()
+        self._cache.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, video_id: str) -> Path:
+        return self._cache / f"{video_id}.m4a"
+
+    def download(self, url: str) -> str:
+        return self.get_info(url).audio_path
+
+    def get_info(self, url: str) -> VideoAudioInfo:
+        video_id = (parse_qs(urlparse(url).query).get("v") or [url.rsplit("/", 1)[-1]])[0]
+        t0 = time.perf_counter()
+        self._calls.sleep("probe", self._p.probe)
+        probe_seconds = time.perf_counter() - t0
+
+        path = self._path(video_id)
+        cached = path.exists()
+        t1 = time.perf_counter()
+        if not cached:
+            self._calls.sleep("download", self._p.download)
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            with tmp.open("wb") as f:
+                f.truncate(self._p.audio_bytes)
+            tmp.replace(path)
+        return VideoAudioInfo(
+            video_id=video_id,
+            title=f"Fake video {video_id}",
+            description=fake_text(200, f"desc|{video_id}"),
+            audio_path=str(path),
+            cached=cached,
+            probe_seconds=probe_seconds,
+            download_seconds=time.perf_counter() - t1,
+        )
+
+
+class FakeTranscriber:
+    """``TranscriptionClient``: text depends only on the audio file name."""
+
+    def __init__(self, profile: FakeProfile, calls: FakeCalls) -> None:
+        self._p = profile
+        self._calls = calls
+
+    def transcribe(self, audio_path: str, *, language: Optional[str] = None, prompt: Optional[str] = None) -> str:
+        self._calls.sleep("transcribe", self._p.transcribe)
+        return fake_text(self._p.transcript_chars, Path(audio_path).stem)
+
+
+@dataclass
+class FakeWriter:
+    """Enough of an ``Agent`` for prompt budgeting, cache keys and spans."""
+
+    model: str = "gpt-4.1-mini-2025-04-14"
+    instructions: str = SCRIPT_INSTRUCTIONS
+    output_type: Any = ScriptResult
+
+
+class FakeRunner:
+    """Agents SDK ``Runner`` stand-in: ``await run(...)`` returns a ``ScriptResult``."""
+
+    def __init__(self, profile: FakeProfile, calls: Optional[FakeCalls] = None) -> None:
+        self._p = profile
+        self._calls = calls or FakeCalls(profile.seed)
+
+    async def run(self, agent: Any, input: Any, *, context: Any = None, max_turns: int = 10) -> Any:
+        await self._calls.asleep("writer", self._p.writer)
+        prompt = input if isinstance(input, str) else str(input)
+        seed = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        result = ScriptResult(
+            topic="fake",
+            variants=[
+                VideoVariant(
+                    title=f"Variant {i}",
+                    description=fake_text(200, f"{seed}|d{i}"),
+                    transcript=fake_text(self._p.script_chars, f"{seed}|t{i}"),
+                )
+                for i in (1, 2)
+            ],
+        )
+        usage = types.SimpleNamespace(
+            requests=1,
+            input_tokens=len(prompt) // 4,
+            output_tokens=self._p.script_chars // 2,
+            total_tokens=len(prompt) // 4 + self._p.script_chars // 2,
+        )
+        return types.SimpleNamespace(final_output=result, context_wrapper=types.SimpleNamespace(usage=usage))
+
+
+def fake_context(
+    profile: FakeProfile,
+    root: Path,
+    *,
+    calls: Optional[FakeCalls] = None,
+    share_searches: bool = False,
+    max_concurrent_transcriptions: Optional[int] = None,
+) -> IntelliTubeContext:
+    """Like ``build_context`` with fake clients; caches live under ``root``."""
+    calls = calls or FakeCalls(profile.seed)
+    transcript_dir = (root / "cache/transcripts").resolve()
+    manifest_dir = (root / "cache/manifests").resolve()
+    manifest_dir.mkdir(parents=True, exist_ok=True)
+    return IntelliTubeContext(
+        search_service=YouTubeSearchService(
+            search_client=FakeSearchClient(profile, calls),
+            formatter=DictFormatter(),
+            detail_client=None,
+        ),
+        transcript_service=YouTubeTranscriptService(
+            audio_client=FakeAudioClient(profile, calls, root / "cache/audio"),
+            transcriber=FakeTranscriber(profile, calls),
+            transcript_cache_dir=str(transcript_dir),
+        ),
+        transcript_cache_dir=transcript_dir,
+        manifest_dir=manifest_dir,
+        video_locks=KeyedLocks(),
+        search_memo=SearchMemo() if share_searches else None,
+        transcribe_slots=(
+            threading.BoundedSemaphore(max_concurrent_transcriptions) if max_concurrent_transcriptions else None
+        ),
+    )
+
+
+class _FakeSpeechResponse:
+    def __init__(self, profile: FakeProfile, calls: FakeCalls, text: str) -> None:
+        self._p = profile
+        self._calls = calls
+        self._text = text
+
+    def __enter__(self) -> "_FakeSpeechResponse":
+        self._calls.sleep("tts", self._p.tts)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def stream_to_file(self, path: Any) -> None:
+        rate = 24_000
+        frames = int(len(self._text) / self._p.tts_chars_per_second * rate)
+        with wave.open(str(path), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(b"\0\0" * frames)
+
+
+class _FakeSpeech:
+    """``client.audio.speech``; ``with_streaming_response`` is itself."""
+
+    def __init__(self, profile: FakeProfile, calls: FakeCalls) -> None:
+        self._p = profile
+        self._calls = calls
+        self.with_streaming_response = self
+
+    def create(self, *, input: str, **_: Any) -> _FakeSpeechResponse:
+        return _FakeSpeechResponse(self._p, self._calls, input)
+
+
+@contextmanager
+def fake_tts(profile: FakeProfile, calls: Optional[FakeCalls] = None) -> Iterator[None]:
+    """Serve ``import openai`` inside ``tts.py`` from a fake module for the duration."""
+    module = types.ModuleType("openai")
+    module.audio = types.SimpleNamespace(speech=_FakeSpeech(profile, calls or FakeCalls(profile.seed)))  # type: ignore[attr-defined]
+    saved = sys.modules.get("openai")
+    sys.modules["openai"] = module
+    try:
+        yield
+    finally:
+        if saved is None:
+            sys.modules.pop("openai", None)
+        else:
+            sys.modules["openai"] = saved
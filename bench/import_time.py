@@ -0,0 +1,128 @@
+"""Import-time budget check.
+
+    python bench/import_time.py            # check every module against BUDGETS
+    python bench/import_time.py --top 15   # plus the slowest imports (python -X importtime)
+
+Each module is imported in a fresh interpreter ``--repeat`` times; the best
+run is compared with its budget. A module also fails if it loads any of its
+``deferred`` dependencies, which catches regressions that a fast machine
+would hide. Exits 1 when anything is over budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# module -> (budget in ms, heavy modules it must not load at import time)
+BUDGETS: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    "youtube_search": (30.0, ("yt_dlp",)),
+    "youtube_audio": (30.0, ("yt_dlp",)),
+    "youtube_transcribe": (30.0, ("openai", "numpy")),
+    "intellitube_agents": (30.0, ("agents", "openai", "yt_dlp", "pydantic")),
+    # pipeline needs pydantic (schemas) for --help; the SDKs load when a stage runs
+    "intellitube_agents.pipeline": (600.0, ("agents", "openai", "yt_dlp", "numpy", "tiktoken")),
+}
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+ms = (time.perf_counter() - t0) * 1000.0
+print(json.dumps({{"ms": ms, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(ROOT), env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+    return env
+
+
+def measure(module: str, deferred: Tuple[str, ...], repeat: int) -> Dict[str, Any]:
+    runs: List[float] = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, deferred=tuple(deferred))],
+            cwd=ROOT,
+            env=_env(),
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            err = (proc.stderr.strip().splitlines() or ["import failed"])[-1]
+            return {"module": module, "error": err}
+        out = json.loads(proc.stdout.strip().splitlines()[-1])
+        runs.append(float(out["ms"]))
+        loaded = sorted(set(loaded) | set(out["loaded"]))
+    runs.sort()
+    return {
+        "module": module,
+        "best_ms": round(runs[0], 1),
+        "median_ms": round(runs[len(runs) // 2], 1),
+        "loaded_deferred": loaded,
+    }
+
+
+def slowest_imports(module: str, top: int) -> List[Tuple[int, str]]:
+    """(cumulative us, module) pairs from ``python -X importtime``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=_env(),
+        capture_output=True,
+        text=True,
+    )
+    rows: List[Tuple[int, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:") :].split("|")]
+        if len(parts) == 3 and parts[1].isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Check per-module import time against the checked-in budget")
+    p.add_argument("modules", nargs="*", help="Subset of modules to check (default: all in BUDGETS)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--top", type=int, default=0, help="Also print the N slowest imports per module")
+    p.add_argument("--scale", type=float, default=1.0, help="Multiply budgets (slow CI machines)")
+    args = p.parse_args()
+
+    names = args.modules or list(BUDGETS)
+    unknown = [m for m in names if m not in BUDGETS]
+    if unknown:
+        p.error(f"No budget for: {', '.join(unknown)}")
+
+    failed = False
+    for name in names:
+        budget, deferred = BUDGETS[name]
+        res = measure(name, deferred, max(1, args.repeat))
+        res["budget_ms"] = round(budget * args.scale, 1)
+        if "error" in res:
+            res["status"] = "error"
+        elif res["loaded_deferred"] or res["best_ms"] > res["budget_ms"]:
+            res["status"] = "over"
+        else:
+            res["status"] = "ok"
+        failed = failed or res["status"] != "ok"
+        if args.top:
+            res["slowest"] = [{"module": m, "cumulative_ms": round(us / 1000.0, 1)} for us, m in slowest_imports(name, args.top)]
+        print(json.dumps(res, ensure_ascii=False))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Offline load test: N concurrent requests through the real pipeline, fake services.
+
+    python bench/load.py                                  # library API, 50 requests, 10 at a time
+    python bench/load.py --target pipeline --tts          # pipeline --batch path
+    python bench/load.py --target app --concurrency 2     # the Gradio handler (needs gradio)
+    python bench/load.py --latency transcribe=8:0.5:0.02 --time-scale 1
+
+YouTube, Whisper, OpenAI TTS and the script agent are replaced by the fakes
+in ``bench/fakes.py`` (latency, error rate and payload size per dependency);
+everything else runs for real inside a scratch directory. Requests draw
+from ``--queries`` distinct queries, so repeated queries exercise the
+search memo and the audio/transcript/TTS/script caches.
+
+Prints one JSON object: throughput, end-to-end p50/p95/p99, per-stage span
+percentiles, cache hit rates and how many calls each fake service received.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeCalls, FakeProfile, FakeRunner, FakeWriter, Latency, fake_context, fake_tts  # noqa: E402
+from intellitube_agents import pipeline  # noqa: E402
+from intellitube_agents.api import run_intellitube  # noqa: E402
+from intellitube_agents.schema import IntelliTubeRequest  # noqa: E402
+from intellitube_agents.script.cache import ScriptCache  # noqa: E402
+from intellitube_agents.tracing import _percentile, configure_tracing, get_tracer  # noqa: E402
+from intellitube_agents.tts import TTSConfig  # noqa: E402
+
+STAGES = (
+    "run", "search", "video", "audio", "probe", "download", "transcribe", "knowledge.build", "knowledge.pack",
+    "agent.script", "tts", "tts.chunk", "tts.speed", "tts.encode",
+)
+
+
+def make_jobs(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    rng = random.Random(args.seed)
+    jobs = []
+    for i in range(args.requests):
+        k = rng.randrange(args.queries)
+        jobs.append({"id": i, "query": f"fake query {k}", "topic": f"fake topic {k}"})
+    return jobs
+
+
+def _request(job: Dict[str, Any], args: argparse.Namespace) -> IntelliTubeRequest:
+    return IntelliTubeRequest(
+        search_query=job["query"],
+        topic=job["topic"],
+        limit=args.limit,
+        streaming=args.streaming,
+        reuse_script=args.reuse_script,
+        tts=args.tts,
+        tts_format=args.tts_format,
+    )
+
+
+async def _timed(coro: Any) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        await coro
+        rec: Dict[str, Any] = {"ok": True}
+    except Exception as e:
+        rec = {"ok": False, "error": type(e).__name__}
+    rec["elapsed_s"] = time.perf_counter() - t0
+    return rec
+
+
+async def drive_api(args: argparse.Namespace, profile: FakeProfile, calls: FakeCalls, root: Path) -> Dict[str, Any]:
+    """``run_intellitube`` with one shared context, as the HTTP server and batch mode use it."""
+    ctx = fake_context(
+        profile, root, calls=calls, share_searches=args.share_searches, max_concurrent_transcriptions=args.transcribe_workers
+    )
+    writer, runner = FakeWriter(), FakeRunner(profile, calls)
+    script_cache = ScriptCache(root / "cache/scripts") if args.reuse_script else None
+    sem = asyncio.Semaphore(max(1, args.concurrency))
+
+    async def one(job: Dict[str, Any]) -> Dict[str, Any]:
+        async with sem:
+            return await _timed(run_intellitube(_request(job, args), ctx, writer=writer, script_cache=script_cache, runner=runner))
+
+    records = await asyncio.gather(*(one(j) for j in make_jobs(args)))
+    return {"records": records, "script": script_cache.stats.as_dict() if script_cache else None}
+
+
+async def drive_pipeline(args: argparse.Namespace, profile: FakeProfile, calls: FakeCalls, root: Path) -> Dict[str, Any]:
+    """``pipeline --batch`` (``_run_batch``) with its context, writer and runner swapped for fakes."""
+    jobs_path, out_path = root / "jobs.jsonl", root / "results.jsonl"
+    jobs_path.write_text("".join(json.dumps(j) + "\n" for j in make_jobs(args)), encoding="utf-8")
+    batch_args = argparse.Namespace(
+        batch=str(jobs_path),
+        batch_out=str(out_path),
+        batch_concurrency=args.concurrency,
+        transcribe_workers=args.transcribe_workers,
+        transcribe_model="whisper-1",
+        vad=False,
+        skip_duplicate_videos=False,
+        script_cache=args.reuse_script,
+        script_cache_ttl=7 * 24 * 3600,
+        refresh_script=False,
+        limit=args.limit,
+        by_date=False,
+        max_duration=60,
+        indexer="direct",
+        streaming=args.streaming,
+        max_knowledge_chars=250_000,
+        knowledge_mode="ranked",
+        knowledge_tokens=60_000,
+        prompt_tokens=None,
+        keep_duplicates=False,
+        tts=args.tts,
+        tts_model=TTSConfig.model,
+        tts_voice=TTSConfig.voice,
+        tts_speed=TTSConfig.speed,
+        tts_format=args.tts_format,
+        tts_bitrate=None,
+    )
+    runner = FakeRunner(profile, calls)
+    caches: List[ScriptCache] = []
+
+    def script_cache(**kw: Any) -> ScriptCache:
+        caches.append(ScriptCache(**kw))
+        return caches[-1]
+
+    patches = {
+        "build_context": lambda **kw: fake_context(
+            profile,
+            root,
+            calls=calls,
+            share_searches=kw.get("share_searches", False),
+            max_concurrent_transcriptions=kw.get("max_concurrent_transcriptions"),
+        ),
+        "get_script_agent": FakeWriter,
+        "run_intellitube": partial(run_intellitube, runner=runner),
+        "ScriptCache": script_cache,
+    }
+    saved = {name: getattr(pipeline, name) for name in patches}
+    try:
+        for name, value in patches.items():
+            setattr(pipeline, name, value)
+        with contextlib.redirect_stdout(io.StringIO()):  # the batch's own log lines
+            await pipeline._run_batch(batch_args)
+    finally:
+        for name, value in saved.items():
+            setattr(pipeline, name, value)
+
+    records = []
+    for line in out_path.read_text(encoding="utf-8").splitlines():
+        rec = json.loads(line)
+        records.append(
+            {"ok": rec["ok"], "error": (rec.get("error") or "").split(":")[0] or None, "elapsed_s": rec["elapsed_s"]}
+        )
+    return {"records": records, "script": caches[0].stats.as_dict() if caches else None}
+
+
+async def drive_app(args: argparse.Namespace, profile: FakeProfile, calls: FakeCalls, root: Path) -> Dict[str, Any]:
+    """The Gradio handler ``app._run_intellitube`` (not Gradio's queue), one simulated user per request."""
+    try:
+        import app  # needs gradio; imported here so the other targets don't
+    except ImportError as e:
+        raise SystemExit(f"--target app needs the web app's dependencies: {e}") from e
+
+    ctx = fake_context(profile, root, calls=calls, max_concurrent_transcriptions=args.transcribe_workers)
+    app.get_context = lambda **kw: ctx
+    app.run_intellitube = partial(run_intellitube, writer=FakeWriter(), runner=FakeRunner(profile, calls))
+    sem = asyncio.Semaphore(max(1, args.concurrency))  # Gradio's concurrency_limit
+
+    async def consume(job: Dict[str, Any]) -> None:
+        user = SimpleNamespace(session_hash=f"load-{job['id']}", username=None, headers={}, client=None)
+        async for _ in app._run_intellitube(
+            job["query"], job["topic"], args.limit, False, 60, "whisper-1", 250_000,
+            TTSConfig.speed, TTSConfig.model, TTSConfig.voice,
+            use_streaming=args.streaming, reuse_script=args.reuse_script, tts_format=args.tts_format, request=user,
+        ):
+            pass
+
+    async def one(job: Dict[str, Any]) -> Dict[str, Any]:
+        async with sem:
+            return await _timed(consume(job))
+
+    records = await asyncio.gather(*(one(j) for j in make_jobs(args)))
+    return {"records": records, "script": app._script_cache().stats.as_dict()}
+
+
+DRIVERS = {"api": drive_api, "pipeline": drive_pipeline, "app": drive_app}
+
+
+def report(args: argparse.Namespace, out: Dict[str, Any], elapsed: float, calls: FakeCalls) -> Dict[str, Any]:
+    records = out["records"]
+    ok = [r for r in records if r["ok"]]
+    errors: Dict[str, int] = {}
+    for r in records:
+        if not r["ok"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    lat = sorted(r["elapsed_s"] for r in ok)
+    spans = get_tracer().summary()
+    return {
+        "target": args.target,
+        "requests": len(records),
+        "concurrency": args.concurrency,
+        "time_scale": args.time_scale,
+        "ok": len(ok),
+        "failed": len(records) - len(ok),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed > 0 else None,
+        "latency_s": {f"p{int(q * 100)}": round(_percentile(lat, q), 3) for q in (0.5, 0.95, 0.99)} if lat else None,
+        "stages": {
+            name: {k: spans[name][k] for k in ("count", "errors", "p50_s", "p95_s", "p99_s", "cache_hits")}
+            for name in STAGES
+            if name in spans
+        },
+        "cache": {
+            "search": pipeline._cache_rate(spans, "search"),
+            "video": pipeline._cache_rate(spans, "video"),
+            "download": pipeline._cache_rate(spans, "download"),
+            "tts": pipeline._cache_rate(spans, "tts"),
+            "script": out["script"],
+        },
+        "fake_calls": calls.counts,
+        "fake_errors": calls.errors,
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Offline end-to-end load test with latency-simulating fakes")
+    p.add_argument("--target", choices=sorted(DRIVERS), default="api")
+    p.add_argument("--requests", type=int, default=50)
+    p.add_argument("--concurrency", type=int, default=10, help="Requests in flight at once")
+    p.add_argument("--queries", type=int, default=20, help="Distinct queries/topics the requests draw from")
+    p.add_argument("--limit", type=int, default=5, help="Videos per request")
+    p.add_argument("--streaming", action="store_true")
+    p.add_argument("--share-searches", action="store_true", help="api target: memoize searches across requests")
+    p.add_argument("--reuse-script", action="store_true", help="Serve cached scripts for repeated topic/knowledge")
+    p.add_argument("--tts", action="store_true", help="Synthesize audio (always on for --target app)")
+    p.add_argument("--tts-format", choices=["opus", "mp3", "wav"], default="opus")
+    p.add_argument("--transcribe-workers", type=int, default=4, help="Concurrent transcriptions across all requests")
+    p.add_argument("--time-scale", type=float, default=0.1, help="Multiply every fake latency (1 = production-like)")
+    p.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        metavar="NAME=MEDIAN[:SIGMA[:ERROR_RATE]]",
+        help="Override a fake (search, probe, download, transcribe, writer, tts); seconds before --time-scale",
+    )
+    p.add_argument("--error-rate", type=float, default=None, help="Error rate for every fake without an override")
+    p.add_argument("--video-pool", type=int, default=FakeProfile.video_pool)
+    p.add_argument("--transcript-chars", type=int, default=FakeProfile.transcript_chars)
+    p.add_argument("--script-chars", type=int, default=FakeProfile.script_chars)
+    p.add_argument("--audio-bytes", type=int, default=FakeProfile.audio_bytes)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--workdir", help="Keep caches here instead of a temporary directory")
+    args = p.parse_args()
+
+    profile = FakeProfile(
+        video_pool=args.video_pool,
+        transcript_chars=args.transcript_chars,
+        script_chars=args.script_chars,
+        audio_bytes=args.audio_bytes,
+        seed=args.seed,
+    )
+    if args.error_rate is not None:
+        profile = replace(profile, **{n: replace(v, error_rate=args.error_rate) for n, v in vars(profile).items() if isinstance(v, Latency)})
+    for spec in args.latency:
+        name, _, value = spec.partition("=")
+        if not isinstance(getattr(profile, name, None), Latency):
+            p.error(f"Unknown fake {name!r} in --latency {spec}")
+        try:
+            profile = replace(profile, **{name: Latency.parse(value)})
+        except ValueError as e:
+            p.error(str(e))
+    profile = profile.scaled(args.time_scale)
+
+    calls = FakeCalls(args.seed)
+    with contextlib.ExitStack() as stack:
+        root = Path(args.workdir or stack.enter_context(tempfile.TemporaryDirectory(prefix="intellitube-load-"))).resolve()
+        root.mkdir(parents=True, exist_ok=True)
+        cwd = os.getcwd()
+        os.chdir(root)  # relative cache paths (TTS, scripts, traces) land in the scratch dir
+        stack.callback(os.chdir, cwd)
+        stack.enter_context(fake_tts(profile, calls))
+        configure_tracing(None)
+
+        t0 = time.perf_counter()
+        out = asyncio.run(DRIVERS[args.target](args, profile, calls, root))
+        elapsed = time.perf_counter() - t0
+
+    print(json.dumps(report(args, out, elapsed, calls), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
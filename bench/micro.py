@@ -0,0 +1,355 @@
+"""Microbenchmarks for the parts of IntelliTube that run locally.
+
+    python bench/micro.py                                   # every case, full-size fixtures
+    python bench/micro.py --quick -k tts -k transcript      # small fixtures, matching cases only
+    python bench/micro.py --save bench/baseline.json        # keep the results
+    python bench/micro.py --compare bench/baseline.json     # exit 1 on regressions
+
+Fixtures are synthetic and built in a scratch directory: audio caches with
+10k-100k files, MB-scale transcripts, WAV pieces, large search result lists.
+Every case is timed ``--repeat`` times after calibrating how many calls make
+one measurable round; the best per-call time is what gets compared.
+Prints one JSON line per case. Cases whose dependencies are missing (e.g.
+pydantic for the knowledge builder) are reported as skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from intellitube_agents.dedup import drop_near_duplicates  # noqa: E402
+from intellitube_agents.knowledge import pack_knowledge  # noqa: E402
+from intellitube_agents.tts import _chunk_text, _concat_wavs, _ffmpeg_atempo_chain, _pack_sentences  # noqa: E402
+from youtube_audio.clients import YtDlpAudioClient  # noqa: E402
+from youtube_search import DictFormatter, TableFormatter  # noqa: E402
+from youtube_search.models import SearchResult  # noqa: E402
+from youtube_transcribe.storage import read_header, read_transcript, write_transcript  # noqa: E402
+
+_VOCAB = (
+    "python code function value list loop class data model video audio speech voice cache file index "
+    "search query result topic script writer token budget chunk sentence transcript whisper youtube "
+    "learn build fast slow simple example because when then there which about would could people"
+).split()
+
+
+def synthetic_text(chars: int, seed: int = 0) -> str:
+    """Sentence-shaped filler, ``chars`` long (roughly)."""
+    rng = random.Random(seed)
+    out: List[str] = []
+    n = 0
+    while n < chars:
+        sentence = " ".join(rng.choice(_VOCAB) for _ in range(rng.randint(6, 24))).capitalize()
+        sentence += rng.choice(".?!.")
+        out.append(sentence)
+        n += len(sentence) + 1
+    return " ".join(out)
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[Path], Callable[[], Any]]   # builds fixtures under a scratch dir, returns the timed call
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+# ---------------- fixtures ----------------
+
+_AUDIO_CACHES: Dict[int, Path] = {}
+
+
+def _audio_cache(root: Path, files: int) -> Path:
+    """``files`` audio files (<id>.m4a); every even id also has its <id>.json pointer. Built once per size."""
+    if files not in _AUDIO_CACHES:
+        d = root / f"audio_{files}"
+        d.mkdir(parents=True, exist_ok=True)
+        for i in range(files):
+            vid = f"vid{i:08d}"
+            (d / f"{vid}.m4a").touch()
+            if i % 2 == 0:
+                (d / f"{vid}.json").write_text(json.dumps({"video_id": vid, "audio_path": str(d / f"{vid}.m4a")}))
+        _AUDIO_CACHES[files] = d
+    return _AUDIO_CACHES[files]
+
+
+def _wav_pieces(root: Path, pieces: int, seconds: float = 2.0, rate: int = 24_000) -> List[Path]:
+    d = root / f"wav_{pieces}"
+    d.mkdir(parents=True, exist_ok=True)
+    frames = random.Random(pieces).randbytes(int(seconds * rate) * 2)
+    paths = []
+    for i in range(pieces):
+        p = d / f"piece_{i}.wav"
+        with wave.open(str(p), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(frames)
+        paths.append(p)
+    return paths
+
+
+def _payload(mb: float, seed: int = 0) -> Dict[str, Any]:
+    return {
+        "url": "https://www.youtube.com/watch?v=bench",
+        "video_id": "bench",
+        "title": "Benchmark transcript",
+        "description": synthetic_text(400, seed + 1),
+        "transcript": synthetic_text(int(mb * 1_000_000), seed),
+    }
+
+
+def _results(n: int) -> List[SearchResult]:
+    return [
+        SearchResult(
+            id=f"vid{i:08d}",
+            title=f"Video {i} | {_VOCAB[i % len(_VOCAB)]} tutorial",
+            url=f"https://www.youtube.com/watch?v=vid{i:08d}",
+            channel=f"channel {i % 500}",
+            duration_seconds=30 + i % 600,
+            upload_date="20240101",
+        )
+        for i in range(n)
+    ]
+
+
+# ---------------- cases ----------------
+
+def _chunk_case(chars: int, fn: Callable[[str], List[str]]) -> Callable[[Path], Callable[[], Any]]:
+    def setup(root: Path) -> Callable[[], Any]:
+        text = synthetic_text(chars)
+        return lambda: fn(text)
+
+    return setup
+
+
+def _concat_case(pieces: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(root: Path) -> Callable[[], Any]:
+        wavs = _wav_pieces(root, pieces)
+        out = root / f"merged_{pieces}.wav"
+        return lambda: _concat_wavs(wavs, out)
+
+    return setup
+
+
+def _atempo_case(root: Path) -> Callable[[], Any]:
+    speeds = [0.1 + i * 0.0039 for i in range(1000)]  # 0.1x .. 4.0x, chains of 1-4 filters
+    return lambda: [_ffmpeg_atempo_chain(s) for s in speeds]
+
+
+def _resolve_case(files: int, which: str) -> Callable[[Path], Callable[[], Any]]:
+    def setup(root: Path) -> Callable[[], Any]:
+        client = YtDlpAudioClient(cache_dir=_audio_cache(root, files))
+        # meta: <id>.json pointer (even ids); scan: glob for <id>.* (odd ids); miss: glob finds nothing
+        mid = files // 2
+        vid = {"meta": f"vid{mid & ~1:08d}", "scan": f"vid{mid | 1:08d}", "miss": "missing"}[which]
+        return lambda: client._resolve_existing_audio(vid)
+
+    return setup
+
+
+def _transcript_case(mb: float, op: str) -> Callable[[Path], Callable[[], Any]]:
+    def setup(root: Path) -> Callable[[], Any]:
+        payload = _payload(mb)
+        itx = root / f"transcript_{mb:g}mb.itx"
+        write_transcript(itx, payload)
+        if op == "write":
+            return lambda: write_transcript(itx, payload)
+        if op == "read":
+            return lambda: read_transcript(itx)
+        if op == "read_header":
+            return lambda: read_header(itx)
+        legacy = root / f"transcript_{mb:g}mb.json"  # the pretty-printed format older versions wrote
+        legacy.write_text(json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        return lambda: read_transcript(legacy)
+
+    return setup
+
+
+def _knowledge_build_case(transcripts: int, kb: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(root: Path) -> Callable[[], Any]:
+        from intellitube_agents.api import build_knowledge  # needs pydantic
+        from intellitube_agents.schema import IndexerResult, TranscriptArtifact
+
+        d = root / f"knowledge_{transcripts}x{kb}"
+        d.mkdir(parents=True, exist_ok=True)
+        arts = []
+        for i in range(transcripts):
+            p = d / f"vid{i:08d}.itx"
+            write_transcript(p, {**_payload(kb / 1000, seed=i), "video_id": f"vid{i:08d}"})
+            arts.append(TranscriptArtifact(video_id=f"vid{i:08d}", url=f"https://youtu.be/vid{i:08d}", transcript_path=str(p)))
+        res = IndexerResult(search_query="bench", requested_limit=transcripts, found=transcripts, transcripts=arts)
+        return lambda: build_knowledge(res)
+
+    return setup
+
+
+def _knowledge_pack_case(docs: int, kb: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(root: Path) -> Callable[[], Any]:
+        items = [
+            {"title": f"Video {i}", "description": synthetic_text(300, i + 10_000), "transcript": synthetic_text(kb * 1000, i)}
+            for i in range(docs)
+        ]
+        return lambda: pack_knowledge(items, "python cache speed", token_budget=60_000)
+
+    return setup
+
+
+def _dedup_case(docs: int, kb: int) -> Callable[[Path], Callable[[], Any]]:
+    def setup(root: Path) -> Callable[[], Any]:
+        items = [{"transcript": synthetic_text(kb * 1000, i)} for i in range(docs)]
+        items.append({"transcript": items[0]["transcript"] + " And one more sentence."})  # one near-duplicate to drop
+        return lambda: drop_near_duplicates(items)
+
+    return setup
+
+
+def _formatter_case(n: int, formatter: Any) -> Callable[[Path], Callable[[], Any]]:
+    def setup(root: Path) -> Callable[[], Any]:
+        results = _results(n)
+        return lambda: formatter.format_results(results)
+
+    return setup
+
+
+def build_cases(args: argparse.Namespace) -> List[Case]:
+    cases: List[Case] = []
+    for chars in (20_000, 1_000_000):
+        cases.append(Case(f"tts._chunk_text[chars={chars}]", _chunk_case(chars, _chunk_text), {"chars": chars}))
+        cases.append(Case(f"tts._pack_sentences[chars={chars}]", _chunk_case(chars, _pack_sentences), {"chars": chars}))
+    for pieces in (20, 200):
+        cases.append(Case(f"tts._concat_wavs[pieces={pieces}]", _concat_case(pieces), {"pieces": pieces, "piece_s": 2.0}))
+    cases.append(Case("tts._ffmpeg_atempo_chain[x1000]", _atempo_case, {"speeds": 1000}))
+    for files in args.cache_files:
+        for which in ("meta", "scan", "miss"):
+            cases.append(
+                Case(f"audio._resolve_existing_audio[files={files},{which}]", _resolve_case(files, which), {"files": files, "lookup": which})
+            )
+    for mb in args.transcript_mb:
+        for op in ("write", "read", "read_header", "read_legacy_json"):
+            cases.append(Case(f"transcript.{op}[mb={mb:g}]", _transcript_case(mb, op), {"mb": mb}))
+    cases.append(Case("knowledge.build[transcripts=20,kb=250]", _knowledge_build_case(20, 250), {"transcripts": 20, "kb": 250}))
+    cases.append(Case("knowledge.pack[docs=20,kb=50]", _knowledge_pack_case(20, 50), {"docs": 20, "kb": 50}))
+    cases.append(Case("knowledge.dedup[docs=20,kb=50]", _dedup_case(20, 50), {"docs": 20, "kb": 50}))
+    for n in args.results:
+        cases.append(Case(f"search.DictFormatter[results={n}]", _formatter_case(n, DictFormatter()), {"results": n}))
+        cases.append(Case(f"search.TableFormatter[results={n}]", _formatter_case(n, TableFormatter()), {"results": n}))
+    return cases
+
+
+# ---------------- timing / comparison ----------------
+
+def measure(fn: Callable[[], Any], repeat: int, min_round_s: float) -> Dict[str, Any]:
+    """Per-call seconds: ``number`` calls per round, ``repeat`` rounds."""
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        dt = time.perf_counter() - t0
+        if dt >= min_round_s or number >= 1_000_000:
+            break
+        number = min(1_000_000, max(number * 2, int(number * min_round_s / max(dt, 1e-9))))
+    rounds = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - t0) / number)
+    rounds.sort()
+    return {
+        "best_s": float(f"{rounds[0]:.4g}"),
+        "median_s": float(f"{rounds[len(rounds) // 2]:.4g}"),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> Optional[Dict[str, Any]]:
+    """Ratio of best times (> 1 is slower) and a verdict; None when the baseline lacks the case."""
+    if "best_s" not in current or "best_s" not in baseline or not baseline["best_s"]:
+        return None
+    ratio = current["best_s"] / baseline["best_s"]
+    verdict = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 / (1 + threshold) else "same"
+    return {"baseline_best_s": baseline["best_s"], "ratio": round(ratio, 3), "verdict": verdict}
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Microbenchmarks for local hot paths, with baseline comparison")
+    p.add_argument("-k", dest="filters", action="append", default=[], help="Only cases matching this regex (repeatable)")
+    p.add_argument("--list", action="store_true", help="List case names and exit")
+    p.add_argument("--quick", action="store_true", help="Small fixtures only (10k cache files, 1 MB transcripts)")
+    p.add_argument("--cache-files", type=int, nargs="+", default=[10_000, 100_000])
+    p.add_argument("--transcript-mb", type=float, nargs="+", default=[1.0, 8.0])
+    p.add_argument("--results", type=int, nargs="+", default=[10_000, 100_000], help="Search result list sizes")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--min-round", type=float, default=0.1, help="Seconds per timing round (calls are batched up to it)")
+    p.add_argument("--save", help="Write all results to this JSON file")
+    p.add_argument("--compare", help="Baseline JSON (from --save); exit 1 if a case got slower")
+    p.add_argument("--threshold", type=float, default=0.25, help="Relative slowdown that counts as a regression")
+    p.add_argument("--workdir", help="Build fixtures here instead of a temporary directory")
+    args = p.parse_args()
+    if args.quick:
+        args.cache_files, args.transcript_mb, args.results = [10_000], [1.0], [10_000]
+
+    cases = [c for c in build_cases(args) if not args.filters or any(re.search(f, c.name) for f in args.filters)]
+    if args.list:
+        for c in cases:
+            print(c.name)
+        return
+
+    baseline: Dict[str, Any] = {}
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")).get("results", {})
+
+    results: Dict[str, Dict[str, Any]] = {}
+    regressed = False
+    with tempfile.TemporaryDirectory(prefix="intellitube-micro-") as td:
+        root = Path(args.workdir or td).resolve()
+        root.mkdir(parents=True, exist_ok=True)
+        for case in cases:
+            row: Dict[str, Any] = {"case": case.name, **case.params}
+            try:
+                t0 = time.perf_counter()
+                fn = case.setup(root)
+                row["setup_s"] = round(time.perf_counter() - t0, 3)
+                row.update(measure(fn, max(1, args.repeat), args.min_round))
+            except ImportError as e:
+                row.update(status="skipped", reason=str(e))
+            if case.name in baseline:
+                cmp = compare(row, baseline[case.name], args.threshold)
+                if cmp:
+                    row.update(cmp)
+                    regressed = regressed or cmp["verdict"] == "slower"
+            results[case.name] = row
+            print(json.dumps(row, ensure_ascii=False), flush=True)
+
+    if baseline:
+        verdicts = [r["verdict"] for r in results.values() if "verdict" in r]
+        print(json.dumps({"compared": len(verdicts), **{v: verdicts.count(v) for v in ("slower", "same", "faster")}}))
+
+    if args.save:
+        meta = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        }
+        Path(args.save).write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n", encoding="utf-8")
+
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark the TTS speed pass: in-process WSOLA vs. ffmpeg atempo.
+
+    python bench/tts_stretch.py                       # synthetic speech-like clips
+    python bench/tts_stretch.py --wav cache/tts/x.wav # a real (16-bit PCM) clip
+
+For every clip length and speed, both paths go WAV file -> WAV file (ffmpeg
+timings include the process spawn) and their output is scored with
+``timestretch.stretch_quality``. Prints one JSON line per run; exits 1 if
+a WSOLA result fails ``timestretch.quality_ok``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from intellitube_agents.timestretch import (  # noqa: E402
+    _np,
+    quality_ok,
+    read_wav_pcm16,
+    stretch_quality,
+    stretch_wav,
+    write_wav_pcm16,
+)
+from intellitube_agents.tts import _adjust_speed_ffmpeg, _ffmpeg_available  # noqa: E402
+
+
+def synthetic_voice(seconds: float, sample_rate: int = 24_000, seed: int = 0) -> Any:
+    """Gliding 110-220 Hz harmonic tone with syllable-rate envelope, pauses and a little noise."""
+    np = _np()
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = 165 + 55 * np.sin(2 * np.pi * 0.4 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voiced = sum((0.5 / k) * np.sin(k * phase) for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 4.0 * t), 0.0, None) * (np.sin(2 * np.pi * 0.3 * t) > -0.7)
+    noise = 0.01 * np.random.default_rng(seed).standard_normal(len(t))
+    return (0.6 * voiced * envelope + noise).astype(np.float32)
+
+
+def _timed(fn: Any, *args: Any) -> float:
+    t0 = time.perf_counter()
+    ok = fn(*args)
+    dt = time.perf_counter() - t0
+    return dt if ok is not False else float("nan")
+
+
+def run_case(src: Path, speed: float, repeat: int, td: Path) -> List[Dict[str, Any]]:
+    original, rate, _ = read_wav_pcm16(src)
+    seconds = len(original) / rate
+    paths = {"wsola": stretch_wav}
+    if _ffmpeg_available():
+        paths["ffmpeg"] = _adjust_speed_ffmpeg
+
+    rows: List[Dict[str, Any]] = []
+    for name, fn in paths.items():
+        out = td / f"{src.stem}.{name}.{speed:g}.wav"
+        times = sorted(_timed(fn, src, out, speed) for _ in range(repeat))
+        stretched, _, _ = read_wav_pcm16(out)
+        q = stretch_quality(original, stretched, speed, rate)
+        rows.append(
+            {
+                "method": name,
+                "clip_s": round(seconds, 2),
+                "speed": speed,
+                "best_ms": round(times[0] * 1000.0, 1),
+                "median_ms": round(times[len(times) // 2] * 1000.0, 1),
+                "realtime_x": round(seconds / times[0], 1) if times[0] > 0 else None,
+                **q,
+                "quality_ok": quality_ok(q),
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="WSOLA vs ffmpeg speed pass: latency and quality")
+    p.add_argument("--wav", action="append", default=[], help="Benchmark this WAV instead of synthetic clips")
+    p.add_argument("--seconds", type=float, nargs="+", default=[3.0, 15.0, 60.0])
+    p.add_argument("--speed", type=float, nargs="+", default=[0.9, 1.1, 1.25, 1.5])
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    if not _ffmpeg_available():
+        print(json.dumps({"note": "ffmpeg not found; timing WSOLA only"}))
+
+    failed = False
+    with tempfile.TemporaryDirectory() as d:
+        td = Path(d)
+        sources = [Path(w) for w in args.wav]
+        if not sources:
+            for s in args.seconds:
+                src = td / f"synthetic_{s:g}s.wav"
+                write_wav_pcm16(src, synthetic_voice(s), 24_000)
+                sources.append(src)
+        for src in sources:
+            for speed in args.speed:
+                for row in run_case(src, speed, max(1, args.repeat), td):
+                    failed = failed or (row["method"] == "wsola" and not row["quality_ok"])
+                    print(json.dumps(row))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
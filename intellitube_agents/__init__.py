@@ -1,5 +1,39 @@
-from .context import build_context, IntelliTubeContext
-from .indexer.agent import build_indexer_agent
-from .script.agent import build_script_agent
+"""IntelliTube agents.
 
-__all__ = ["build_context", "IntelliTubeContext", "build_indexer_agent", "build_script_agent"]
+Exports resolve on first attribute access (PEP 562), so ``import
+intellitube_agents`` and ``python -m intellitube_agents.pipeline --help``
+don't pay for the Agents SDK, OpenAI or yt-dlp up front.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict
+
+from ._lazy import attach
+
+_EXPORTS: Dict[str, str] = {
+    "build_context": ".context",
+    "get_context": ".context",
+    "IntelliTubeContext": ".context",
+    "build_indexer_agent": ".indexer.agent",
+    "get_indexer_agent": ".indexer.agent",
+    "run_indexer": ".indexer.direct",
+    "run_direct_indexer": ".indexer.direct",
+    "build_script_agent": ".script.agent",
+    "get_script_agent": ".script.agent",
+    "run_intellitube": ".api",
+    "IntelliTubeRequest": ".schema",
+    "IntelliTubeResponse": ".schema",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = attach(__name__, _EXPORTS)
+
+
+if TYPE_CHECKING:
+    from .api import run_intellitube
+    from .context import build_context, get_context, IntelliTubeContext
+    from .indexer.agent import build_indexer_agent, get_indexer_agent
+    from .indexer.direct import run_indexer, run_direct_indexer
+    from .schema import IntelliTubeRequest, IntelliTubeResponse
+    from .script.agent import build_script_agent, get_script_agent
@@ -0,0 +1,321 @@
+"""Async library API: ``await run_intellitube(request, ctx)``.
+
+One ``IntelliTubeContext`` (search/transcription clients, caches, dedup
+index, per-video locks) is meant to be shared by every concurrent run in the
+process. Blocking work (yt-dlp, Whisper uploads, knowledge packing, TTS)
+runs in worker threads; agent turns use the async ``Runner.run``, so a run
+never blocks the event loop.
+
+Cancelling the task cancels the run: pending agent turns and not-yet-started
+videos are abandoned, and the streaming indexer stops feeding new rows.
+Videos already being downloaded/transcribed finish and stay cached for the
+next run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from youtube_transcribe.storage import read_transcript
+
+from .context import IntelliTubeContext
+from .dedup import drop_near_duplicates
+from .indexer.direct import index_search_rows, indexer_input, search_videos
+from .schema import IndexerResult, IntelliTubeRequest, IntelliTubeResponse, ScriptResult, SearchResultRow
+from .script.agent import SCRIPT_INSTRUCTIONS_VERSION, build_writer_input, get_script_agent
+from .script.budget import PromptBudget, TokenCounter, actual_input_tokens, fit_ordered, fit_ranked, plan_prompt_budget
+from .script.cache import ScriptCache, knowledge_hash
+from .streaming import run_streaming
+from .tracing import span, usage_attrs
+from .tts import TTSConfig, synthesize_tts_to_file
+
+if TYPE_CHECKING:
+    from agents import Agent
+
+# (stage, fields) progress callback; called from the event loop thread.
+# Stages in order: index, knowledge, script, tts.variant (once per variant, as each finishes), tts.
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+def build_knowledge(
+    index_result: IndexerResult,
+    max_chars: Optional[int] = None,
+    rows: Optional[Sequence[SearchResultRow]] = None,
+) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]], int]:
+    """Read cached transcripts back in index order (up to ``max_chars``).
+
+    Returns ``(knowledge, references, total_chars)``; ``references`` is
+    aligned with ``knowledge`` and enriched from search ``rows`` when given.
+    """
+    by_url = {r.url: r for r in rows or []}
+    knowledge: List[Dict[str, str]] = []
+    references: List[Dict[str, Any]] = []
+    total = 0
+    with span("knowledge.build", transcripts=len(index_result.transcripts)) as sp:
+        for art in index_result.transcripts:
+            data = read_transcript(Path(art.transcript_path).expanduser().resolve())
+            if not data:
+                continue
+
+            title = str(data.get("title") or "")
+            desc = str(data.get("description") or "")
+            tx = str(data.get("transcript") or "")
+
+            if not tx.strip():
+                continue
+
+            if max_chars is not None and total + len(tx) > max_chars:
+                break
+
+            row = by_url.get(art.url)
+            references.append(
+                {
+                    "id": art.video_id,
+                    "title": title or (row.title if row else ""),
+                    "url": str(data.get("url") or art.url or ""),
+                    "channel": (row.channel if row else None) or str(data.get("channel") or ""),
+                    "duration_seconds": row.duration_seconds if row else data.get("duration_seconds"),
+                }
+            )
+            knowledge.append({"title": title, "description": desc, "transcript": tx})
+            total += len(tx)
+        sp.set(items=len(knowledge), total_chars=total)
+    return knowledge, references, total
+
+
+@dataclass
+class PackedKnowledge:
+    items: List[Dict[str, str]]               # what the writer sees
+    references: List[Dict[str, Any]]          # aligned with ``items``
+    budget: PromptBudget
+    knowledge_tokens: int
+    selection: Optional[Dict[str, Any]] = None                           # ranked-mode report
+    dropped_duplicates: List[Tuple[int, int, float]] = field(default_factory=list)
+
+    @property
+    def predicted_input_tokens(self) -> int:
+        return self.budget.overhead_tokens + self.knowledge_tokens
+
+
+def pack_for_writer(
+    writer: Agent,
+    topic: str,
+    knowledge: Sequence[Dict[str, str]],
+    references: Sequence[Any],
+    *,
+    mode: str = "ranked",
+    knowledge_tokens: int = 60_000,
+    max_chars: Optional[int] = None,
+    prompt_tokens: Optional[int] = None,
+    keep_duplicates: bool = False,
+) -> PackedKnowledge:
+    """Dedup, then fit ``knowledge`` to the writer's token budget (BM25-ranked or in order)."""
+    items = list(knowledge)
+    refs = list(references)
+    with span("knowledge.pack", mode=mode, docs=len(items)) as sp:
+        dropped: List[Tuple[int, int, float]] = []
+        if not keep_duplicates:
+            keep, dropped = drop_near_duplicates(items)
+            if dropped:
+                items = [items[i] for i in keep]
+                refs = [refs[i] for i in keep]
+
+        counter = TokenCounter(str(writer.model))
+        budget = plan_prompt_budget(writer, topic, counter, target_tokens=prompt_tokens)
+
+        selection = None
+        if mode == "ranked":
+            pack, used = fit_ranked(items, topic, budget, counter, token_cap=knowledge_tokens, max_chars=max_chars)
+            items = pack.items
+            refs = [refs[i] for i in pack.doc_indices]
+            selection = pack.report()
+        else:
+            items, used = fit_ordered(items, budget, counter)
+            refs = refs[: len(items)]
+        sp.set(items=len(items), knowledge_tokens=used, dropped_duplicates=len(dropped))
+
+    return PackedKnowledge(
+        items=items,
+        references=refs,
+        budget=budget,
+        knowledge_tokens=used,
+        selection=selection,
+        dropped_duplicates=dropped,
+    )
+
+
+async def _index(
+    request: IntelliTubeRequest,
+    ctx: IntelliTubeContext,
+    runner: Any,
+    cancel: threading.Event,
+    errors: Dict[str, str],
+) -> Tuple[IndexerResult, List[Dict[str, str]], List[Dict[str, Any]]]:
+    """``errors`` collects url -> error for videos that failed and were left out."""
+    q = request.search_query.strip()
+    if request.streaming and request.indexer == "direct":
+        streamed = await asyncio.to_thread(
+            run_streaming,
+            ctx,
+            q,
+            limit=request.limit,
+            sort_by_date=request.sort_by_date,
+            max_duration_seconds=request.max_duration_seconds,
+            max_knowledge_chars=request.max_knowledge_chars,
+            cancel=cancel,
+        )
+        errors.update(streamed.errors)
+        return streamed.index_result, streamed.knowledge, streamed.references
+
+    rows: Optional[List[SearchResultRow]] = None
+    if request.indexer == "direct":
+        rows = await asyncio.to_thread(
+            search_videos,
+            ctx,
+            q,
+            limit=request.limit,
+            sort_by_date=request.sort_by_date,
+            max_duration_seconds=request.max_duration_seconds,
+        )
+        index_result = await index_search_rows(ctx, q, request.limit, rows, errors=errors)
+    else:
+        from .indexer.agent import get_indexer_agent
+
+        agent = get_indexer_agent()
+        with span("agent.indexer", model=str(agent.model)) as sp:
+            out = await runner.run(
+                agent,
+                indexer_input(q, request.limit, request.sort_by_date, request.max_duration_seconds),
+                context=ctx,
+                max_turns=10,
+            )
+            sp.set(**usage_attrs(out))
+        index_result = out.final_output
+
+    # ranked mode reads every transcript and lets the packer choose
+    cap = request.max_knowledge_chars if request.knowledge_mode == "ordered" else None
+    knowledge, references, _ = await asyncio.to_thread(build_knowledge, index_result, cap, rows)
+    return index_result, knowledge, references
+
+
+async def run_intellitube(
+    request: IntelliTubeRequest,
+    ctx: IntelliTubeContext,
+    *,
+    writer: Optional[Agent] = None,
+    script_cache: Optional[ScriptCache] = None,
+    runner: Any = None,
+    on_event: Optional[EventCallback] = None,
+) -> IntelliTubeResponse:
+    """Search -> index -> knowledge -> script (-> TTS) for one request.
+
+    ``writer`` / ``script_cache`` can be shared across calls; ``runner``
+    defaults to the Agents SDK ``Runner`` (anything with an async ``run``).
+    """
+    if runner is None:
+        from agents import Runner  # deferred: the SDK is slow to import
+
+        runner = Runner
+    writer = writer or get_script_agent()
+    topic = request.topic.strip()
+    cancel = threading.Event()
+
+    def emit(stage: str, **fields: Any) -> None:
+        if on_event is not None:
+            on_event(stage, fields)
+
+    try:
+        with span("run", source="api", query=request.search_query, limit=request.limit, streaming=request.streaming):
+            # -------- 1+2) Index + knowledge --------
+            index_errors: Dict[str, str] = {}
+            index_result, knowledge, references = await _index(request, ctx, runner, cancel, index_errors)
+            emit(
+                "index",
+                found=index_result.found,
+                transcripts=len(index_result.transcripts),
+                items=len(knowledge),
+                references=references,
+                errors=index_errors,
+            )
+
+            packed = await asyncio.to_thread(
+                pack_for_writer,
+                writer,
+                topic,
+                knowledge,
+                references,
+                mode=request.knowledge_mode,
+                knowledge_tokens=request.knowledge_tokens,
+                max_chars=request.max_knowledge_chars,
+                prompt_tokens=request.prompt_tokens,
+                keep_duplicates=request.keep_duplicates,
+            )
+            sha = knowledge_hash(packed.items)
+            emit(
+                "knowledge",
+                items=len(packed.items),
+                knowledge_tokens=packed.knowledge_tokens,
+                sha256=sha,
+                references=packed.references,
+            )
+
+            # -------- 3) Script writer --------
+            script_result: Optional[ScriptResult] = None
+            cache_key = ScriptCache.key(topic, sha, str(writer.model), SCRIPT_INSTRUCTIONS_VERSION)
+            if script_cache is not None and request.reuse_script:
+                script_result = script_cache.get(cache_key)
+            cache_hit = script_result is not None
+            actual: Optional[int] = None
+            cache_error: Optional[str] = None
+            if script_result is None:
+                with span("agent.script", model=str(writer.model), predicted_input_tokens=packed.predicted_input_tokens) as sp:
+                    out = await runner.run(writer, build_writer_input(topic, packed.items), context=ctx, max_turns=6)
+                    sp.set(**usage_attrs(out))
+                script_result = out.final_output
+                actual = actual_input_tokens(out)
+                if script_cache is not None:
+                    try:
+                        script_cache.put(cache_key, script_result, topic=topic, model=str(writer.model))
+                    except Exception as e:  # the script is still good; only the memo is lost
+                        cache_error = f"{type(e).__name__}: {e}"
+            emit("script", cache_hit=cache_hit, result=script_result, actual_input_tokens=actual, cache_error=cache_error)
+
+            # -------- 4) TTS (both variants at once, each announced as soon as it is ready) --------
+            tts: Dict[str, str] = {}
+            if request.tts:
+                cfg = TTSConfig(
+                    model=request.tts_model,
+                    voice=request.tts_voice,
+                    speed=float(request.tts_speed),
+                    output_format=request.tts_format,
+                    output_bitrate=request.tts_bitrate,
+                )
+
+                async def speak(name: str, transcript: str) -> str:
+                    path = str(await asyncio.to_thread(synthesize_tts_to_file, transcript, cfg=cfg))
+                    emit("tts.variant", variant=name, path=path)
+                    return path
+
+                names = [f"variant_{i}" for i in range(1, len(script_result.variants) + 1)]
+                paths = await asyncio.gather(*[speak(n, v.transcript) for n, v in zip(names, script_result.variants)])
+                tts = dict(zip(names, paths))
+                emit("tts", **tts)
+
+            return IntelliTubeResponse(
+                index=index_result,
+                script=script_result,
+                references=packed.references,
+                knowledge_sha256=sha,
+                knowledge_selection=packed.selection,
+                predicted_input_tokens=packed.predicted_input_tokens,
+                actual_input_tokens=actual,
+                script_cache_hit=cache_hit,
+                tts=tts,
+            )
+    except asyncio.CancelledError:
+        cancel.set()  # let worker threads stop picking up new videos
+        raise
@@ -1,12 +1,80 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
 
 from youtube_search import YouTubeSearchService, YtDlpSearchClient, DictFormatter
-from youtube_transcribe import YouTubeTranscriptService, OpenAIWhisperClient, OpenAITranscribeConfig
+from youtube_transcribe import YouTubeTranscriptService, OpenAIWhisperClient, OpenAITranscribeConfig, VADTrimmer
 from youtube_audio import YtDlpAudioClient
 
+from .dedup import MinHashIndex
+
+
+class KeyedLocks:
+    """One lock per key, dropped when unused.
+
+    Concurrent runs sharing a context hold the lock of a video URL while
+    fetching/transcribing it, so the second run finds the cached transcript
+    instead of transcribing the same video again.
+    """
+
+    def __init__(self) -> None:
+        self._guard = threading.Lock()
+        self._locks: Dict[str, List] = {}  # key -> [lock, holders]
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(key, None)
+
+
+class SearchMemo:
+    """Search results memoized for the context's lifetime, single-flight.
+
+    Jobs that share a query get one search; a second caller asking while the
+    first search is still running waits for it instead of searching again.
+    Failures are not memoized.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._results: Dict[Hashable, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, search: Callable[[], Any]) -> Tuple[Any, bool]:
+        """``(result, hit)``; runs ``search`` only if no result for ``key`` exists or is pending."""
+        with self._lock:
+            fut = self._results.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._results[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+        if owner:
+            try:
+                fut.set_result(search())
+            except BaseException as e:
+                with self._lock:
+                    self._results.pop(key, None)
+                fut.set_exception(e)
+                raise
+        return fut.result(), not owner
+
 
 @dataclass
 class IntelliTubeContext:
@@ -14,6 +82,10 @@ class IntelliTubeContext:
     transcript_service: YouTubeTranscriptService
     transcript_cache_dir: Path
     manifest_dir: Path
+    dedup_index: Optional[MinHashIndex] = None  # set -> indexer skips near-duplicate videos
+    video_locks: KeyedLocks = field(default_factory=KeyedLocks)  # shared by concurrent runs
+    search_memo: Optional[SearchMemo] = None  # set -> identical searches run once per context
+    transcribe_slots: Optional[threading.BoundedSemaphore] = None  # set -> caps Whisper uploads across runs
 
 
 def build_context(
@@ -22,6 +94,10 @@ def build_context(
     transcript_cache_dir: str | Path = "cache/transcripts",
     manifest_dir: str | Path = "cache/manifests",
     transcribe_model: str = "whisper-1",
+    vad: bool = False,
+    skip_duplicates: bool = False,
+    share_searches: bool = False,
+    max_concurrent_transcriptions: Optional[int] = None,
 ) -> IntelliTubeContext:
     transcript_cache_dir = Path(transcript_cache_dir).resolve()
     manifest_dir = Path(manifest_dir).resolve()
@@ -39,6 +115,7 @@ def build_context(
         audio_client=audio_client,
         transcriber=transcriber,
         transcript_cache_dir=str(transcript_cache_dir),
+        preprocessor=VADTrimmer() if vad else None,
     )
 
     return IntelliTubeContext(
@@ -46,4 +123,53 @@ def build_context(
         transcript_service=transcript_service,
         transcript_cache_dir=transcript_cache_dir,
         manifest_dir=manifest_dir,
+        dedup_index=MinHashIndex(transcript_cache_dir) if skip_duplicates else None,
+        search_memo=SearchMemo() if share_searches else None,
+        transcribe_slots=(
+            threading.BoundedSemaphore(max_concurrent_transcriptions) if max_concurrent_transcriptions else None
+        ),
+    )
+
+
+_CONTEXTS: Dict[Tuple[Any, ...], IntelliTubeContext] = {}
+_CONTEXTS_LOCK = threading.Lock()
+
+
+def get_context(
+    *,
+    audio_cache_dir: str | Path = "cache/audio",
+    transcript_cache_dir: str | Path = "cache/transcripts",
+    manifest_dir: str | Path = "cache/manifests",
+    transcribe_model: str = "whisper-1",
+    vad: bool = False,
+    skip_duplicates: bool = False,
+    max_concurrent_transcriptions: Optional[int] = None,
+) -> IntelliTubeContext:
+    """Process-wide ``build_context``, memoized on its settings.
+
+    Every caller with the same settings gets the same context (clients,
+    caches, dedup index, per-video locks); clients are created lazily on
+    first use, so asking for a context is cheap after the first call.
+    """
+    key = (
+        str(Path(audio_cache_dir).resolve()),
+        str(Path(transcript_cache_dir).resolve()),
+        str(Path(manifest_dir).resolve()),
+        transcribe_model,
+        bool(vad),
+        bool(skip_duplicates),
+        max_concurrent_transcriptions,
     )
+    with _CONTEXTS_LOCK:
+        ctx = _CONTEXTS.get(key)
+        if ctx is None:
+            ctx = _CONTEXTS[key] = build_context(
+                audio_cache_dir=audio_cache_dir,
+                transcript_cache_dir=transcript_cache_dir,
+                manifest_dir=manifest_dir,
+                transcribe_model=transcribe_model,
+                vad=vad,
+                skip_duplicates=skip_duplicates,
+                max_concurrent_transcriptions=max_concurrent_transcriptions,
+            )
+        return ctx
@@ -0,0 +1,317 @@
+"""Near-duplicate detection for cached transcripts (MinHash + LSH).
+
+Re-uploads, clips and compilations produce transcripts that are nearly
+identical. Two signatures are kept per cached video:
+
+  - ``text``: word 5-gram shingles of the transcript, used to drop
+    near-duplicates from the writer's knowledge
+  - ``meta``: character 5-gram shingles of title + description, used by the
+    indexer to skip transcribing a new video that matches a cached one
+
+Signatures are persisted next to the transcripts (``minhash.idx``) and
+refreshed incrementally: only files whose ``updated_at`` changed are re-read.
+
+Hashing is vectorized with NumPy when it is installed; the pure-Python
+fallback produces identical signatures. Long documents are fingerprinted from
+their ``max_shingles`` smallest shingle hashes (a consistent sample, so two
+copies of the same text still pick the same shingles).
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from youtube_transcribe.storage import LEGACY_SUFFIX, SUFFIX, read_header, read_transcript
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_MASK64 = (1 << 64) - 1
+INDEX_FILENAME = "minhash.idx"
+INDEX_VERSION = 2  # v2: 64-bit wrapping hash shared by the NumPy and pure-Python paths
+MAX_SHINGLES = 4096
+
+
+def _numpy() -> Any:
+    """NumPy if installed, else None (signatures fall back to pure Python)."""
+    try:
+        import numpy as np  # type: ignore
+    except Exception:
+        return None
+    return np
+
+
+def _permutations(num_perm: int, seed: int = 1) -> List[Tuple[int, int]]:
+    # Deterministic (a, b) pairs so persisted signatures stay comparable across runs.
+    out: List[Tuple[int, int]] = []
+    x = seed
+    for _ in range(num_perm):
+        x = (x * 6364136223846793005 + 1442695040888963407) & ((1 << 64) - 1)
+        a = (x >> 3) % (_PRIME - 1) + 1
+        x = (x * 6364136223846793005 + 1442695040888963407) & ((1 << 64) - 1)
+        b = (x >> 3) % _PRIME
+        out.append((a, b))
+    return out
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def word_shingles(text: str, k: int = 5) -> Set[str]:
+    words = _normalize(text).split()
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + k]) for i in range(len(words) - k + 1)}
+
+
+def char_shingles(text: str, k: int = 5) -> Set[str]:
+    t = _normalize(text)
+    if len(t) <= k:
+        return {t} if t else set()
+    return {t[i : i + k] for i in range(len(t) - k + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, *, max_shingles: Optional[int] = MAX_SHINGLES) -> None:
+        self.num_perm = num_perm
+        self.max_shingles = max_shingles
+        self._perms = _permutations(num_perm)
+        self._np = _numpy()
+        if self._np is not None:
+            np = self._np
+            self._a = np.array([a for a, _ in self._perms], dtype=np.uint64)[:, None]
+            self._b = np.array([b for _, b in self._perms], dtype=np.uint64)[:, None]
+
+    def signature(self, shingles: Iterable[str]) -> List[int]:
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+        cap = self.max_shingles
+        np = self._np
+        if np is None:
+            if cap and len(hashes) > cap:
+                hashes = heapq.nsmallest(cap, set(hashes))
+            # (a * h + b) wraps at 64 bits, exactly like the uint64 arithmetic below
+            return [min((((a * h + b) & _MASK64) % _PRIME) & _MAX_HASH for h in hashes) for a, b in self._perms]
+        hv = np.unique(np.array(hashes, dtype=np.uint64))
+        if cap and hv.size > cap:
+            hv = hv[:cap]  # np.unique sorts: these are the smallest
+        with np.errstate(over="ignore"):
+            phv = ((self._a * hv[None, :] + self._b) % np.uint64(_PRIME)) & np.uint64(_MAX_HASH)
+        return phv.min(axis=1).tolist()
+
+
+def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    video_id: str
+    similarity: float
+
+
+class MinHashIndex:
+    """Persistent MinHash signatures with in-memory LSH buckets.
+
+    ``bands * rows`` must equal ``num_perm``; with 16 x 4 pairs above ~0.5
+    Jaccard become candidates, and candidates are then checked exactly
+    against the caller's threshold.
+    """
+
+    def __init__(
+        self,
+        transcript_cache_dir: str | Path,
+        *,
+        num_perm: int = 64,
+        bands: int = 16,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self._dir = Path(transcript_cache_dir).resolve()
+        self._path = self._dir / INDEX_FILENAME
+        self._hasher = MinHasher(num_perm)
+        self._bands = bands
+        self._rows = num_perm // bands
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()  # one scan at a time; held across the whole sync
+        self._entries: Dict[str, Dict[str, object]] = {}
+        self._buckets: Dict[str, Dict[Tuple[int, Tuple[int, ...]], Set[str]]] = {"text": {}, "meta": {}}
+        self._synced = False
+        self._load()
+
+    # ---- persistence ----
+    def _load(self) -> None:
+        try:
+            with self._path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != INDEX_VERSION
+            or data.get("num_perm") != self._hasher.num_perm
+        ):
+            return  # incompatible: rebuild on sync
+        for vid, e in (data.get("entries") or {}).items():
+            if isinstance(e, dict):
+                self._put(vid, e)
+
+    def save(self) -> None:
+        with self._lock:
+            payload = {"version": INDEX_VERSION, "num_perm": self._hasher.num_perm, "entries": self._entries}
+            tmp = self._path.with_name(self._path.name + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(payload, f, separators=(",", ":"))
+            tmp.replace(self._path)
+
+    # ---- buckets ----
+    def _band_keys(self, sig: Sequence[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        r = self._rows
+        return [(b, tuple(sig[b * r : (b + 1) * r])) for b in range(self._bands)]
+
+    def _put(self, video_id: str, entry: Dict[str, object]) -> None:
+        self._drop(video_id)
+        self._entries[video_id] = entry
+        for kind in ("text", "meta"):
+            sig = entry.get(kind)
+            if isinstance(sig, list) and sig:
+                for key in self._band_keys(sig):
+                    self._buckets[kind].setdefault(key, set()).add(video_id)
+
+    def _drop(self, video_id: str) -> None:
+        old = self._entries.pop(video_id, None)
+        if not old:
+            return
+        for kind in ("text", "meta"):
+            sig = old.get(kind)
+            if isinstance(sig, list) and sig:
+                for key in self._band_keys(sig):
+                    self._buckets[kind].get(key, set()).discard(video_id)
+
+    # ---- building ----
+    def meta_signature(self, title: str, description: str) -> List[int]:
+        return self._hasher.signature(char_shingles(f"{title}\n{description}"))
+
+    def text_signature(self, transcript: str) -> List[int]:
+        return self._hasher.signature(word_shingles(transcript))
+
+    def add(self, video_id: str, *, title: str, description: str, transcript: str, updated_at: Optional[str] = None) -> None:
+        entry = {
+            "updated_at": updated_at,
+            "meta": self.meta_signature(title, description),
+            "text": self.text_signature(transcript),
+        }
+        with self._lock:
+            self._put(video_id, entry)
+
+    def sync(self, *, force: bool = False) -> int:
+        """Incrementally index ``<video_id>.itx`` / legacy ``.json`` files; returns entries (re)built."""
+        if self._synced and not force:
+            return 0
+        with self._sync_lock:
+            if self._synced and not force:
+                return 0  # another thread finished the scan while we waited
+            seen: Set[str] = set()
+            changed = 0
+            for p in sorted(self._dir.iterdir()):
+                if p.suffix not in (SUFFIX, LEGACY_SUFFIX) or not p.is_file():
+                    continue
+                if p.suffix == LEGACY_SUFFIX and p.with_suffix(SUFFIX).exists():
+                    continue  # superseded by the compact file
+                vid = p.stem
+                seen.add(vid)
+                header = read_header(p) or {}
+                current = self._entries.get(vid)
+                if current and current.get("updated_at") == header.get("updated_at") and not force:
+                    continue
+                data = read_transcript(p) or {}
+                self.add(
+                    vid,
+                    title=str(data.get("title") or ""),
+                    description=str(data.get("description") or ""),
+                    transcript=str(data.get("transcript") or ""),
+                    updated_at=header.get("updated_at"),
+                )
+                changed += 1
+            with self._lock:
+                # entries added by other threads after the directory listing have files too:
+                # only drop videos whose transcript is really gone
+                for vid in [v for v in self._entries if v not in seen and not self._has_file(v)]:
+                    self._drop(vid)
+                    changed += 1
+            self._synced = True
+        if changed:
+            self.save()
+        return changed
+
+    def _has_file(self, video_id: str) -> bool:
+        return (self._dir / f"{video_id}{SUFFIX}").is_file() or (self._dir / f"{video_id}{LEGACY_SUFFIX}").is_file()
+
+    # ---- queries ----
+    def _match(self, kind: str, sig: Sequence[int], threshold: float, exclude: Optional[str]) -> Optional[DuplicateMatch]:
+        with self._lock:
+            cands: Set[str] = set()
+            for key in self._band_keys(sig):
+                cands |= self._buckets[kind].get(key, set())
+            best: Optional[DuplicateMatch] = None
+            for vid in cands:
+                if vid == exclude:
+                    continue
+                other = self._entries[vid].get(kind)
+                sim = similarity(sig, other) if isinstance(other, list) else 0.0
+                if sim >= threshold and (best is None or sim > best.similarity):
+                    best = DuplicateMatch(vid, sim)
+            return best
+
+    def match_metadata(
+        self, title: str, description: str, *, threshold: float = 0.9, exclude: Optional[str] = None
+    ) -> Optional[DuplicateMatch]:
+        """Closest cached video whose title+description fingerprint is >= ``threshold`` similar."""
+        self.sync()
+        return self._match("meta", self.meta_signature(title, description), threshold, exclude)
+
+    def match_transcript(
+        self, transcript: str, *, threshold: float = 0.8, exclude: Optional[str] = None
+    ) -> Optional[DuplicateMatch]:
+        self.sync()
+        return self._match("text", self.text_signature(transcript), threshold, exclude)
+
+
+def drop_near_duplicates(
+    docs: Sequence[Dict[str, str]],
+    *,
+    threshold: float = 0.8,
+    num_perm: int = 64,
+) -> Tuple[List[int], List[Tuple[int, int, float]]]:
+    """Indices of ``docs`` to keep (first occurrence wins) and ``(dropped, kept_twin, similarity)``.
+
+    Works on the knowledge list directly, so it also catches duplicates
+    among transcripts that are not (yet) in the persistent index.
+    """
+    hasher = MinHasher(num_perm)
+    kept: List[int] = []
+    kept_sigs: List[List[int]] = []
+    dropped: List[Tuple[int, int, float]] = []
+    for i, d in enumerate(docs):
+        sig = hasher.signature(word_shingles(str(d.get("transcript") or "")))
+        twin = max(
+            ((k, similarity(sig, ks)) for k, ks in zip(kept, kept_sigs)),
+            key=lambda x: x[1],
+            default=None,
+        )
+        if twin and twin[1] >= threshold:
+            dropped.append((i, twin[0], round(twin[1], 3)))
+            continue
+        kept.append(i)
+        kept_sigs.append(sig)
+    return kept, dropped
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from agents import Agent
 
 from ..context import IntelliTubeContext
@@ -9,7 +11,7 @@ from .tools import youtube_search_tool, youtube_transcribe_cache_tool
 INDEXER_INSTRUCTIONS = """
 You are IntelliTubeIndexer.
 
-Goal: Ensure transcripts are downloaded and cached (cache/transcripts/<video_id>.json).
+Goal: Ensure transcripts are downloaded and cached (cache/transcripts/<video_id>.itx).
 
 Steps:
 1) Call youtube_search_tool(query, limit, sort_by_date, max_duration_seconds).
@@ -34,3 +36,9 @@ def build_indexer_agent() -> Agent[IntelliTubeContext]:
         tools=[youtube_search_tool, youtube_transcribe_cache_tool],
         output_type=IndexerResult,
     )
+
+
+@lru_cache(maxsize=1)
+def get_indexer_agent() -> Agent[IntelliTubeContext]:
+    """Shared instance of ``build_indexer_agent()``; agents hold no per-run state, so runs can reuse one."""
+    return build_indexer_agent()
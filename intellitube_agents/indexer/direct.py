@@ -0,0 +1,295 @@
+"""Deterministic indexer: search + transcribe/cache in plain Python.
+
+Produces the same IndexerResult as the IntelliTubeIndexer agent without any
+LLM turns. The agent (indexer/agent.py) remains available via
+``run_indexer(..., mode="agent")``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import nullcontext
+from typing import Literal, Optional
+
+from youtube_audio.interfaces import VideoAudioInfo
+from youtube_transcribe import YouTubeTranscript
+
+from ..context import IntelliTubeContext
+from ..schema import IndexerResult, SearchResultRow, TranscriptArtifact
+from ..tracing import file_size, record_span, span, usage_attrs
+
+IndexerMode = Literal["direct", "agent"]
+
+
+def search_videos(
+    ctx: IntelliTubeContext,
+    query: str,
+    limit: int = 5,
+    sort_by_date: bool = False,
+    max_duration_seconds: Optional[int] = 60,
+) -> list[SearchResultRow]:
+    q = (query or "").strip()
+    if not q or limit <= 0:
+        return []
+
+    if limit > 50:
+        raise ValueError("limit too large; please use <= 50")
+
+    mds = None
+    if max_duration_seconds is not None and max_duration_seconds > 0:
+        mds = int(max_duration_seconds)
+
+    def run() -> list[SearchResultRow]:
+        out = ctx.search_service.search(
+            query=q,
+            limit=int(limit),
+            sort_by_date=bool(sort_by_date),
+            max_duration_seconds=mds,
+        )
+
+        results = out.get("results", [])
+        if not isinstance(results, list):
+            raise TypeError("search_videos expected list results from DictFormatter.")
+
+        return [SearchResultRow.model_validate(r) for r in results]
+
+    with span("search", query=q, limit=int(limit)) as sp:
+        if ctx.search_memo is None:
+            rows, hit = run(), False
+        else:
+            rows, hit = ctx.search_memo.get((q, int(limit), bool(sort_by_date), mds), run)
+        sp.set(results=len(rows), cache_hit=hit)
+        return list(rows)
+
+
+def fetch_audio(ctx: IntelliTubeContext, url: str) -> VideoAudioInfo:
+    """``fetch_audio`` traced as an ``audio`` span with ``probe``/``download`` children."""
+    with span("audio", url=url) as sp:
+        info = ctx.transcript_service.fetch_audio(url)
+        if info.probe_seconds is not None:
+            record_span("probe", info.probe_seconds, video_id=info.video_id)
+        if info.download_seconds is not None:
+            record_span("download", info.download_seconds, video_id=info.video_id, cache_hit=info.cached, bytes=file_size(info.audio_path))
+        sp.set(video_id=info.video_id, cache_hit=info.cached)
+        return info
+
+
+def transcribe_audio(
+    ctx: IntelliTubeContext,
+    url: str,
+    info: VideoAudioInfo,
+    *,
+    language: Optional[str] = None,
+    prompt: Optional[str] = None,
+) -> YouTubeTranscript:
+    slots = ctx.transcribe_slots if ctx.transcribe_slots is not None else nullcontext()
+    with slots, span("transcribe", video_id=info.video_id, bytes=file_size(info.audio_path)) as sp:
+        t = ctx.transcript_service.transcribe_audio(url, info, language=language, prompt=prompt)
+        sp.set(transcript_chars=len(t.transcript), vad_removed_seconds=t.vad_removed_seconds)
+        return t
+
+
+async def cache_transcripts(
+    ctx: IntelliTubeContext,
+    urls: list[str],
+    force: bool = False,
+    language: Optional[str] = None,
+    prompt: Optional[str] = None,
+    concurrency: int = 3,
+    errors: Optional[dict[str, str]] = None,
+) -> list[TranscriptArtifact]:
+    """Artifacts for the URLs that could be cached, in input order.
+
+    A URL that fails (private/removed video, transcription error) is left out
+    and reported in ``errors`` (url -> error); raises only if every URL failed.
+    """
+    cleaned = [u.strip() for u in (urls or []) if u and u.strip()]
+    if not cleaned:
+        return []
+
+    sem = asyncio.Semaphore(max(1, min(int(concurrency), 10)))
+    svc = ctx.transcript_service
+
+    async def one(u: str) -> TranscriptArtifact:
+        async with sem:
+            video_id, url, duplicate_of = await asyncio.to_thread(
+                transcribe_or_reuse,
+                ctx,
+                u,
+                force=bool(force),
+                language=language,
+                prompt=prompt,
+            )
+            if not video_id:
+                raise RuntimeError(f"Missing video_id for url={u}")
+
+            source_id = duplicate_of or video_id
+            transcript_path = svc.transcript_path(source_id)
+
+            # Header-only read: stats WITHOUT decoding (or returning) transcript text
+            header = svc.read_header(source_id) or {}
+            tlen = header.get("transcript_chars")
+
+            return TranscriptArtifact(
+                video_id=video_id,
+                url=url,
+                transcript_path=str(transcript_path),
+                transcript_chars=tlen if isinstance(tlen, int) else None,
+                updated_at=header.get("updated_at"),
+                vad_removed_seconds=header.get("vad_removed_seconds"),
+                duplicate_of=duplicate_of,
+            )
+
+    results = await asyncio.gather(*[one(u) for u in cleaned], return_exceptions=True)
+    if ctx.dedup_index is not None:
+        await asyncio.to_thread(ctx.dedup_index.save)
+
+    artifacts: list[TranscriptArtifact] = []
+    failures: list[BaseException] = []
+    for u, r in zip(cleaned, results):
+        if isinstance(r, TranscriptArtifact):
+            artifacts.append(r)
+            continue
+        if not isinstance(r, Exception):
+            raise r  # cancellation
+        failures.append(r)
+        if errors is not None:
+            errors[u] = f"{type(r).__name__}: {r}"
+    if failures and not artifacts:
+        raise failures[0]
+    return artifacts
+
+
+def transcribe_or_reuse(
+    ctx: IntelliTubeContext,
+    url: str,
+    *,
+    force: bool = False,
+    language: Optional[str] = None,
+    prompt: Optional[str] = None,
+) -> tuple[str, str, Optional[str]]:
+    """Ensure a cached transcript for ``url``; returns ``(video_id, url, duplicate_of)``.
+
+    With ``ctx.dedup_index`` set, a video that is not cached yet but whose
+    title+description fingerprint matches a cached video is not transcribed;
+    ``duplicate_of`` then names the cached video whose transcript stands in.
+    Runs sharing ``ctx`` process a given URL one at a time.
+    """
+    svc = ctx.transcript_service
+    index = ctx.dedup_index
+
+    with ctx.video_locks.hold(url):
+        with span("video", url=url) as sp:
+            info = fetch_audio(ctx, url)
+            sp.set(video_id=info.video_id)
+            if not force:
+                if svc.read_header(info.video_id) is not None:
+                    sp.set(cache_hit=True)
+                    return info.video_id, url, None
+                match = index.match_metadata(info.title, info.description, exclude=info.video_id) if index else None
+                if match:
+                    sp.set(cache_hit=True, duplicate_of=match.video_id)
+                    return info.video_id, url, match.video_id
+
+            t = transcribe_audio(ctx, url, info, language=language, prompt=prompt)
+            sp.set(cache_hit=False)
+    if index is None:
+        return t.video_id, t.url, None
+
+    index.add(
+        t.video_id,
+        title=t.title,
+        description=t.description,
+        transcript=t.transcript,
+        updated_at=(svc.read_header(t.video_id) or {}).get("updated_at"),
+    )
+    return t.video_id, t.url, None
+
+
+async def run_direct_indexer(
+    ctx: IntelliTubeContext,
+    query: str,
+    limit: int = 5,
+    sort_by_date: bool = False,
+    max_duration_seconds: Optional[int] = 60,
+    concurrency: int = 3,
+) -> IndexerResult:
+    """Same steps as the agent's instructions: search, then cache all URLs once, in order."""
+    rows = await asyncio.to_thread(
+        search_videos,
+        ctx,
+        query,
+        limit=limit,
+        sort_by_date=sort_by_date,
+        max_duration_seconds=max_duration_seconds,
+    )
+    return await index_search_rows(ctx, query, limit, rows, concurrency=concurrency)
+
+
+async def index_search_rows(
+    ctx: IntelliTubeContext,
+    query: str,
+    limit: int,
+    rows: list[SearchResultRow],
+    concurrency: int = 3,
+    errors: Optional[dict[str, str]] = None,
+) -> IndexerResult:
+    """Second half of the direct indexer, for callers that already hold the search rows.
+
+    Videos that fail are left out of ``transcripts`` and reported in ``errors``.
+    """
+    artifacts = await cache_transcripts(ctx, [r.url for r in rows], concurrency=concurrency, errors=errors)
+    return IndexerResult(
+        search_query=query,
+        requested_limit=int(limit),
+        found=len(rows),
+        transcripts=artifacts,
+    )
+
+
+def indexer_input(query: str, limit: int, sort_by_date: bool, max_duration_seconds: Optional[int]) -> str:
+    return (
+        f"query: {query}\n"
+        f"limit: {limit}\n"
+        f"sort_by_date: {bool(sort_by_date)}\n"
+        f"max_duration_seconds: {max_duration_seconds}\n"
+    )
+
+
+def run_indexer(
+    ctx: IntelliTubeContext,
+    query: str,
+    limit: int = 5,
+    sort_by_date: bool = False,
+    max_duration_seconds: Optional[int] = 60,
+    *,
+    mode: IndexerMode = "direct",
+) -> IndexerResult:
+    """Blocking entry point used by pipeline.py and app.py."""
+    if mode == "direct":
+        return asyncio.run(
+            run_direct_indexer(
+                ctx,
+                query,
+                limit=limit,
+                sort_by_date=sort_by_date,
+                max_duration_seconds=max_duration_seconds,
+            )
+        )
+    if mode != "agent":
+        raise ValueError(f"Unknown indexer mode: {mode}")
+
+    from agents import Runner
+
+    from .agent import get_indexer_agent
+
+    agent = get_indexer_agent()
+    with span("agent.indexer", model=str(agent.model)) as sp:
+        out = Runner.run_sync(
+            agent,
+            indexer_input(query, limit, sort_by_date, max_duration_seconds),
+            context=ctx,
+            max_turns=10,
+        )
+        sp.set(**usage_attrs(out))
+    return out.final_output
@@ -0,0 +1,235 @@
+"""In-process job queue for the HTTP service.
+
+``JobQueue`` keeps every submitted ``IntelliTubeRequest`` as a ``Job``
+record and runs them on a fixed pool of asyncio workers. All workers share
+one ``IntelliTubeContext`` (clients, caches, per-video locks, transcription
+semaphore), one script writer and one ``ScriptCache``, so jobs on the same
+videos or topic reuse each other's work.
+
+Stage events from ``run_intellitube`` are appended to the job as they
+arrive; ``Job.to_dict`` is what ``GET /jobs/{id}`` returns. Finished jobs
+are kept up to ``keep_finished``, oldest dropped first. Nothing is
+persisted: a restart forgets the queue (cached transcripts and audio stay
+on disk).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .api import run_intellitube
+from .context import IntelliTubeContext
+from .schema import IntelliTubeRequest, IntelliTubeResponse
+from .script.cache import ScriptCache
+from .tracing import span
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _summary(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-friendly view of a stage event: scalars as-is, lists as their length."""
+    out: Dict[str, Any] = {}
+    for k, v in fields.items():
+        if v is None or isinstance(v, (str, int, float, bool)):
+            out[k] = v
+        elif isinstance(v, (list, tuple, dict)):
+            out[k] = len(v)
+    return out
+
+
+@dataclass
+class Job:
+    id: str
+    request: IntelliTubeRequest
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+    references: List[Dict[str, Any]] = field(default_factory=list)   # as soon as the index stage reports them
+    script: Optional[Dict[str, Any]] = None                          # as soon as the writer finishes
+    audio: Dict[str, str] = field(default_factory=dict)              # variant -> path, as each is synthesized
+    result: Optional[IntelliTubeResponse] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def on_event(self, stage: str, fields: Dict[str, Any]) -> None:
+        if fields.get("references") is not None:
+            self.references = list(fields["references"])
+        if stage == "script" and fields.get("result") is not None:
+            self.script = fields["result"].model_dump()
+        if stage == "tts.variant":
+            self.audio[str(fields["variant"])] = str(fields["path"])
+            fields = {"variant": fields["variant"]}  # server paths stay private; see ``audio``
+        elif stage == "tts":
+            fields = {"variants": len(fields)}
+        since = self.started_at or self.created_at
+        self.stages.append({"stage": stage, "elapsed_s": round(time.time() - since, 3), **_summary(fields)})
+
+    def to_dict(self, audio_url: Optional[str] = None) -> Dict[str, Any]:
+        """``audio_url`` (``str.format`` with ``id`` and ``variant``) turns audio paths into download links."""
+        audio = {v: audio_url.format(id=self.id, variant=v) for v in self.audio} if audio_url else dict(self.audio)
+        out: Dict[str, Any] = {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stage": self.stages[-1]["stage"] if self.stages else None,
+            "stages": self.stages,
+            "request": self.request.model_dump(),
+            "references": self.references,
+            "script": self.script,
+            "audio": audio,
+            "error": self.error,
+        }
+        if self.result is not None:
+            out["result"] = self.result.model_dump(exclude={"script", "references", "tts"})
+        return out
+
+
+class JobQueue:
+    def __init__(
+        self,
+        ctx: IntelliTubeContext,
+        *,
+        workers: int = 4,
+        max_queued: int = 1000,
+        keep_finished: int = 10_000,
+        script_cache: Optional[ScriptCache] = None,
+        writer: Any = None,
+        runner: Any = None,
+    ) -> None:
+        self.ctx = ctx
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self.keep_finished = max(1, keep_finished)
+        self.script_cache = script_cache
+        self.writer = writer
+        self.runner = runner
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue[str]] = None
+        self._tasks: List[asyncio.Task] = []
+        self._cancel_requested: set[str] = set()  # running jobs DELETEd by a client
+
+    # ---------- lifecycle (call from the serving event loop) ----------
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"intellitube-job-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel running jobs and stop the workers; queued jobs are marked cancelled."""
+        for job in list(self._jobs.values()):  # _finish may evict
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED, "server shutting down")
+            elif job.task is not None:
+                job.task.cancel()
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ---------- API ----------
+
+    def submit(self, request: IntelliTubeRequest) -> Job:
+        if self._queue is None:
+            raise RuntimeError("JobQueue.start() has not been awaited")
+        job = Job(id=uuid.uuid4().hex, request=request)
+        try:
+            self._queue.put_nowait(job.id)
+        except asyncio.QueueFull:
+            raise QueueFull(f"{self._queue.qsize()} jobs already queued") from None
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def recent(self, status: Optional[str] = None, limit: int = 100) -> List[Job]:
+        """Most recent first."""
+        jobs = [j for j in reversed(self._jobs.values()) if status is None or j.status == status]
+        return jobs[: max(0, limit)]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        if job.status == QUEUED:
+            self._finish(job, CANCELLED, "cancelled before start")  # its worker skips it
+        elif job.task is not None:
+            self._cancel_requested.add(job.id)
+            job.task.cancel()
+        return job
+
+    def position(self, job: Job) -> Optional[int]:
+        """1-based place among queued jobs, or None once it has started."""
+        if job.status != QUEUED:
+            return None
+        ahead = sum(1 for j in self._jobs.values() if j.status == QUEUED and j.created_at < job.created_at)
+        return ahead + 1
+
+    def counts(self) -> Dict[str, int]:
+        out = {s: 0 for s in (QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED)}
+        for j in self._jobs.values():
+            out[j.status] += 1
+        return out
+
+    # ---------- workers ----------
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            job = self._jobs.get(await self._queue.get())
+            try:
+                if job is not None and job.status == QUEUED:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status, job.started_at = RUNNING, time.time()
+        job.task = asyncio.create_task(
+            run_intellitube(
+                job.request,
+                self.ctx,
+                writer=self.writer,
+                script_cache=self.script_cache,
+                runner=self.runner,
+                on_event=job.on_event,
+            )
+        )
+        with span("job", queued_s=round(job.started_at - job.created_at, 3)) as sp:
+            try:
+                job.result = await job.task
+                self._finish(job, SUCCEEDED)
+            except asyncio.CancelledError:
+                self._finish(job, CANCELLED, "cancelled")
+                if job.id not in self._cancel_requested:
+                    raise  # the worker itself is being stopped
+            except Exception as e:
+                self._finish(job, FAILED, f"{type(e).__name__}: {e}")
+            finally:
+                job.task = None
+                self._cancel_requested.discard(job.id)
+                sp.set(job_status=job.status)
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job.status, job.error, job.finished_at = status, error, time.time()
+        self._evict()
+
+    def _evict(self) -> None:
+        finished = [j.id for j in self._jobs.values() if j.status in FINISHED]
+        for job_id in finished[: max(0, len(finished) - self.keep_finished)]:
+            self._jobs.pop(job_id, None)
@@ -0,0 +1,188 @@
+"""Relevance-ranked knowledge packing for the script writer.
+
+Transcripts are split into sentence-aligned chunks, scored against the topic
+with a local BM25 ranker, and packed best-first into a token budget. Chunks
+that don't fit are skipped (not a hard stop), so one large transcript can no
+longer starve everything after it.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Small English stoplist; BM25's IDF already discounts common words, this just trims noise.
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its of on or so that the this to was "
+    "we were will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD.findall((text or "").lower()) if w not in _STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars/token) used when no tokenizer is supplied."""
+    return (len(text) + 3) // 4
+
+
+def chunk_text(text: str, max_chars: int = 800) -> List[str]:
+    """Split on sentence boundaries into chunks of at most ~``max_chars``."""
+    t = " ".join((text or "").split())
+    if not t:
+        return []
+    chunks: List[str] = []
+    cur = ""
+    for sent in _SENTENCE_END.split(t):
+        while len(sent) > max_chars:  # no punctuation for a long stretch: hard split
+            if cur:
+                chunks.append(cur)
+                cur = ""
+            chunks.append(sent[:max_chars])
+            sent = sent[max_chars:]
+        if cur and len(cur) + 1 + len(sent) > max_chars:
+            chunks.append(cur)
+            cur = sent
+        else:
+            cur = f"{cur} {sent}" if cur else sent
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+class BM25:
+    """Okapi BM25 over a fixed list of tokenized documents."""
+
+    def __init__(self, docs: Sequence[Sequence[str]], *, k1: float = 1.5, b: float = 0.75) -> None:
+        self._k1 = k1
+        self._b = b
+        self._tfs = [Counter(d) for d in docs]
+        self._lens = [len(d) for d in docs]
+        self._avgdl = (sum(self._lens) / len(docs)) if docs else 0.0
+        df: Counter = Counter()
+        for tf in self._tfs:
+            df.update(tf.keys())
+        n = len(docs)
+        self._idf = {t: math.log(1.0 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def score(self, query: Sequence[str]) -> List[float]:
+        terms = [t for t in set(query) if t in self._idf]
+        out: List[float] = []
+        for tf, dl in zip(self._tfs, self._lens):
+            s = 0.0
+            norm = self._k1 * (1.0 - self._b + self._b * dl / self._avgdl) if self._avgdl else self._k1
+            for t in terms:
+                f = tf.get(t, 0)
+                if f:
+                    s += self._idf[t] * f * (self._k1 + 1.0) / (f + norm)
+            out.append(s)
+        return out
+
+
+@dataclass(frozen=True)
+class SelectedChunk:
+    doc_index: int
+    chunk_index: int
+    score: float
+    tokens: int
+    title: str
+
+
+@dataclass
+class KnowledgePack:
+    items: List[Dict[str, str]]              # {title, description, transcript} for the writer
+    doc_indices: List[int]                   # source doc per item (to map back to references)
+    selected: List[SelectedChunk] = field(default_factory=list)
+    total_tokens: int = 0
+    total_chars: int = 0
+    skipped_chunks: int = 0
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "items": len(self.items),
+            "chunks": len(self.selected),
+            "skipped_chunks": self.skipped_chunks,
+            "total_tokens": self.total_tokens,
+            "total_chars": self.total_chars,
+            "selected": [
+                {"doc": c.doc_index, "chunk": c.chunk_index, "score": round(c.score, 3), "tokens": c.tokens, "title": c.title}
+                for c in self.selected
+            ],
+        }
+
+
+def pack_knowledge(
+    docs: Sequence[Dict[str, str]],
+    topic: str,
+    *,
+    token_budget: int,
+    max_chars: Optional[int] = None,
+    chunk_chars: int = 800,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> KnowledgePack:
+    """Fill ``token_budget`` with the transcript chunks most relevant to ``topic``.
+
+    ``docs`` are ``{title, description, transcript}`` dicts. The title and
+    description are indexed with every chunk (they describe the whole video)
+    but only billed once per selected doc. Output items keep each doc's
+    chunks in their original order and are ordered by best chunk score.
+    """
+    flat: List[tuple[int, int, str]] = []
+    for di, d in enumerate(docs):
+        for ci, ch in enumerate(chunk_text(str(d.get("transcript") or ""), chunk_chars)):
+            flat.append((di, ci, ch))
+    if not flat:
+        return KnowledgePack(items=[], doc_indices=[])
+
+    def meta(di: int) -> str:
+        return f"{docs[di].get('title') or ''} {docs[di].get('description') or ''}"
+
+    bm25 = BM25([tokenize(f"{meta(di)} {ch}") for di, _, ch in flat])
+    scores = bm25.score(tokenize(topic))
+    order = sorted(range(len(flat)), key=lambda i: (-scores[i], flat[i][0], flat[i][1]))
+
+    used_tokens = 0
+    used_chars = 0
+    skipped = 0
+    picked: Dict[int, List[tuple[int, str]]] = {}
+    selected: List[SelectedChunk] = []
+
+    for i in order:
+        di, ci, ch = flat[i]
+        cost = count_tokens(ch)
+        if di not in picked:
+            cost += count_tokens(meta(di))
+        if used_tokens + cost > token_budget or (max_chars is not None and used_chars + len(ch) > max_chars):
+            skipped += 1
+            continue
+        picked.setdefault(di, []).append((ci, ch))
+        used_tokens += cost
+        used_chars += len(ch)
+        selected.append(SelectedChunk(di, ci, scores[i], cost, str(docs[di].get("title") or "")))
+
+    items: List[Dict[str, str]] = []
+    doc_indices: List[int] = []
+    for di in dict.fromkeys(c.doc_index for c in selected):  # best-first doc order
+        parts = [ch for _, ch in sorted(picked[di])]
+        items.append({
+            "title": str(docs[di].get("title") or ""),
+            "description": str(docs[di].get("description") or ""),
+            "transcript": " ".join(parts),
+        })
+        doc_indices.append(di)
+
+    return KnowledgePack(
+        items=items,
+        doc_indices=doc_indices,
+        selected=selected,
+        total_tokens=used_tokens,
+        total_chars=used_chars,
+        skipped_chunks=skipped,
+    )
@@ -0,0 +1,90 @@
+"""Run manifests with per-stage checkpoints.
+
+Every pipeline run writes ``<manifest_dir>/<run_id>.json`` and updates it
+after each stage completes:
+
+    search -> index -> knowledge -> script -> tts
+
+A stage's record holds what the next stage needs (search rows, transcript
+artifacts, the packed knowledge and its hash, the ScriptResult, TTS paths),
+so ``--resume <run_id>`` restarts at the first stage without a record.
+Re-recording a stage drops the records of every stage after it.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import secrets
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .schema import ManifestEntry, ManifestFile, StageRecord, TranscriptArtifact
+
+STAGES = ("search", "index", "knowledge", "script", "tts")
+
+_RUN_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def new_run_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + "-" + secrets.token_hex(3)
+
+
+def entries_from_artifacts(artifacts: Iterable[TranscriptArtifact]) -> list[ManifestEntry]:
+    return [ManifestEntry(video_id=a.video_id, url=a.url, transcript_path=a.transcript_path) for a in artifacts]
+
+
+class ManifestStore:
+    def __init__(self, manifest_dir: str | Path) -> None:
+        self._dir = Path(manifest_dir).resolve()
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path(self, run_id: str) -> Path:
+        if not _RUN_ID.match(run_id or ""):
+            raise ValueError(f"Invalid run id: {run_id!r}")
+        return self._dir / f"{run_id}.json"
+
+    def create(self, args: Dict[str, Any], *, run_id: Optional[str] = None) -> ManifestFile:
+        now = _now()
+        manifest = ManifestFile(run_id=run_id or new_run_id(), created_at=now, updated_at=now, args=dict(args))
+        self.save(manifest)
+        return manifest
+
+    def load(self, run_id: str) -> ManifestFile:
+        p = self.path(run_id)
+        if not p.exists():
+            raise FileNotFoundError(f"Manifest not found: {p}")
+        with p.open("r", encoding="utf-8") as f:
+            return ManifestFile.model_validate(json.load(f))
+
+    def save(self, manifest: ManifestFile) -> Path:
+        p = self.path(manifest.run_id)
+        with self._lock:
+            tmp = p.with_name(p.name + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(manifest.model_dump(), f, ensure_ascii=False, indent=2)
+            tmp.replace(p)
+        return p
+
+    def record(self, manifest: ManifestFile, stage: str, outputs: Dict[str, Any]) -> None:
+        """Checkpoint ``stage`` (and invalidate the stages after it)."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        for later in STAGES[STAGES.index(stage) + 1 :]:
+            manifest.stages.pop(later, None)
+        now = _now()
+        manifest.stages[stage] = StageRecord(completed_at=now, outputs=outputs)
+        manifest.updated_at = now
+        self.save(manifest)
+
+    @staticmethod
+    def outputs(manifest: ManifestFile, stage: str) -> Optional[Dict[str, Any]]:
+        rec = manifest.stages.get(stage)
+        return rec.outputs if rec else None
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
 
-from agents import Runner
+from .api import build_knowledge, pack_for_writer, run_intellitube
+from .context import build_context, get_context, IntelliTubeContext
+from .indexer.direct import index_search_rows, run_indexer, search_videos
+from .manifest import STAGES, ManifestStore, entries_from_artifacts
+from .script.agent import SCRIPT_INSTRUCTIONS_VERSION, build_writer_input, get_script_agent
+from .script.cache import ScriptCache, knowledge_hash
+from .script.budget import actual_input_tokens
+from .streaming import run_streaming
+from .schema import IndexerResult, IntelliTubeRequest, ManifestFile, ScriptResult, SearchResultRow
+from .tracing import configure_tracing, get_tracer, span, submit_traced, usage_attrs
+from .tts import TTSConfig, synthesize_tts_to_file
 
-from .context import build_context
-from .indexer.agent import build_indexer_agent
-from .script.agent import build_script_agent
-from .schema import IndexerResult, ScriptResult
+
+_TTS_ARGS = ("tts", "tts_model", "tts_voice", "tts_speed", "tts_format", "tts_bitrate")
 
 
 def _ts() -> str:
@@ -22,96 +33,467 @@ def _log(stage: str, **fields: object) -> None:
     print(json.dumps({"ts": _ts(), "stage": stage, **fields}, ensure_ascii=False))
 
 
-def _read_json_file(p: Path) -> dict[str, Any] | None:
-    try:
-        with p.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data if isinstance(data, dict) else None
-    except Exception:
-        return None
+def _build_knowledge(
+    index_result: IndexerResult, max_chars: int | None, rows: list[SearchResultRow] | None
+) -> tuple[list[dict[str, str]], list[dict[str, object]], int]:
+    _log("knowledge.build.begin")
+    knowledge, refs, total = build_knowledge(index_result, max_chars, rows)
+    _log("knowledge.build.end", items=len(knowledge), total_chars=total)
+    return knowledge, refs, total
 
 
-def main() -> None:
-    p = argparse.ArgumentParser(description="Indexer agent (cache transcripts) -> Script agent (2 variants)")
-    p.add_argument("search_query", help="Search query to find reference videos")
-    p.add_argument("--limit", type=int, default=5)
-    p.add_argument("--topic", required=True, help="New topic to write about")
-    p.add_argument("--by-date", action="store_true")
-    p.add_argument("--max-duration", type=int, default=60)
-    p.add_argument("--transcribe-model", default="whisper-1")
-    p.add_argument("--max-knowledge-chars", type=int, default=250_000, help="Cap total transcript chars injected")
-    args = p.parse_args()
+def _search(ctx: IntelliTubeContext, args: argparse.Namespace) -> list[SearchResultRow]:
+    _log("search.run.begin", query=args.search_query)
+    rows = search_videos(
+        ctx,
+        args.search_query,
+        limit=args.limit,
+        sort_by_date=args.by_date,
+        max_duration_seconds=args.max_duration,
+    )
+    _log("search.run.end", found=len(rows))
+    return rows
 
-    _log("start", search_query=args.search_query, limit=args.limit, by_date=args.by_date, max_duration=args.max_duration)
 
-    _log("context.build.begin", transcribe_model=args.transcribe_model)
-    ctx = build_context(transcribe_model=args.transcribe_model)
-    _log("context.build.end")
+def _index(ctx: IntelliTubeContext, args: argparse.Namespace, rows: list[SearchResultRow] | None) -> IndexerResult:
+    with span("index", mode=args.indexer) as sp:
+        _log("indexer.run.begin", mode=args.indexer)
+        errors: dict[str, str] = {}  # url -> error, videos left out of the index
+        if rows is None:
+            index_result: IndexerResult = run_indexer(
+                ctx,
+                args.search_query,
+                limit=args.limit,
+                sort_by_date=args.by_date,
+                max_duration_seconds=args.max_duration,
+                mode=args.indexer,
+            )
+        else:
+            index_result = asyncio.run(index_search_rows(ctx, args.search_query, args.limit, rows, errors=errors))
+        _log(
+            "indexer.run.end",
+            found=index_result.found,
+            vad_removed_seconds={a.video_id: a.vad_removed_seconds for a in index_result.transcripts if a.vad_removed_seconds},
+            errors=errors,
+        )
+        sp.set(found=index_result.found, transcripts=len(index_result.transcripts), errors=len(errors))
+    return index_result
 
-    indexer = build_indexer_agent()
-    writer = build_script_agent()
 
-    # -------- 1) Indexer agent: search + transcribe/cache --------
-    _log("indexer.run.begin")
-    indexer_input = (
-        f"query: {args.search_query}\n"
-        f"limit: {args.limit}\n"
-        f"sort_by_date: {bool(args.by_date)}\n"
-        f"max_duration_seconds: {args.max_duration}\n"
-    )
-    idx = Runner.run_sync(indexer, indexer_input, context=ctx, max_turns=10)
-    index_result: IndexerResult = idx.final_output
-    _log("indexer.run.end", found=index_result.found)
+def _resume_args(args: argparse.Namespace, saved: dict[str, object]) -> argparse.Namespace:
+    """Saved run arguments win; TTS settings come from the command line when ``--tts`` is given."""
+    merged = {**vars(args), **saved, "resume": args.resume}
+    if args.tts:
+        merged.update({k: getattr(args, k) for k in _TTS_ARGS})
+    return argparse.Namespace(**merged)
 
-    # -------- 2) Build knowledge list in Python (read cached JSON files) --------
-    _log("knowledge.build.begin")
-    knowledge: list[dict[str, str]] = []
-    total = 0
-    used_refs: list[str] = []
 
-    for art in index_result.transcripts:
-        tp = Path(art.transcript_path).expanduser().resolve()
-        data = _read_json_file(tp)
-        if not data:
-            continue
+def _context(args: argparse.Namespace) -> IntelliTubeContext:
+    return get_context(
+        transcribe_model=args.transcribe_model,
+        vad=args.vad,
+        skip_duplicates=args.skip_duplicate_videos,
+    )
+
 
-        title = str(data.get("title") or "")
-        desc = str(data.get("description") or "")
-        tx = str(data.get("transcript") or "")
+def _run(args: argparse.Namespace, store: ManifestStore, manifest: ManifestFile) -> dict[str, object]:
+    _log("context.build.begin", transcribe_model=args.transcribe_model, vad=args.vad)
+    ctx = _context(args)
+    _log("context.build.end")
 
-        if not tx.strip():
-            continue
+    writer = get_script_agent()
 
-        if total + len(tx) > args.max_knowledge_chars:
-            break
+    # -------- 1) Search (the agent indexer searches on its own) --------
+    rows: list[SearchResultRow] | None = None
+    if args.indexer == "direct":
+        saved = store.outputs(manifest, "search")
+        if saved is not None:
+            rows = [SearchResultRow.model_validate(r) for r in saved["rows"]]
+            _log("search.resumed", found=len(rows))
+        else:
+            rows = _search(ctx, args)
+            store.record(manifest, "search", {"query": args.search_query, "rows": [r.model_dump() for r in rows]})
 
-        knowledge.append({"title": title, "description": desc, "transcript": tx})
-        used_refs.append(title or art.video_id)
-        total += len(tx)
+    # -------- 2) Index + knowledge --------
+    saved_knowledge = store.outputs(manifest, "knowledge")
+    if saved_knowledge is not None:
+        index_result = IndexerResult.model_validate(store.outputs(manifest, "index"))
+        knowledge = list(saved_knowledge["items"])
+        used_refs = list(saved_knowledge["references"])
+        selection = saved_knowledge.get("selection")
+        predicted = int(saved_knowledge["predicted_input_tokens"])
+        _log("knowledge.resumed", items=len(knowledge), sha256=saved_knowledge["sha256"][:16])
+    else:
+        saved_index = store.outputs(manifest, "index")
+        # ranked mode reads every transcript and lets the packer choose
+        cap = args.max_knowledge_chars if args.knowledge_mode == "ordered" or args.streaming else None
+        if saved_index is not None:
+            index_result = IndexerResult.model_validate(saved_index)
+            _log("indexer.resumed", found=index_result.found, transcripts=len(index_result.transcripts))
+            knowledge, used_refs, total = _build_knowledge(index_result, cap, rows)
+        elif args.streaming:
+            # Streaming: download -> transcribe -> knowledge, stops at the cap
+            _log("streaming.run.begin")
+            with span("streaming", limit=args.limit) as ssp:
+                streamed = run_streaming(
+                    ctx,
+                    args.search_query,
+                    limit=args.limit,
+                    sort_by_date=args.by_date,
+                    max_duration_seconds=args.max_duration,
+                    max_knowledge_chars=args.max_knowledge_chars,
+                    rows=rows,
+                )
+                ssp.set(cache_hits=streamed.cache_hits, not_started=streamed.not_started, errors=len(streamed.errors))
+            index_result = streamed.index_result
+            knowledge = streamed.knowledge
+            used_refs = streamed.references
+            total = streamed.total_chars
+            _log(
+                "streaming.run.end",
+                found=index_result.found,
+                items=len(knowledge),
+                total_chars=total,
+                cache_hits=streamed.cache_hits,
+                not_started=streamed.not_started,
+                errors=streamed.errors,
+            )
+        else:
+            index_result = _index(ctx, args, rows)
+            knowledge, used_refs, total = _build_knowledge(index_result, cap, rows)
+        if saved_index is None:
+            manifest.entries = entries_from_artifacts(index_result.transcripts)
+            store.record(manifest, "index", index_result.model_dump())
 
-    _log("knowledge.build.end", items=len(knowledge), total_chars=total)
+        # -------- 2b) Dedup + fit knowledge to the writer's token budget --------
+        packed = pack_for_writer(
+            writer,
+            args.topic,
+            knowledge,
+            used_refs,
+            mode=args.knowledge_mode,
+            knowledge_tokens=args.knowledge_tokens,
+            max_chars=args.max_knowledge_chars,
+            prompt_tokens=args.prompt_tokens,
+            keep_duplicates=args.keep_duplicates,
+        )
+        budget = packed.budget
+        if not args.keep_duplicates:
+            _log(
+                "knowledge.dedup",
+                dropped=[{"item": i, "duplicate_of": j, "similarity": sim} for i, j, sim in packed.dropped_duplicates],
+            )
+        _log(
+            "knowledge.budget",
+            model=budget.model,
+            exact_tokenizer=budget.exact,
+            target_tokens=budget.target_tokens,
+            overhead_tokens=budget.overhead_tokens,
+            knowledge_tokens=budget.knowledge_tokens,
+        )
+        knowledge, used_refs, selection = packed.items, packed.references, packed.selection
+        if selection is not None:
+            _log("knowledge.rank.end", **{k: v for k, v in selection.items() if k != "selected"})
+        knowledge_tokens = packed.knowledge_tokens
+        predicted = packed.predicted_input_tokens
+        store.record(manifest, "knowledge", {
+            "sha256": knowledge_hash(knowledge),
+            "items": knowledge,
+            "references": used_refs,
+            "knowledge_tokens": knowledge_tokens,
+            "predicted_input_tokens": predicted,
+            "selection": selection,
+        })
 
     # -------- 3) Script agent: inject knowledge directly (no tools) --------
-    _log("script.run.begin", topic=args.topic)
-    knowledge_json = json.dumps(knowledge, ensure_ascii=False)
+    saved_script = store.outputs(manifest, "script")
+    if saved_script is not None:
+        script_result = ScriptResult.model_validate(saved_script["result"])
+        _log("script.resumed", variant_count=len(script_result.variants))
+    else:
+        writer_input = build_writer_input(args.topic, knowledge)
 
-    writer_input = (
-        f"topic: {args.topic}\n\n"
-        f"REFERENCE_VIDEOS_JSON:\n{knowledge_json}\n"
-    )
+        script_cache = ScriptCache(ttl_seconds=args.script_cache_ttl) if args.script_cache else None
+        cache_key = ""
+        cached: ScriptResult | None = None
+        if script_cache:
+            cache_key = ScriptCache.key(args.topic, knowledge_hash(knowledge), str(writer.model), SCRIPT_INSTRUCTIONS_VERSION)
+            cached = script_cache.get(cache_key, bypass=args.refresh_script)
+            _log("script.cache", hit=cached is not None, key=cache_key[:16], **script_cache.stats.as_dict())
+
+        actual = None
+        if cached is not None:
+            script_result = cached
+        else:
+            _log("script.run.begin", topic=args.topic, predicted_input_tokens=predicted)
+            from agents import Runner
 
-    out = Runner.run_sync(writer, writer_input, context=ctx, max_turns=6)
-    script_result: ScriptResult = out.final_output
-    _log("script.run.end", variant_count=len(script_result.variants))
+            with span("agent.script", model=str(writer.model), predicted_input_tokens=predicted) as asp:
+                out = Runner.run_sync(writer, writer_input, context=ctx, max_turns=6)
+                asp.set(**usage_attrs(out))
+            script_result = out.final_output
+            actual = actual_input_tokens(out)
+            _log(
+                "script.run.end",
+                variant_count=len(script_result.variants),
+                predicted_input_tokens=predicted,
+                actual_input_tokens=actual,
+                prediction_error=(None if actual is None else actual - predicted),
+            )
+            if script_cache:
+                try:
+                    script_cache.put(cache_key, script_result, topic=args.topic, model=str(writer.model))
+                except Exception as e:  # the script is still good; only the memo is lost
+                    _log("script.cache.put_failed", error=f"{type(e).__name__}: {e}")
+        store.record(manifest, "script", {
+            "result": script_result.model_dump(),
+            "cache_hit": cached is not None,
+            "actual_input_tokens": actual,
+        })
+
+    # -------- 4) Optional TTS --------
+    tts_paths = store.outputs(manifest, "tts")
+    if args.tts and (tts_paths is None or not all(Path(v).exists() for v in tts_paths.values())):
+        cfg = TTSConfig(
+            model=args.tts_model,
+            voice=args.tts_voice,
+            speed=float(args.tts_speed),
+            output_format=args.tts_format,
+            output_bitrate=args.tts_bitrate,
+        )
+        _log("tts.run.begin", model=cfg.model, voice=cfg.voice, speed=cfg.speed, format=cfg.output_format)
+        # both variants at once; each also synthesizes its chunks concurrently
+        with ThreadPoolExecutor(max_workers=len(script_result.variants) or 1, thread_name_prefix="tts-variant") as pool:
+            futures = [submit_traced(pool, synthesize_tts_to_file, v.transcript, cfg=cfg) for v in script_result.variants]
+            tts_paths = {f"variant_{i}": str(f.result()) for i, f in enumerate(futures, start=1)}
+        store.record(manifest, "tts", tts_paths)
+        _log("tts.run.end", **tts_paths)
 
     final_payload = {
+        "run_id": manifest.run_id,
+        "manifest_path": str(store.path(manifest.run_id)),
         "index": index_result.model_dump(),
         "script": script_result.model_dump(),
         "variants": [v.model_dump() for v in script_result.variants],
-        "reference_titles_used_in_context": used_refs,
+        "reference_titles_used_in_context": [str(r.get("title") or r.get("id") or "") for r in used_refs],
+        "knowledge_selection": selection,
+        "tts": tts_paths,
     }
+    return final_payload
+
+
+def _batch_request(job: dict[str, object], args: argparse.Namespace) -> IntelliTubeRequest:
+    """CLI flags are the defaults; a job line may override any IntelliTubeRequest field."""
+    base = {
+        "limit": args.limit,
+        "sort_by_date": args.by_date,
+        "max_duration_seconds": args.max_duration,
+        "indexer": args.indexer,
+        "streaming": args.streaming,
+        "max_knowledge_chars": args.max_knowledge_chars,
+        "knowledge_mode": args.knowledge_mode,
+        "knowledge_tokens": args.knowledge_tokens,
+        "prompt_tokens": args.prompt_tokens,
+        "keep_duplicates": args.keep_duplicates,
+        "reuse_script": args.script_cache and not args.refresh_script,
+        "tts": args.tts,
+        "tts_model": args.tts_model,
+        "tts_voice": args.tts_voice,
+        "tts_speed": args.tts_speed,
+        "tts_format": args.tts_format,
+        "tts_bitrate": args.tts_bitrate,
+    }
+    fields = {k: v for k, v in job.items() if k in IntelliTubeRequest.model_fields}
+    if "query" in job:
+        fields.setdefault("search_query", job["query"])
+    return IntelliTubeRequest(**{**base, **fields})
+
+
+def _cache_rate(spans: dict[str, dict[str, object]], name: str) -> dict[str, object] | None:
+    s = spans.get(name)
+    if not s or not s["count"]:
+        return None
+    return {"hits": s["cache_hits"], "total": s["count"], "rate": round(int(s["cache_hits"]) / int(s["count"]), 3)}
+
+
+async def _run_batch(args: argparse.Namespace) -> None:
+    """Run every job in ``args.batch`` against one shared context; one output line per finished job."""
+    with open(args.batch, "r", encoding="utf-8") as f:
+        lines = [ln for ln in f if ln.strip()]
+
+    _log("batch.begin", jobs=len(lines), concurrency=args.batch_concurrency, transcribe_workers=args.transcribe_workers)
+    ctx = build_context(
+        transcribe_model=args.transcribe_model,
+        vad=args.vad,
+        skip_duplicates=args.skip_duplicate_videos,
+        share_searches=True,
+        max_concurrent_transcriptions=args.transcribe_workers,
+    )
+    writer = get_script_agent()
+    script_cache = ScriptCache(ttl_seconds=args.script_cache_ttl) if args.script_cache else None
+    sem = asyncio.Semaphore(max(1, args.batch_concurrency))
+    out = sys.stdout if args.batch_out == "-" else open(args.batch_out, "a", encoding="utf-8")
+
+    async def one(i: int, line: str) -> bool:
+        async with sem:
+            t0 = time.perf_counter()
+            rec: dict[str, object] = {"job": i}
+            try:
+                job = json.loads(line)
+                if not isinstance(job, dict):
+                    raise ValueError("job line must be a JSON object")
+                rec.update(id=job.get("id"), query=job.get("query") or job.get("search_query"), topic=job.get("topic"))
+                res = await run_intellitube(_batch_request(job, args), ctx, writer=writer, script_cache=script_cache)
+                rec.update(ok=True, result=res.model_dump())
+            except Exception as e:
+                rec.update(ok=False, error=f"{type(e).__name__}: {e}")
+            rec["elapsed_s"] = round(time.perf_counter() - t0, 3)
+            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            out.flush()
+            return bool(rec["ok"])
+
+    t0 = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(one(i, ln) for i, ln in enumerate(lines)))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t0
+
+    spans = get_tracer().summary()
+    _log(
+        "batch.summary",
+        jobs=len(results),
+        ok=sum(results),
+        failed=len(results) - sum(results),
+        elapsed_s=round(elapsed, 3),
+        jobs_per_min=round(len(results) / elapsed * 60, 2) if elapsed > 0 else None,
+        cache={
+            "search": _cache_rate(spans, "search"),
+            "video": _cache_rate(spans, "video"),
+            "download": _cache_rate(spans, "download"),
+            "tts": _cache_rate(spans, "tts"),
+            "script": script_cache.stats.as_dict() if script_cache else None,
+        },
+    )
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Indexer (cache transcripts) -> Script agent (2 variants)")
+    p.add_argument("search_query", nargs="?", help="Search query to find reference videos")
+    p.add_argument("--limit", type=int, default=5)
+    p.add_argument("--topic", help="New topic to write about")
+    p.add_argument("--by-date", action="store_true")
+    p.add_argument("--max-duration", type=int, default=60)
+    p.add_argument("--transcribe-model", default="whisper-1")
+    p.add_argument(
+        "--indexer",
+        choices=["direct", "agent"],
+        default="direct",
+        help="direct: search + transcribe in Python (no LLM turns); agent: IntelliTubeIndexer LLM agent",
+    )
+    p.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Overlap search/download/transcribe and stop transcribing once --max-knowledge-chars is reached",
+    )
+    p.add_argument("--vad", action="store_true", help="Trim silence/music locally before transcription upload")
+    p.add_argument("--keep-duplicates", action="store_true", help="Don't drop near-duplicate transcripts from the knowledge")
+    p.add_argument(
+        "--skip-duplicate-videos",
+        action="store_true",
+        help="Don't transcribe a new video whose title+description matches a cached one (MinHash index)",
+    )
+    p.add_argument("--max-knowledge-chars", type=int, default=250_000, help="Cap total transcript chars injected")
+    p.add_argument(
+        "--knowledge-mode",
+        choices=["ranked", "ordered"],
+        default="ranked",
+        help="ranked: BM25-rank transcript chunks against --topic and pack best-first; ordered: search order, stop at cap",
+    )
+    p.add_argument("--knowledge-tokens", type=int, default=60_000, help="Token budget for ranked knowledge packing")
+    p.add_argument(
+        "--prompt-tokens",
+        type=int,
+        default=None,
+        help="Target for the whole writer prompt in model tokens (default: context window minus output reserve)",
+    )
+    p.add_argument("--script-cache", action="store_true", help="Reuse a cached ScriptResult for identical topic/knowledge/model")
+    p.add_argument("--script-cache-ttl", type=float, default=7 * 24 * 3600, help="Script cache TTL in seconds")
+    p.add_argument("--refresh-script", action="store_true", help="With --script-cache: ignore cached result, rerun and overwrite")
+    p.add_argument("--tts", action="store_true", help="Also synthesize both variants to audio (see --tts-format)")
+    p.add_argument("--tts-model", default=TTSConfig.model)
+    p.add_argument("--tts-voice", default=TTSConfig.voice)
+    p.add_argument("--tts-speed", type=float, default=TTSConfig.speed)
+    p.add_argument(
+        "--tts-format",
+        choices=["opus", "mp3", "wav"],
+        default=TTSConfig.output_format,
+        help="Loudness-normalized Opus (.ogg) / MP3 via ffmpeg, or plain WAV (the WAV is cached either way)",
+    )
+    p.add_argument("--tts-bitrate", default=None, help="Encoder bitrate, e.g. 48k (default: 48k opus, 96k mp3)")
+    p.add_argument("--trace-dir", default="cache/traces", help="Span log (spans.jsonl) + Prometheus metrics (metrics.prom)")
+    p.add_argument("--no-trace", action="store_true", help="Keep spans in memory only (summary is still logged)")
+    p.add_argument(
+        "--batch",
+        metavar="JOBS_JSONL",
+        help='Run many jobs ({"query": ..., "topic": ...} per line, plus optional overrides) on one shared context',
+    )
+    p.add_argument("--batch-concurrency", type=int, default=4, help="Jobs in flight at once (--batch)")
+    p.add_argument("--batch-out", default="-", help="Where per-job result lines go (--batch; default stdout)")
+    p.add_argument("--transcribe-workers", type=int, default=4, help="Concurrent transcriptions across all jobs (--batch)")
+    p.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Continue a run from its manifest (cache/manifests/<RUN_ID>.json), skipping completed stages",
+    )
+    args = p.parse_args()
+    if args.streaming and args.indexer == "agent":
+        p.error("--streaming runs the indexer in Python; it cannot be combined with --indexer agent")
+
+    if args.batch:
+        if args.resume:
+            p.error("--batch jobs are not checkpointed; it cannot be combined with --resume")
+        tracer = configure_tracing(None if args.no_trace else args.trace_dir)
+        try:
+            asyncio.run(_run_batch(args))
+        finally:
+            tracer.write_prometheus()
+        return
+
+    # manifests live in the context's manifest_dir (--resume args may select another context; same dir)
+    store = ManifestStore(_context(args).manifest_dir)
+    if args.resume:
+        try:
+            manifest = store.load(args.resume)
+        except (FileNotFoundError, ValueError) as e:
+            p.error(str(e))
+        args = _resume_args(args, manifest.args)
+    else:
+        if not args.search_query or not args.topic:
+            p.error("search_query and --topic are required (unless --resume or --batch is given)")
+        manifest = store.create({k: v for k, v in vars(args).items() if k != "resume"})
+
+    _log(
+        "start",
+        run_id=manifest.run_id,
+        resumed=bool(args.resume),
+        completed_stages=[s for s in STAGES if s in manifest.stages],
+        search_query=args.search_query,
+        limit=args.limit,
+        by_date=args.by_date,
+        max_duration=args.max_duration,
+    )
+
+    tracer = configure_tracing(None if args.no_trace else args.trace_dir)
+    try:
+        with span("run", run_id=manifest.run_id, resumed=bool(args.resume)):
+            final_payload = _run(args, store, manifest)
+    finally:
+        tracer.write_prometheus()
+        _log("trace.summary", prom=str(tracer.prom_path) if tracer.prom_path else None, spans=tracer.summary())
 
-    _log("done")
+    _log("done", run_id=manifest.run_id)
     print(json.dumps(final_payload, ensure_ascii=False, indent=2))
 
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Dict, List, Literal, Optional
 
 
 # ---------- Tool I/O models (strict schemas) ----------
@@ -20,6 +20,10 @@ class TranscriptArtifact(BaseModel):
     video_id: str
     url: str
     transcript_path: str
+    transcript_chars: Optional[int] = None
+    updated_at: Optional[str] = None
+    vad_removed_seconds: Optional[float] = None  # seconds of silence/music cut before upload
+    duplicate_of: Optional[str] = None  # cached near-duplicate whose transcript is reused (not transcribed)
 
 
 class IndexerResult(BaseModel):
@@ -42,3 +46,69 @@ class ScriptResult(BaseModel):
     style_notes: List[str] = Field(default_factory=list)
     references: List[str] = Field(default_factory=list)
     variants: List[VideoVariant] = Field(..., min_length=2, max_length=2)
+
+
+class KnowledgeItem(BaseModel):
+    title: str
+    description: str = ""
+    transcript: str
+
+
+# ---------- Run manifests (cache/manifests/<run_id>.json) ----------
+
+class ManifestEntry(BaseModel):
+    video_id: str
+    url: str
+    transcript_path: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+
+
+class StageRecord(BaseModel):
+    completed_at: str
+    outputs: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ManifestFile(BaseModel):
+    run_id: str
+    created_at: str
+    updated_at: str
+    args: Dict[str, Any] = Field(default_factory=dict)     # CLI arguments the run was started with
+    entries: List[ManifestEntry] = Field(default_factory=list)
+    stages: Dict[str, StageRecord] = Field(default_factory=dict)  # stage name -> checkpoint
+
+
+# ---------- Library API (intellitube_agents.api.run_intellitube) ----------
+
+class IntelliTubeRequest(BaseModel):
+    search_query: str = Field(..., min_length=1)
+    topic: str = Field(..., min_length=1)
+    limit: int = Field(5, ge=1, le=50)
+    sort_by_date: bool = False
+    max_duration_seconds: Optional[int] = 60
+    indexer: Literal["direct", "agent"] = "direct"
+    streaming: bool = False                    # overlap download/transcribe; stop at max_knowledge_chars
+    max_knowledge_chars: int = Field(250_000, ge=1)
+    knowledge_mode: Literal["ranked", "ordered"] = "ranked"
+    knowledge_tokens: int = Field(60_000, ge=1)
+    prompt_tokens: Optional[int] = None
+    keep_duplicates: bool = False
+    reuse_script: bool = False                 # serve a cached ScriptResult when one matches
+    tts: bool = False
+    tts_model: str = "tts-1-hd"
+    tts_voice: str = "alloy"
+    tts_speed: float = 1.1
+    tts_format: Literal["opus", "mp3", "wav"] = "opus"   # served file; WAV is always cached too
+    tts_bitrate: Optional[str] = None                    # e.g. "48k"; default depends on the format
+
+
+class IntelliTubeResponse(BaseModel):
+    index: IndexerResult
+    script: ScriptResult
+    references: List[Dict[str, Any]] = Field(default_factory=list)  # aligned with the knowledge sent to the writer
+    knowledge_sha256: str
+    knowledge_selection: Optional[Dict[str, Any]] = None
+    predicted_input_tokens: Optional[int] = None
+    actual_input_tokens: Optional[int] = None
+    script_cache_hit: bool = False
+    tts: Dict[str, str] = Field(default_factory=dict)   # variant_1 / variant_2 -> audio path
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
-from agents import Agent
+import hashlib
+import json
+from functools import lru_cache
+from typing import TYPE_CHECKING, Sequence
 
 from ..context import IntelliTubeContext
 from ..schema import ScriptResult
 
+if TYPE_CHECKING:
+    from agents import Agent
+
 SCRIPT_INSTRUCTIONS = """
 You are IntelliTubeScriptWriter. A youtube short video script writer for given topic. Popular reference videos are also shared, you need to refer them for tone, style so that youtube algorithm picks it but creat the transcript for the mentioned topic only.
 
@@ -25,8 +31,13 @@ Rules:
 Output must include exactly 2 variants.
 """.strip()
 
+# Part of the ScriptResult cache key: editing the instructions invalidates cached scripts.
+SCRIPT_INSTRUCTIONS_VERSION = hashlib.sha1(SCRIPT_INSTRUCTIONS.encode("utf-8")).hexdigest()[:12]
+
 
 def build_script_agent() -> Agent[IntelliTubeContext]:
+    from agents import Agent  # deferred so importing the writer's helpers stays cheap
+
     return Agent[IntelliTubeContext](
         name="IntelliTubeScriptWriter",
         model="gpt-4.1-mini-2025-04-14",
@@ -34,3 +45,15 @@ def build_script_agent() -> Agent[IntelliTubeContext]:
         tools=[],  # no tool calls for reading JSON
         output_type=ScriptResult,
     )
+
+
+def build_writer_input(topic: str, knowledge: Sequence[dict[str, str]]) -> str:
+    """User message for the writer: topic + knowledge as REFERENCE_VIDEOS_JSON."""
+    knowledge_json = json.dumps(list(knowledge), ensure_ascii=False)
+    return f"topic: {topic}\n\nREFERENCE_VIDEOS_JSON:\n{knowledge_json}\n"
+
+
+@lru_cache(maxsize=1)
+def get_script_agent() -> Agent[IntelliTubeContext]:
+    """Shared instance of ``build_script_agent()``; agents hold no per-run state, so runs can reuse one."""
+    return build_script_agent()
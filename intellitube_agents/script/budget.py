@@ -0,0 +1,216 @@
+"""Token-accurate prompt budgeting for the script writer.
+
+``--max-knowledge-chars`` caps characters, but the writer is limited and
+billed in tokens, and JSON escaping / non-English text skew the ratio a lot.
+This module counts tokens locally for the writer's model (tiktoken when
+installed, a chars/4 estimate otherwise), accounts for the fixed prompt
+overhead (instructions, message framing, output schema), and fits the
+REFERENCE_VIDEOS_JSON payload to what is left.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..knowledge import KnowledgePack, estimate_tokens, pack_knowledge
+from .agent import build_writer_input
+
+# Longest prefix wins.
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4.1": 1_047_576,
+    "gpt-4o": 128_000,
+    "gpt-4-turbo": 128_000,
+    "o1": 200_000,
+    "o3": 200_000,
+    "o4": 200_000,
+}
+DEFAULT_CONTEXT_WINDOW = 128_000
+
+# Chat framing: per-message tokens for system + user, plus reply priming.
+_MESSAGE_OVERHEAD = 3 * 2 + 3
+
+
+def context_window(model: str) -> int:
+    best = ""
+    for prefix in MODEL_CONTEXT_WINDOWS:
+        if model.startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    return MODEL_CONTEXT_WINDOWS.get(best, DEFAULT_CONTEXT_WINDOW)
+
+
+class TokenCounter:
+    """Counts tokens for ``model``; ``exact`` is False when falling back to the estimate."""
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self._encode: Optional[Callable[[str], List[int]]] = None
+        try:
+            import tiktoken  # type: ignore
+        except ImportError:
+            return
+        try:
+            enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            # newer model names than the installed tiktoken knows; 4o/4.1/o-series share o200k
+            enc = tiktoken.get_encoding("o200k_base")
+        self._encode = enc.encode_ordinary
+
+    @property
+    def exact(self) -> bool:
+        return self._encode is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encode is None:
+            return estimate_tokens(text)
+        return len(self._encode(text))
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    model: str
+    exact: bool                # tokenizer-backed counts (vs. estimate)
+    context_window: int
+    target_tokens: int         # whole prompt (instructions + input + schema)
+    overhead_tokens: int       # everything except the knowledge JSON
+
+    @property
+    def knowledge_tokens(self) -> int:
+        return max(0, self.target_tokens - self.overhead_tokens)
+
+
+def plan_prompt_budget(
+    agent: Any,
+    topic: str,
+    counter: TokenCounter,
+    *,
+    target_tokens: Optional[int] = None,
+    reserve_output_tokens: int = 8_192,
+) -> PromptBudget:
+    """Budget for ``agent`` (the script writer) given ``topic``.
+
+    ``target_tokens`` defaults to the model's context window minus
+    ``reserve_output_tokens`` and is never allowed to exceed it.
+    """
+    model = str(getattr(agent, "model", "") or counter.model)
+    window = context_window(model)
+    ceiling = max(0, window - reserve_output_tokens)
+    target = min(target_tokens, ceiling) if target_tokens else ceiling
+
+    overhead = _MESSAGE_OVERHEAD
+    overhead += counter.count(str(getattr(agent, "instructions", "") or ""))
+    overhead += counter.count(build_writer_input(topic, []))
+    schema_of = getattr(getattr(agent, "output_type", None), "model_json_schema", None)
+    if callable(schema_of):
+        overhead += counter.count(json.dumps(schema_of(), separators=(",", ":")))
+
+    return PromptBudget(
+        model=model,
+        exact=counter.exact,
+        context_window=window,
+        target_tokens=target,
+        overhead_tokens=overhead,
+    )
+
+
+def knowledge_json_tokens(items: Sequence[Dict[str, str]], counter: TokenCounter) -> int:
+    """Tokens of the knowledge as it appears in the prompt (minus the empty-list '[]')."""
+    return counter.count(json.dumps(list(items), ensure_ascii=False)) - counter.count("[]")
+
+
+def fit_ranked(
+    docs: Sequence[Dict[str, str]],
+    topic: str,
+    budget: PromptBudget,
+    counter: TokenCounter,
+    *,
+    token_cap: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    max_rounds: int = 4,
+) -> Tuple[KnowledgePack, int]:
+    """Ranked packing whose serialized JSON fits ``budget.knowledge_tokens``.
+
+    Chunk costs ignore JSON escaping and per-item keys, so the pack is
+    re-measured as JSON and re-packed with a smaller budget until it fits.
+    Returns the pack and its JSON token count.
+    """
+    limit = budget.knowledge_tokens if token_cap is None else min(token_cap, budget.knowledge_tokens)
+    b = limit
+    pack = KnowledgePack(items=[], doc_indices=[])
+    used = 0
+    for _ in range(max(1, max_rounds)):
+        pack = pack_knowledge(docs, topic, token_budget=b, max_chars=max_chars, count_tokens=counter.count)
+        used = knowledge_json_tokens(pack.items, counter)
+        if used <= limit or b <= 0:
+            break
+        b -= (used - limit) + max(16, (used - limit) // 10)
+    return pack, used
+
+
+def fit_ordered(
+    items: Sequence[Dict[str, str]],
+    budget: PromptBudget,
+    counter: TokenCounter,
+    *,
+    max_rounds: int = 4,
+) -> Tuple[List[Dict[str, str]], int]:
+    """Keep items in order while the JSON fits; truncate the first one that doesn't.
+
+    Each item's JSON is tokenized once and summed with the ``", "`` separators;
+    only the overflowing item is re-tokenized (binary search on its cut). Token
+    merges across item boundaries can make the real count differ slightly, so
+    the result is measured as a whole and refit with a smaller limit if needed.
+    """
+    limit = budget.knowledge_tokens
+    costs = [counter.count(json.dumps(it, ensure_ascii=False)) for it in items]
+    sep = counter.count(", ")
+    b = limit
+    out: List[Dict[str, str]] = []
+    used = 0
+    for _ in range(max(1, max_rounds)):
+        out = _fit_ordered_once(items, costs, sep, b, counter)
+        used = knowledge_json_tokens(out, counter)
+        if used <= limit or b <= 0:
+            break
+        b -= used - limit
+    return out, used
+
+
+def _fit_ordered_once(
+    items: Sequence[Dict[str, str]],
+    costs: Sequence[int],
+    sep: int,
+    limit: int,
+    counter: TokenCounter,
+) -> List[Dict[str, str]]:
+    out: List[Dict[str, str]] = []
+    total = 0
+    for it, cost in zip(items, costs):
+        room = limit - total - (sep if out else 0)
+        if cost <= room:
+            out.append(it)
+            total += cost + (sep if len(out) > 1 else 0)
+            continue
+        # longest transcript prefix whose item JSON fits the room left
+        tx = it.get("transcript") or ""
+        lo, hi = 0, len(tx)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if counter.count(json.dumps({**it, "transcript": tx[:mid]}, ensure_ascii=False)) <= room:
+                lo = mid
+            else:
+                hi = mid - 1
+        if lo > 0:
+            out.append({**it, "transcript": tx[:lo]})
+        break
+    return out
+
+
+def actual_input_tokens(run_result: Any) -> Optional[int]:
+    """Prompt tokens reported by the Agents SDK for a finished run, if available."""
+    usage = getattr(getattr(run_result, "context_wrapper", None), "usage", None)
+    tokens = getattr(usage, "input_tokens", None)
+    return tokens if isinstance(tokens, int) else None
@@ -0,0 +1,93 @@
+"""Opt-in memoization of ScriptResult.
+
+Key = sha256(topic | sha256(knowledge JSON) | model | instructions version),
+so a rerun with the same topic and the same packed references skips the
+writer entirely. Entries live in ``cache/scripts/<key>.json`` and expire
+after ``ttl_seconds``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from ..schema import ScriptResult
+
+
+def knowledge_hash(knowledge: Sequence[Dict[str, str]]) -> str:
+    raw = json.dumps(list(knowledge), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ScriptCacheStats:
+    hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "bypassed": self.bypassed, "hit_rate": round(self.hit_rate, 3)}
+
+
+class ScriptCache:
+    def __init__(self, cache_dir: str | Path = "cache/scripts", *, ttl_seconds: float = 7 * 24 * 3600) -> None:
+        self._dir = Path(cache_dir).resolve()
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._ttl = float(ttl_seconds)
+        self._lock = threading.Lock()
+        self.stats = ScriptCacheStats()
+
+    @staticmethod
+    def key(topic: str, knowledge_sha: str, model: str, instructions_version: str) -> str:
+        raw = "|".join([topic.strip(), knowledge_sha, model, instructions_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self._dir / f"{key}.json"
+
+    def get(self, key: str, *, bypass: bool = False) -> Optional[ScriptResult]:
+        """Cached result, or ``None`` on miss/expiry/``bypass`` (bypass still allows ``put``)."""
+        if bypass:
+            with self._lock:
+                self.stats.bypassed += 1
+            return None
+
+        result: Optional[ScriptResult] = None
+        p = self._path(key)
+        try:
+            with p.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if time.time() - float(data.get("created_at", 0)) <= self._ttl:
+                result = ScriptResult.model_validate(data["result"])
+        except Exception:
+            result = None
+
+        with self._lock:
+            if result is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return result
+
+    def put(self, key: str, result: ScriptResult, **meta: Any) -> None:
+        payload = {"created_at": time.time(), "meta": meta, "result": result.model_dump()}
+        # unique per writer: concurrent runs of the same topic may put the same key
+        tmp = self._dir / f"{key}.json.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            tmp.replace(self._path(key))
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
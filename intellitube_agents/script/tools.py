@@ -4,6 +4,7 @@ import json
 from pathlib import Path
 
 from agents import RunContextWrapper, function_tool
+from youtube_transcribe.storage import read_transcript
 
 from ..context import IntelliTubeContext
 from ..schema import ManifestFile, KnowledgeItem
@@ -33,12 +34,10 @@ def load_knowledge_from_manifest_tool(
 
     for e in manifest.entries:
         tp = Path(e.transcript_path).expanduser().resolve()
-        if not tp.exists():
+        data = read_transcript(tp)
+        if not data:
             continue
 
-        with tp.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-
         title = str(data.get("title") or e.title or "")
         desc = str(data.get("description") or e.description or "")
         tx = str(data.get("transcript") or "")
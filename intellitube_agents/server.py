@@ -0,0 +1,176 @@
+"""Headless HTTP job API.
+
+    python -m intellitube_agents.server --port 8000 --workers 4
+
+    POST   /jobs                          body: IntelliTubeRequest fields ("query" works for "search_query")
+                                          -> 202 {"id", "status", "position", "url"}; 429 when the queue is full
+    GET    /jobs/{id}                     status, per-stage progress, references/script/audio as they arrive
+    GET    /jobs/{id}/audio/{variant}     the synthesized audio (variant_1 / variant_2)
+    DELETE /jobs/{id}                     cancel a queued or running job
+    GET    /jobs?status=running&limit=50  recent jobs, newest first
+    GET    /metrics                       span metrics (Prometheus text) + job counts
+    GET    /healthz
+
+Jobs run on an in-process ``JobQueue`` whose workers share one context, so
+it is meant for a single server process. Needs ``fastapi`` and ``uvicorn``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import mimetypes
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .context import get_context
+from .jobs import FINISHED, JobQueue, QueueFull
+from .schema import IntelliTubeRequest
+from .script.agent import get_script_agent
+from .script.cache import ScriptCache
+from .tracing import configure_tracing, get_tracer
+
+
+def _fastapi() -> Any:
+    try:
+        import fastapi  # type: ignore
+    except Exception as e:
+        raise ImportError("Missing dependency 'fastapi'. Install with: pip install fastapi uvicorn") from e
+    return fastapi
+
+
+def job_request(payload: Dict[str, Any]) -> IntelliTubeRequest:
+    """Validate a ``POST /jobs`` body; accepts ``query`` as shorthand for ``search_query``."""
+    body = dict(payload)
+    if "query" in body and "search_query" not in body:
+        body["search_query"] = body.pop("query")
+    return IntelliTubeRequest.model_validate(body)
+
+
+def render_metrics(queue: JobQueue) -> str:
+    lines = [
+        "# HELP intellitube_jobs Jobs held by the server, by status.",
+        "# TYPE intellitube_jobs gauge",
+    ]
+    lines += [f'intellitube_jobs{{status="{s}"}} {n}' for s, n in queue.counts().items()]
+    return get_tracer().render_prometheus() + "\n".join(lines) + "\n"
+
+
+def create_app(queue: JobQueue) -> Any:
+    """FastAPI app serving ``queue``; the queue's workers start and stop with the app."""
+    fastapi = _fastapi()
+    from contextlib import asynccontextmanager
+
+    from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+    from pydantic import ValidationError
+
+    @asynccontextmanager
+    async def lifespan(app: Any):
+        await queue.start()
+        try:
+            yield
+        finally:
+            await queue.stop()
+            get_tracer().write_prometheus()
+
+    app = fastapi.FastAPI(title="IntelliTube jobs", lifespan=lifespan)
+    audio_url = "/jobs/{id}/audio/{variant}"
+
+    def found(job_id: str) -> Any:
+        job = queue.get(job_id)
+        if job is None:
+            raise fastapi.HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+        return job
+
+    @app.post("/jobs", status_code=202)
+    async def submit(payload: Dict[str, Any]):
+        try:
+            job = queue.submit(job_request(payload))
+        except ValidationError as e:
+            return JSONResponse(status_code=422, content={"detail": e.errors(include_url=False, include_context=False)})
+        except QueueFull as e:
+            return JSONResponse(status_code=429, content={"detail": f"Queue full: {e}"}, headers={"Retry-After": "30"})
+        return {"id": job.id, "status": job.status, "position": queue.position(job), "url": f"/jobs/{job.id}"}
+
+    @app.get("/jobs")
+    async def recent(status: Optional[str] = None, limit: int = 50):
+        return {
+            "counts": queue.counts(),
+            "jobs": [
+                {"id": j.id, "status": j.status, "created_at": j.created_at, "stage": j.stages[-1]["stage"] if j.stages else None}
+                for j in queue.recent(status, limit)
+            ],
+        }
+
+    @app.get("/jobs/{job_id}")
+    async def status(job_id: str):
+        job = found(job_id)
+        return {**job.to_dict(audio_url=audio_url), "position": queue.position(job)}
+
+    @app.delete("/jobs/{job_id}")
+    async def cancel(job_id: str):
+        job = queue.cancel(job_id)
+        if job is None:
+            raise fastapi.HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+        # a running job is marked cancelled once its task has unwound
+        return {"id": job.id, "status": job.status if job.status in FINISHED else "cancelling"}
+
+    @app.get("/jobs/{job_id}/audio/{variant}")
+    async def audio(job_id: str, variant: str):
+        path = found(job_id).audio.get(variant)
+        if path is None or not Path(path).is_file():
+            raise fastapi.HTTPException(status_code=404, detail=f"No audio '{variant}' for job {job_id} (yet)")
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return FileResponse(path, media_type=media_type, filename=f"{job_id}_{variant}{Path(path).suffix}")
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(render_metrics(queue), media_type="text/plain; version=0.0.4")
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"ok": True, "workers": queue.workers, **queue.counts()}
+
+    return app
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="HTTP job API: submit IntelliTube runs and poll their progress")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--workers", type=int, default=4, help="Jobs running at once (all share one context)")
+    p.add_argument("--max-queued", type=int, default=1000, help="Jobs allowed to wait; more get HTTP 429")
+    p.add_argument("--keep-finished", type=int, default=10_000, help="Finished jobs kept for GET /jobs/{id}")
+    p.add_argument("--transcribe-model", default="whisper-1")
+    p.add_argument("--transcribe-workers", type=int, default=4, help="Concurrent transcriptions across all jobs")
+    p.add_argument("--vad", action="store_true", help="Trim silence/music locally before transcription upload")
+    p.add_argument("--skip-duplicate-videos", action="store_true", help="Don't transcribe near-duplicates of cached videos")
+    p.add_argument("--script-cache-ttl", type=float, default=7 * 24 * 3600, help="Script cache TTL in seconds (jobs opt in with reuse_script)")
+    p.add_argument("--trace-dir", default="cache/traces", help="Span log (spans.jsonl) + Prometheus metrics (metrics.prom)")
+    p.add_argument("--no-trace", action="store_true", help="Keep spans in memory only")
+    args = p.parse_args()
+
+    try:
+        import uvicorn  # type: ignore
+    except Exception as e:
+        raise SystemExit("Missing dependency 'uvicorn'. Install with: pip install fastapi uvicorn") from e
+
+    configure_tracing(None if args.no_trace else args.trace_dir)
+    ctx = get_context(
+        transcribe_model=args.transcribe_model,
+        vad=args.vad,
+        skip_duplicates=args.skip_duplicate_videos,
+        max_concurrent_transcriptions=args.transcribe_workers,
+    )
+    queue = JobQueue(
+        ctx,
+        workers=args.workers,
+        max_queued=args.max_queued,
+        keep_finished=args.keep_finished,
+        script_cache=ScriptCache(ttl_seconds=args.script_cache_ttl),
+        writer=get_script_agent(),
+    )
+    uvicorn.run(create_app(queue), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Streaming search -> download -> transcribe -> knowledge pipeline.
+
+Instead of finishing each stage for every video before the next starts,
+search rows are fed to a download pool, downloaded audio to a transcription
+pool, and finished transcripts to an incremental knowledge builder:
+
+    search rows --> [download workers] --> [transcribe workers] --> builder
+                    (cache hits skip both pools)
+
+Only ``download_workers + transcribe_workers`` videos are in flight at any
+time. Finished transcripts are released to the builder in search-rank order
+(so knowledge, and its hash, doesn't depend on which download won); once the
+builder hits ``max_knowledge_chars`` it stops feeding new rows, so videos
+past the cap are never downloaded or transcribed.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from youtube_transcribe import YouTubeTranscript
+
+from .context import IntelliTubeContext
+from .indexer.direct import fetch_audio, search_videos, transcribe_audio
+from .schema import IndexerResult, SearchResultRow, TranscriptArtifact
+from .tracing import submit_traced
+
+
+@dataclass
+class StreamingResult:
+    index_result: IndexerResult
+    knowledge: List[Dict[str, str]]
+    references: List[Dict[str, Any]]      # search-row metadata of videos used in knowledge
+    total_chars: int = 0
+    cache_hits: int = 0
+    not_started: int = 0                  # rows never downloaded/transcribed (cap reached)
+    errors: Dict[str, str] = field(default_factory=dict)  # url -> error
+
+
+# (rank, row, transcript or None, error or None, duplicate_of or None)
+_Done = Tuple[int, SearchResultRow, Optional[YouTubeTranscript], Optional[str], Optional[str]]
+
+
+def run_streaming(
+    ctx: IntelliTubeContext,
+    query: str,
+    limit: int = 5,
+    sort_by_date: bool = False,
+    max_duration_seconds: Optional[int] = 60,
+    *,
+    max_knowledge_chars: int = 250_000,
+    download_workers: int = 3,
+    transcribe_workers: int = 3,
+    rows: Optional[List[SearchResultRow]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> StreamingResult:
+    """``rows`` skips the search (e.g. rows restored from a run manifest).
+
+    Setting ``cancel`` stops feeding rows like the char cap does; videos
+    already in flight finish and are cached.
+    """
+    if rows is None:
+        rows = search_videos(
+            ctx,
+            query,
+            limit=limit,
+            sort_by_date=sort_by_date,
+            max_duration_seconds=max_duration_seconds,
+        )
+
+    svc = ctx.transcript_service
+    index = ctx.dedup_index
+    done: "queue.Queue[_Done]" = queue.Queue()
+    stop = threading.Event()
+    cache_hits = 0
+    hits_lock = threading.Lock()
+
+    def stopped() -> bool:
+        return stop.is_set() or (cancel is not None and cancel.is_set())
+
+    def transcribe_step(rank: int, row: SearchResultRow, info: Any) -> None:
+        nonlocal cache_hits
+        try:
+            with ctx.video_locks.hold(row.url):
+                # another run sharing ctx may have transcribed it since download_step checked
+                cached = svc.get_cached(info.video_id, url=row.url, title=info.title, description=info.description)
+                if cached:
+                    with hits_lock:
+                        cache_hits += 1
+                    done.put((rank, row, cached, None, None))
+                    return
+                t = transcribe_audio(ctx, row.url, info)
+            if index is not None:
+                index.add(
+                    t.video_id,
+                    title=t.title,
+                    description=t.description,
+                    transcript=t.transcript,
+                    updated_at=(svc.read_header(t.video_id) or {}).get("updated_at"),
+                )
+            done.put((rank, row, t, None, None))
+        except Exception as e:
+            done.put((rank, row, None, f"{type(e).__name__}: {e}", None))
+
+    def download_step(rank: int, row: SearchResultRow) -> None:
+        nonlocal cache_hits
+        try:
+            cached = svc.get_cached(row.id, url=row.url, title=row.title)
+            if cached:
+                with hits_lock:
+                    cache_hits += 1
+                done.put((rank, row, cached, None, None))
+                return
+            if stopped():
+                done.put((rank, row, None, None, None))
+                return
+            # like transcribe_or_reuse: one run at a time fetches a given URL (the
+            # transcribe step takes the same lock again and re-checks the cache)
+            with ctx.video_locks.hold(row.url):
+                info = fetch_audio(ctx, row.url)
+                cached = svc.get_cached(info.video_id, url=row.url, title=info.title, description=info.description)
+            if cached:  # search id and resolved id can differ (e.g. redirects)
+                with hits_lock:
+                    cache_hits += 1
+                done.put((rank, row, cached, None, None))
+                return
+            if stopped():
+                done.put((rank, row, None, None, None))
+                return
+            if index is not None:
+                match = index.match_metadata(info.title, info.description, exclude=info.video_id)
+                twin = svc.get_cached(match.video_id) if match else None
+                if twin:
+                    done.put((rank, row, twin, None, match.video_id))
+                    return
+            submit_traced(tx_pool, transcribe_step, rank, row, info)
+        except Exception as e:
+            done.put((rank, row, None, f"{type(e).__name__}: {e}", None))
+
+    knowledge: List[Dict[str, str]] = []
+    references: List[Dict[str, Any]] = []
+    artifacts: List[Tuple[int, TranscriptArtifact]] = []
+    errors: Dict[str, str] = {}
+    finished: Dict[int, Tuple[SearchResultRow, Optional[YouTubeTranscript]]] = {}  # by rank, until released
+    next_release = 0
+    total = 0
+    prefetch = max(1, download_workers) + max(1, transcribe_workers)
+
+    with ThreadPoolExecutor(max(1, download_workers), thread_name_prefix="itube-dl") as dl_pool, \
+            ThreadPoolExecutor(max(1, transcribe_workers), thread_name_prefix="itube-tx") as tx_pool:
+        next_rank = 0
+        in_flight = 0
+        while next_rank < len(rows) and in_flight < prefetch:
+            submit_traced(dl_pool, download_step, next_rank, rows[next_rank])
+            next_rank += 1
+            in_flight += 1
+
+        while in_flight:
+            rank, row, t, err, duplicate_of = done.get()
+            in_flight -= 1
+
+            if err:
+                errors[row.url] = err
+            elif t is not None:
+                header = svc.read_header(t.video_id) or {}
+                artifacts.append((rank, TranscriptArtifact(
+                    video_id=row.id if duplicate_of else t.video_id,
+                    url=row.url if duplicate_of else t.url,
+                    transcript_path=str(svc.transcript_path(t.video_id)),
+                    transcript_chars=len(t.transcript),
+                    updated_at=header.get("updated_at"),
+                    vad_removed_seconds=t.vad_removed_seconds,
+                    duplicate_of=duplicate_of,
+                )))
+            finished[rank] = (row, t)
+
+            # builder: consume in rank order; a gap waits for the earlier video
+            while next_release in finished:
+                row, t = finished.pop(next_release)
+                next_release += 1
+                tx = t.transcript if t is not None else ""
+                if tx.strip() and not stopped():
+                    if total + len(tx) > max_knowledge_chars:
+                        stop.set()
+                    else:
+                        knowledge.append({"title": t.title, "description": t.description, "transcript": tx})
+                        references.append(row.model_dump())
+                        total += len(tx)
+
+            if not stopped() and next_rank < len(rows):
+                submit_traced(dl_pool, download_step, next_rank, rows[next_rank])
+                next_rank += 1
+                in_flight += 1
+
+    if index is not None:
+        index.save()
+
+    index_result = IndexerResult(
+        search_query=query,
+        requested_limit=int(limit),
+        found=len(rows),
+        transcripts=[a for _, a in sorted(artifacts, key=lambda x: x[0])],
+    )
+    return StreamingResult(
+        index_result=index_result,
+        knowledge=knowledge,
+        references=references,
+        total_chars=total,
+        cache_hits=cache_hits,
+        not_started=len(rows) - next_rank,
+        errors=errors,
+    )
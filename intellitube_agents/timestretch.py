@@ -0,0 +1,180 @@
+"""In-process time-stretch (WSOLA) for TTS playback speed.
+
+WSOLA (waveform-similarity overlap-add) changes tempo without changing
+pitch: Hann-windowed frames are taken from the input every ``speed * hop``
+samples and overlap-added every ``hop`` samples. Each next frame is shifted
+by up to ``tolerance_ms`` to the position that best matches the natural
+continuation of the previous one, which avoids phasing on voiced speech.
+
+Used instead of ffmpeg's ``atempo`` when ffmpeg is missing or for clips so
+short that spawning a process costs more than the work. NumPy is needed;
+only 16-bit PCM WAV is handled.
+
+``stretch_quality`` compares a stretched clip against its source (duration,
+pitch, average spectrum); ``bench/tts_stretch.py`` uses it to
+benchmark this path against ffmpeg.
+"""
+
+from __future__ import annotations
+
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+
+@dataclass(frozen=True)
+class WSOLAConfig:
+    frame_ms: float = 40.0       # analysis window; ~2-4 pitch periods of speech
+    tolerance_ms: float = 10.0   # max shift when searching for the best-matching frame
+
+
+def _np() -> Any:
+    try:
+        import numpy as np  # type: ignore
+    except Exception as e:
+        raise ImportError("Missing dependency 'numpy'. Install with: pip install numpy") from e
+    return np
+
+
+def wsola(samples: Any, speed: float, sample_rate: int, cfg: WSOLAConfig = WSOLAConfig()) -> Any:
+    """Time-stretch float samples shaped ``(n,)`` or ``(n, channels)``; ``speed > 1`` is faster."""
+    np = _np()
+    if speed <= 0:
+        raise ValueError(f"speed must be > 0, got {speed}")
+    x = np.asarray(samples, dtype=np.float32)
+    mono_input = x.ndim == 1
+    if mono_input:
+        x = x[:, None]
+
+    n = x.shape[0]
+    out_len = int(round(n / speed))
+    frame = max(64, int(sample_rate * cfg.frame_ms / 1000.0)) & ~1
+    hop = frame // 2                                    # 50% overlap: periodic Hann sums to 1
+    tol = max(1, int(sample_rate * cfg.tolerance_ms / 1000.0))
+    if n < frame or out_len == 0:
+        return (x[:, 0] if mono_input else x).copy()
+
+    window = (0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(frame) / frame)).astype(np.float32)[:, None]
+    frames = -(-out_len // hop)
+    # pad so every analysis frame, its continuation and the search region stay in bounds
+    pad_end = int(frames * hop * speed) - n + frame * 2 + tol * 2
+    xp = np.concatenate(
+        [np.zeros((tol, x.shape[1]), np.float32), x, np.zeros((max(0, pad_end), x.shape[1]), np.float32)]
+    )
+    guide = xp.mean(axis=1)                             # channel mix drives the similarity search
+    y = np.zeros(((frames + 1) * hop + frame, x.shape[1]), np.float32)
+
+    delta = 0
+    for k in range(frames):
+        pos = int(k * hop * speed) + tol + delta
+        y[k * hop : k * hop + frame] += xp[pos : pos + frame] * window
+
+        natural = guide[pos + hop : pos + hop + frame]
+        nxt = int((k + 1) * hop * speed) + tol
+        region = guide[nxt - tol : nxt + tol + frame]
+        corr = np.correlate(region, natural, mode="valid")
+        delta = int(np.argmax(corr)) - tol
+
+    y = y[:out_len]
+    return y[:, 0] if mono_input else y
+
+
+def read_wav_pcm16(path: str | Path) -> Tuple[Any, int, int]:
+    """``(float32 samples (n, channels), sample_rate, channels)``; 16-bit PCM only."""
+    np = _np()
+    with wave.open(str(path), "rb") as w:
+        if w.getsampwidth() != 2 or w.getcomptype() != "NONE":
+            raise ValueError(f"Unsupported WAV (need 16-bit PCM): {path}")
+        channels, rate = w.getnchannels(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+    pcm = np.frombuffer(raw, dtype="<i2")
+    pcm = pcm[: len(pcm) - len(pcm) % channels]
+    return pcm.reshape(-1, channels).astype(np.float32) / 32768.0, rate, channels
+
+
+def write_wav_pcm16(path: str | Path, samples: Any, sample_rate: int) -> None:
+    np = _np()
+    x = np.asarray(samples, dtype=np.float32)
+    if x.ndim == 1:
+        x = x[:, None]
+    pcm = (np.clip(x, -1.0, 1.0) * 32767.0).astype("<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(x.shape[1])
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+
+
+def wav_duration(path: str | Path) -> float:
+    with wave.open(str(path), "rb") as w:
+        return w.getnframes() / float(w.getframerate() or 1)
+
+
+def stretch_wav(in_wav: str | Path, out_wav: str | Path, speed: float, cfg: WSOLAConfig = WSOLAConfig()) -> None:
+    samples, rate, _ = read_wav_pcm16(in_wav)
+    write_wav_pcm16(out_wav, wsola(samples, speed, rate, cfg), rate)
+
+
+# ---------------- quality check ----------------
+
+def _avg_spectrum(x: Any, n_fft: int) -> Any:
+    np = _np()
+    x = np.asarray(x, dtype=np.float32)
+    if x.ndim > 1:
+        x = x.mean(axis=1)
+    if len(x) < n_fft:
+        x = np.pad(x, (0, n_fft - len(x)))
+    hop = n_fft // 2
+    starts = range(0, len(x) - n_fft + 1, hop)
+    win = np.hanning(n_fft).astype(np.float32)
+    return np.mean([np.abs(np.fft.rfft(x[s : s + n_fft] * win)) for s in starts], axis=0)
+
+
+def _median_f0(x: Any, sample_rate: int, fmin: float = 60.0, fmax: float = 400.0, n: int = 1024) -> float:
+    """Median autocorrelation pitch over the louder frames (0.0 if nothing is voiced)."""
+    np = _np()
+    x = np.asarray(x, dtype=np.float32)
+    if x.ndim > 1:
+        x = x.mean(axis=1)
+    frames = [x[s : s + n] for s in range(0, len(x) - n + 1, n // 4)]
+    if not frames:
+        return 0.0
+    rms = np.array([float(np.sqrt(np.mean(f * f))) for f in frames])
+    lo, hi = int(sample_rate / fmax), int(sample_rate / fmin)
+    f0s = []
+    for f, r in zip(frames, rms):
+        if r < 0.25 * rms.max():
+            continue
+        f = f - f.mean()
+        ac = np.fft.irfft(np.abs(np.fft.rfft(f, 2 * n)) ** 2)[:n]
+        f0s.append(sample_rate / float(lo + np.argmax(ac[lo:hi])))
+    return float(np.median(f0s)) if f0s else 0.0
+
+
+def stretch_quality(original: Any, stretched: Any, speed: float, sample_rate: int) -> Dict[str, float]:
+    """How faithful a time-stretch is: length vs. target, pitch drift and average-spectrum similarity.
+
+    Pitch drift compares median autocorrelation f0; resampling by ``speed``
+    (the "chipmunk" effect) would move it by ``speed - 1``.
+    """
+    np = _np()
+    target = len(original) / speed
+    a, b = _avg_spectrum(original, 2048), _avg_spectrum(stretched, 2048)
+    fa, fb = _median_f0(original, sample_rate), _median_f0(stretched, sample_rate)
+    la, lb = np.log1p(a), np.log1p(b)
+    cos = float(np.dot(la, lb) / (np.linalg.norm(la) * np.linalg.norm(lb) or 1.0))
+    return {
+        "duration_error": round(abs(len(stretched) - target) / max(target, 1.0), 4),
+        "f0_hz": round(fa, 1),
+        "pitch_error": round(abs(fb / fa - 1.0), 4) if fa else 0.0,
+        "spectral_similarity": round(cos, 4),
+    }
+
+
+def quality_ok(q: Dict[str, float], *, max_duration_error: float = 0.02, max_pitch_error: float = 0.03, min_similarity: float = 0.9) -> bool:
+    return (
+        q["duration_error"] <= max_duration_error
+        and q["pitch_error"] <= max_pitch_error
+        and q["spectral_similarity"] >= min_similarity
+    )
@@ -0,0 +1,330 @@
+"""Lightweight span tracing with JSONL export and Prometheus latency histograms.
+
+    with span("transcribe", video_id=vid) as sp:
+        ...
+        sp.set(bytes=n, cache_hit=False)
+
+Spans nest through a ``ContextVar`` (``asyncio.to_thread`` copies it; use
+``submit_traced`` for thread pools). Every finished span is appended to the
+JSONL file and folded into per-name histograms that ``write_prometheus``
+renders in the Prometheus text format (textfile-collector friendly).
+
+``python -m intellitube_agents.tracing cache/traces/spans.jsonl`` replays a
+span log and prints p50/p95/p99 per span name.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextvars
+import json
+import math
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("intellitube_span", default=None)
+
+
+def _new_id() -> str:
+    return secrets.token_hex(8)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float                                   # unix seconds
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    duration: Optional[float] = None               # seconds
+    status: str = "ok"
+    error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> "Span":
+        self.attrs.update({k: v for k, v in attrs.items() if v is not None})
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": round(self.start, 6),
+            "duration_s": None if self.duration is None else round(self.duration, 6),
+            "status": self.status,
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+class _Stats:
+    def __init__(self, buckets: Sequence[float], keep_samples: int) -> None:
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.bytes = 0
+        self.cache_hits = 0
+        self.tokens: Dict[str, int] = {}
+        self.samples: Deque[float] = deque(maxlen=keep_samples)
+
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))  # nearest rank
+    return sorted_values[k]
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Tracer:
+    """Collects finished spans; exports JSONL (append) and Prometheus text (rewrite)."""
+
+    def __init__(
+        self,
+        *,
+        jsonl_path: Optional[str | Path] = None,
+        prom_path: Optional[str | Path] = None,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        keep_samples: int = 10_000,
+    ) -> None:
+        self.jsonl_path = Path(jsonl_path).resolve() if jsonl_path else None
+        self.prom_path = Path(prom_path).resolve() if prom_path else None
+        for p in (self.jsonl_path, self.prom_path):
+            if p is not None:
+                p.parent.mkdir(parents=True, exist_ok=True)
+        self._buckets = tuple(sorted(float(b) for b in buckets))
+        self._keep = keep_samples
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _Stats] = {}
+
+    # ---- recording ----
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        parent = _current.get()
+        sp = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else _new_id(),
+            span_id=_new_id(),
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+        ).set(**attrs)
+        token = _current.set(sp)
+        t0 = time.perf_counter()
+        try:
+            yield sp
+        except BaseException as e:
+            # CancelledError / KeyboardInterrupt are BaseException, not Exception
+            sp.status = "error" if isinstance(e, Exception) else "cancelled"
+            sp.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            sp.duration = time.perf_counter() - t0
+            _current.reset(token)
+            self._finish(sp)
+
+    def record(self, name: str, seconds: float, **attrs: Any) -> Span:
+        """Add an already-measured span (e.g. timings reported by a client) under the current span."""
+        parent = _current.get()
+        sp = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else _new_id(),
+            span_id=_new_id(),
+            parent_id=parent.span_id if parent else None,
+            start=time.time() - seconds,
+            duration=float(seconds),
+        ).set(**attrs)
+        self._finish(sp)
+        return sp
+
+    def _finish(self, sp: Span) -> None:
+        line = json.dumps(sp.to_dict(), ensure_ascii=False, default=str) if self.jsonl_path else None
+        with self._lock:
+            self._observe(sp.name, sp.duration or 0.0, sp.status, sp.attrs)
+            if line is not None:
+                with self.jsonl_path.open("a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+    def _observe(self, name: str, duration: float, status: str, attrs: Dict[str, Any]) -> None:
+        st = self._stats.get(name)
+        if st is None:
+            st = self._stats[name] = _Stats(self._buckets, self._keep)
+        st.count += 1
+        st.sum += duration
+        st.samples.append(duration)
+        for i, le in enumerate(self._buckets):
+            if duration <= le:
+                st.bucket_counts[i] += 1
+        if status != "ok":
+            st.errors += 1
+        if isinstance(attrs.get("bytes"), int):
+            st.bytes += attrs["bytes"]
+        if attrs.get("cache_hit") is True:
+            st.cache_hits += 1
+        for kind in ("input_tokens", "output_tokens"):
+            if isinstance(attrs.get(kind), int):
+                st.tokens[kind] = st.tokens.get(kind, 0) + attrs[kind]
+
+    def load_jsonl(self, path: str | Path) -> int:
+        """Fold a span log back into the histograms; returns spans read."""
+        n = 0
+        with Path(path).open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    d = json.loads(line)
+                except ValueError:
+                    continue
+                with self._lock:
+                    self._observe(str(d.get("name")), float(d.get("duration_s") or 0.0), str(d.get("status") or "ok"), d.get("attrs") or {})
+                n += 1
+        return n
+
+    # ---- export ----
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for name, st in sorted(self._stats.items()):
+                s = sorted(st.samples)
+                out[name] = {
+                    "count": st.count,
+                    "errors": st.errors,
+                    "total_s": round(st.sum, 3),
+                    "p50_s": round(_percentile(s, 0.50), 3),
+                    "p95_s": round(_percentile(s, 0.95), 3),
+                    "p99_s": round(_percentile(s, 0.99), 3),
+                    "cache_hits": st.cache_hits,
+                    "bytes": st.bytes,
+                    **st.tokens,
+                }
+        return out
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = [
+            "# HELP intellitube_span_duration_seconds Span latency by stage.",
+            "# TYPE intellitube_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            stats = sorted(self._stats.items())
+            for name, st in stats:
+                lbl = f'span="{_esc(name)}"'
+                for le, c in zip(self._buckets, st.bucket_counts):
+                    lines.append(f'intellitube_span_duration_seconds_bucket{{{lbl},le="{le:g}"}} {c}')
+                lines.append(f'intellitube_span_duration_seconds_bucket{{{lbl},le="+Inf"}} {st.count}')
+                lines.append(f"intellitube_span_duration_seconds_sum{{{lbl}}} {st.sum:.6f}")
+                lines.append(f"intellitube_span_duration_seconds_count{{{lbl}}} {st.count}")
+            for metric, help_text, get in (
+                ("intellitube_span_errors_total", "Spans that ended with an error or cancellation.", lambda s: s.errors),
+                ("intellitube_span_bytes_total", "Bytes processed, by stage.", lambda s: s.bytes),
+                ("intellitube_span_cache_hits_total", "Spans served from a cache.", lambda s: s.cache_hits),
+            ):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for name, st in stats:
+                    lines.append(f'{metric}{{span="{_esc(name)}"}} {get(st)}')
+            lines.append("# HELP intellitube_tokens_total Model tokens used, by stage and kind.")
+            lines.append("# TYPE intellitube_tokens_total counter")
+            for name, st in stats:
+                for kind, v in sorted(st.tokens.items()):
+                    lines.append(f'intellitube_tokens_total{{span="{_esc(name)}",kind="{kind}"}} {v}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Optional[str | Path] = None) -> Optional[Path]:
+        p = Path(path).resolve() if path else self.prom_path
+        if p is None:
+            return None
+        tmp = p.with_name(p.name + f".{os.getpid()}.tmp")
+        tmp.write_text(self.render_prometheus(), encoding="utf-8")
+        tmp.replace(p)
+        return p
+
+
+_tracer = Tracer()  # in-memory only until configure_tracing()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def configure_tracing(
+    trace_dir: Optional[str | Path] = "cache/traces",
+    *,
+    jsonl_name: str = "spans.jsonl",
+    prom_name: str = "metrics.prom",
+) -> Tracer:
+    """Replace the process tracer; ``trace_dir=None`` keeps spans in memory only."""
+    global _tracer
+    if trace_dir is None:
+        _tracer = Tracer()
+    else:
+        d = Path(trace_dir)
+        _tracer = Tracer(jsonl_path=d / jsonl_name, prom_path=d / prom_name)
+    return _tracer
+
+
+def span(name: str, **attrs: Any):
+    return _tracer.span(name, **attrs)
+
+
+def record_span(name: str, seconds: float, **attrs: Any) -> Span:
+    return _tracer.record(name, seconds, **attrs)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def submit_traced(pool: Executor, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """``pool.submit`` that runs ``fn`` under the caller's current span."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def file_size(path: Any) -> Optional[int]:
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return None
+
+
+def usage_attrs(run_result: Any) -> Dict[str, int]:
+    """Token usage of a finished Agents SDK run, as span attributes."""
+    usage = getattr(getattr(run_result, "context_wrapper", None), "usage", None)
+    out: Dict[str, int] = {}
+    for k in ("requests", "input_tokens", "output_tokens", "total_tokens"):
+        v = getattr(usage, k, None)
+        if isinstance(v, int):
+            out[k] = v
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Per-span latency summary (p50/p95/p99) from a span JSONL log")
+    p.add_argument("jsonl", nargs="?", default="cache/traces/spans.jsonl")
+    p.add_argument("--prom", help="Also write Prometheus text metrics to this file")
+    args = p.parse_args()
+
+    tracer = Tracer()
+    tracer.load_jsonl(args.jsonl)
+    if args.prom:
+        tracer.write_prometheus(args.prom)
+    summary = tracer.summary()
+    for name, s in sorted(summary.items(), key=lambda kv: -kv[1]["p95_s"]):
+        print(json.dumps({"span": name, **s}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,21 @@
 # IntelliTube/intellitube_agents/tts.py
 import hashlib
 import os
+import re
 import shutil
+import struct
 import subprocess
 import tempfile
+import threading
 import wave
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Any, Iterable, List, Optional, Tuple
 
-# Official SDK (matches the API ref examples that use `import openai`)
-import openai
+from .timestretch import stretch_wav
+from .tracing import file_size, span, submit_traced
 
 
 @dataclass(frozen=True)
@@ -18,8 +23,24 @@ class TTSConfig:
     model: str = "tts-1-hd"          # good quality default
     voice: str = "alloy"
     speed: float = 1.1              # requested default
-    response_format: str = "wav"    # easiest to concat + works well with Gradio Audio
+    response_format: str = "wav"    # easiest to concat; kept internally whatever the output format
     cache_dir: str | Path = "cache/tts"
+    max_workers: int = 4            # chunk requests in flight at once (not part of the cache key)
+    chunk_cache: bool = True        # cache ~chunk_chars pieces cut at sentence ends, so edits only redo changed ones
+    chunk_chars: int = 800          # target piece size for chunk_cache (pieces run ~600-1000 chars)
+    inprocess_stretch_max_seconds: float = 15.0  # shorter clips skip the ffmpeg spawn (NumPy WSOLA)
+    output_format: str = "opus"     # "opus" (.ogg) / "mp3" / "wav"; encoding needs ffmpeg, else WAV is returned
+    output_bitrate: Optional[str] = None  # default per format, see _OUTPUT_FORMATS
+    loudnorm: bool = True           # EBU R128 normalization while encoding
+    loudness_lufs: float = -16.0    # integrated loudness target (typical for speech / podcasts)
+
+
+# output_format -> (suffix, ffmpeg encoder, ffmpeg muxer, default bitrate)
+_OUTPUT_FORMATS = {
+    "opus": (".ogg", "libopus", "ogg", "48k"),
+    "mp3": (".mp3", "libmp3lame", "mp3", "96k"),
+}
+_OPUS_RATES = (48_000, 24_000, 16_000, 12_000, 8_000)
 
 
 def _sha1(s: str) -> str:
@@ -56,6 +77,46 @@ def _chunk_text(text: str, max_chars: int = 3900) -> List[str]:
     return chunks
 
 
+def _split_sentences(text: str, max_chars: int = 3900) -> List[str]:
+    """Sentences (over-long ones fall back to ``_chunk_text``)."""
+    t = " ".join((text or "").strip().split())
+    pieces: List[str] = []
+    for sentence in re.split(r"(?<=[.!?])\s+", t):
+        pieces.extend(_chunk_text(sentence, max_chars))
+    return pieces
+
+
+def _pack_sentences(text: str, target_chars: int = 800, max_chars: int = 3900) -> List[str]:
+    """
+    Consecutive sentences packed into ~``target_chars`` pieces for the chunk cache.
+    A piece ends after a sentence once it is 3/4 of the target and that sentence's
+    CRC is even, or before a sentence that would take it past 5/4 of the target.
+    Cut points depend on nearby text only, so an edit re-synthesizes the piece it
+    falls in (and sometimes the next one), not every piece after it.
+    """
+    lo, hi = target_chars * 3 // 4, min(target_chars * 5 // 4, max_chars)
+    pieces: List[str] = []
+    current: List[str] = []
+    size = 0
+    for sentence in _split_sentences(text, max_chars):
+        if current and size + 1 + len(sentence) > hi:
+            pieces.append(" ".join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence) + (1 if size else 0)
+        if size >= lo and zlib.crc32(sentence.encode("utf-8")) % 2 == 0:
+            pieces.append(" ".join(current))
+            current, size = [], 0
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def _piece_key(cfg: TTSConfig, piece: str) -> str:
+    # raw API output, before the ffmpeg speed pass: cfg.speed is still sent to the API
+    return _sha1(f"{cfg.model}|{cfg.voice}|{cfg.speed}|{cfg.response_format}|{piece}")
+
+
 def _ffmpeg_atempo_chain(speed: float) -> str:
     """
     ffmpeg atempo supports 0.5..2.0 per filter, so chain if needed.
@@ -78,18 +139,12 @@ def _ffmpeg_available() -> bool:
     return shutil.which("ffmpeg") is not None
 
 
-def _adjust_speed_ffmpeg(in_wav: Path, out_wav: Path, speed: float) -> None:
+def _adjust_speed_ffmpeg(in_wav: Path, out_wav: Path, speed: float) -> bool:
     """
-    Post-process WAV to exact speed using ffmpeg.
+    Post-process WAV to exact speed using ffmpeg. False if ffmpeg is missing or failed.
     """
-    if abs(speed - 1.0) < 1e-6:
-        out_wav.write_bytes(in_wav.read_bytes())
-        return
-
     if not _ffmpeg_available():
-        # fallback: return unmodified
-        out_wav.write_bytes(in_wav.read_bytes())
-        return
+        return False
 
     filt = _ffmpeg_atempo_chain(speed)
     cmd = [
@@ -99,35 +154,288 @@ def _adjust_speed_ffmpeg(in_wav: Path, out_wav: Path, speed: float) -> None:
         str(out_wav),
     ]
     p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if p.returncode != 0:
-        # fallback: return unmodified
-        out_wav.write_bytes(in_wav.read_bytes())
+    return p.returncode == 0
+
+
+def _adjust_speed_inprocess(in_wav: Path, out_wav: Path, speed: float) -> bool:
+    """NumPy WSOLA (see timestretch.py). False if NumPy is missing or the WAV isn't 16-bit PCM."""
+    try:
+        stretch_wav(in_wav, out_wav, speed)
+    except (ImportError, ValueError, wave.Error):
+        return False
+    return True
+
+
+def _adjust_speed(in_wav: Path, out_wav: Path, speed: float, cfg: TTSConfig) -> str:
+    """
+    Write ``in_wav`` at exact playback ``speed``; returns the method used.
+    Short clips (or no ffmpeg) are stretched in-process; ffmpeg handles the rest.
+    Only "wsola"/"ffmpeg" write ``out_wav``; for "copy" (speed 1.0) and
+    "unchanged" (nothing worked) the caller keeps using ``in_wav``.
+    """
+    if abs(speed - 1.0) < 1e-6:
+        return "copy"
+
+    methods = {"wsola": _adjust_speed_inprocess, "ffmpeg": _adjust_speed_ffmpeg}
+    order = ["ffmpeg", "wsola"]
+    if _wav_data(in_wav).seconds <= cfg.inprocess_stretch_max_seconds or not _ffmpeg_available():
+        order.reverse()
+    for name in order:
+        if methods[name](in_wav, out_wav, speed):
+            return name
+
+    # fallback: return unmodified (span records it)
+    return "unchanged"
+
+
+_COPY_BUFFER = 1 << 20
+_WAV_SIZE_PLACEHOLDERS = (0, 0xFFFFFFFF)  # data sizes written before the length is known
+
+
+@dataclass(frozen=True)
+class _WavData:
+    nchannels: int
+    sampwidth: int
+    framerate: int
+    offset: int     # byte offset of the PCM data
+    size: int       # PCM bytes (whole frames)
+
+    @property
+    def seconds(self) -> float:
+        return self.size / float(self.nchannels * self.sampwidth * self.framerate or 1)
+
+
+def _wav_data(path: Path) -> _WavData:
+    """
+    Locate the PCM data of a WAV without reading it. Streamed WAVs (like the TTS
+    API's) carry a placeholder data size (0 or 0xFFFFFFFF); the rest of the file
+    is used then.
+    """
+    with path.open("rb") as f:
+        head = f.read(12)
+        if len(head) < 12 or head[:4] != b"RIFF" or head[8:] != b"WAVE":
+            raise RuntimeError(f"Not a RIFF/WAVE file: {path}")
+        file_size = os.fstat(f.fileno()).st_size
+        fmt: Optional[Tuple[int, int, int]] = None
+        while True:
+            hdr = f.read(8)
+            if len(hdr) < 8:
+                raise RuntimeError(f"No data chunk in WAV: {path}")
+            cid, size = hdr[:4], struct.unpack("<I", hdr[4:])[0]
+            if cid == b"fmt ":
+                body = f.read(size + (size & 1))
+                tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                if tag not in (1, 0xFFFE):  # PCM / WAVE_FORMAT_EXTENSIBLE
+                    raise RuntimeError(f"Unsupported WAV format tag {tag}: {path}")
+                fmt = (channels, bits // 8, rate)
+            elif cid == b"data":
+                if fmt is None:
+                    raise RuntimeError(f"WAV data before fmt chunk: {path}")
+                offset = f.tell()
+                size = file_size - offset if size in _WAV_SIZE_PLACEHOLDERS else min(size, file_size - offset)
+                size -= size % (fmt[0] * fmt[1] or 1)
+                return _WavData(nchannels=fmt[0], sampwidth=fmt[1], framerate=fmt[2], offset=offset, size=size)
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def _wav_header(nchannels: int, sampwidth: int, framerate: int, data_size: int) -> bytes:
+    block = nchannels * sampwidth
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, nchannels, framerate, framerate * block, block, sampwidth * 8,
+        b"data", data_size,
+    )
+
+
+def _copy_range(src: Any, dst: Any, offset: int, count: int) -> None:
+    """Copy ``count`` bytes from ``src`` at ``offset`` to the end of ``dst`` (sendfile when available)."""
+    dst.flush()
+    if hasattr(os, "sendfile"):
+        try:
+            while count > 0:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+                count -= sent
+        except OSError:
+            pass  # e.g. unsupported filesystem: finish with buffered copies
+    src.seek(offset)
+    while count > 0:
+        buf = src.read(min(_COPY_BUFFER, count))
+        if not buf:
+            break
+        dst.write(buf)
+        count -= len(buf)
+    if count > 0:
+        raise RuntimeError(f"WAV chunk shorter than its header claims: {src.name}")
 
 
 def _concat_wavs(wavs: List[Path], out_wav: Path) -> None:
     """
-    Concatenate WAVs safely (assumes same params).
+    Concatenate WAVs into ``out_wav`` (written under a temp name, then renamed).
+
+    The header is written once, up front, from the summed data sizes; chunk
+    PCM is copied with sendfile or fixed-size buffers, so memory stays flat.
     """
     if not wavs:
         raise ValueError("No wav files to concat")
 
-    with wave.open(str(wavs[0]), "rb") as w0:
-        params = w0.getparams()
+    parts = [_wav_data(wp) for wp in wavs]
+    fmt = (parts[0].nchannels, parts[0].sampwidth, parts[0].framerate)
+    if any((p.nchannels, p.sampwidth, p.framerate) != fmt for p in parts):
+        raise RuntimeError("WAV params mismatch across chunks; cannot concat safely.")
 
-    with wave.open(str(out_wav), "wb") as wout:
-        wout.setparams(params)
-        for wp in wavs:
-            with wave.open(str(wp), "rb") as wi:
-                if wi.getparams() != params:
-                    raise RuntimeError("WAV params mismatch across chunks; cannot concat safely.")
-                frames = wi.readframes(wi.getnframes())
-                wout.writeframes(frames)
+    tmp = out_wav.with_name(f"{out_wav.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp.open("wb") as out:
+            out.write(_wav_header(*fmt, sum(p.size for p in parts)))
+            for wp, part in zip(wavs, parts):
+                with wp.open("rb") as src:
+                    _copy_range(src, out, part.offset, part.size)
+        tmp.replace(out_wav)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _publish(src: Path, dst: Path, scratch: Path) -> None:
+    """
+    Atomically place ``src`` at ``dst``. Files in ``scratch`` are moved;
+    anything else (a cached piece) is hard-linked, or copied if that fails.
+    """
+    if src.parent != scratch:
+        staged = scratch / "publish.wav"
+        try:
+            os.link(src, staged)
+        except OSError:
+            shutil.copyfile(src, staged)
+        src = staged
+    os.replace(src, dst)
+
+
+def _output_path(wav_path: Path, cfg: TTSConfig) -> Optional[Path]:
+    """Where the encoded copy of ``wav_path`` is cached (None for WAV output)."""
+    fmt = cfg.output_format.lower()
+    if fmt == "wav":
+        return None
+    if fmt not in _OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported TTS output format: {cfg.output_format!r} (wav, opus, mp3)")
+    suffix, _, _, default_bitrate = _OUTPUT_FORMATS[fmt]
+    tag = _sha1(f"{fmt}|{cfg.output_bitrate or default_bitrate}|{cfg.loudnorm}|{cfg.loudness_lufs}")[:10]
+    return wav_path.with_name(f"{wav_path.stem}.{tag}{suffix}")
+
+
+def _encode_output(wav_path: Path, out_path: Path, cfg: TTSConfig) -> Path:
+    """
+    Loudness-normalize + encode the final WAV (written under a temp name, then renamed).
+    Returns ``wav_path`` unchanged if ffmpeg is missing or fails.
+    """
+    fmt = cfg.output_format.lower()
+    _, codec, muxer, default_bitrate = _OUTPUT_FORMATS[fmt]
+    bitrate = cfg.output_bitrate or default_bitrate
+    with span("tts.encode", format=fmt, bitrate=bitrate, loudnorm=cfg.loudnorm) as sp:
+        if not _ffmpeg_available():
+            sp.set(method="unavailable")
+            return wav_path
+
+        # loudnorm resamples to 192 kHz internally; go back to the source rate (opus only takes a few)
+        rate = _wav_data(wav_path).framerate
+        if codec == "libopus" and rate not in _OPUS_RATES:
+            rate = 48_000
+        cmd = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", str(wav_path)]
+        if cfg.loudnorm:
+            cmd += ["-af", f"loudnorm=I={cfg.loudness_lufs:g}:TP=-1.5:LRA=11"]
+        tmp = out_path.with_name(f"{out_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        cmd += ["-ar", str(rate), "-c:a", codec, "-b:a", bitrate, "-f", muxer, str(tmp)]
+        p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if p.returncode != 0:
+            tmp.unlink(missing_ok=True)
+            sp.set(method="failed", error=p.stderr.decode("utf-8", "replace").strip()[-300:])
+            return wav_path
+        tmp.replace(out_path)
+        sp.set(method="ffmpeg", bytes=file_size(out_path), wav_bytes=file_size(wav_path))
+    return out_path
+
+
+def _synthesize_chunk(openai: Any, cfg: TTSConfig, index: int, chunk: str, out: Path) -> Path:
+    with span("tts.chunk", index=index, chars=len(chunk)) as csp:
+        # speed is documented, but some models may ignore; we still apply post-ffmpeg.
+        with openai.audio.speech.with_streaming_response.create(
+            model=cfg.model,
+            voice=cfg.voice,
+            input=chunk,
+            response_format=cfg.response_format,
+            speed=float(cfg.speed),
+        ) as resp:
+            # pieces may land in the shared cache: never leave a half-written file under the final name
+            tmp = out.with_name(f"{out.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            resp.stream_to_file(tmp)
+        tmp.replace(out)
+        csp.set(bytes=file_size(out))
+    return out
+
+
+def _synthesize_wav(txt: str, cfg: TTSConfig, cache_dir: Path, final_path: Path, sp: Any) -> None:
+    """Chunk synthesis -> concat -> speed pass, published at ``final_path``."""
+    chunks = _pack_sentences(txt, cfg.chunk_chars) if cfg.chunk_cache else _chunk_text(txt)
+    if not chunks:
+        raise ValueError("No TTS chunks")
+
+    # scratch space on the cache's filesystem, so results are renamed into place, never copied
+    with tempfile.TemporaryDirectory(dir=cache_dir, prefix=".tmp-") as td:
+        td_path = Path(td)
+
+        if cfg.chunk_cache:
+            piece_dir = cache_dir / "chunks"
+            piece_dir.mkdir(parents=True, exist_ok=True)
+            raw_wavs: List[Path] = [piece_dir / f"{_piece_key(cfg, c)}.wav" for c in chunks]
+        else:
+            raw_wavs = [td_path / f"raw_{i}.wav" for i in range(len(chunks))]
+
+        # only pieces not cached yet (a repeated piece is synthesized once)
+        todo = {}
+        for i, (chunk, raw) in enumerate(zip(chunks, raw_wavs)):
+            if raw not in todo and not (raw.exists() and raw.stat().st_size > 0):
+                todo[raw] = (i, chunk)
+        sp.set(cache_hit=False, chunks=len(chunks), chunks_synthesized=len(todo))
+
+        if todo:
+            # Official SDK (matches the API ref examples that use `import openai`); deferred until a cache miss
+            import openai
+
+            # Generate per-chunk wavs concurrently; concatenation below follows text order
+            workers = max(1, min(int(cfg.max_workers), len(todo)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts") as pool:
+                futures = [
+                    submit_traced(pool, _synthesize_chunk, openai, cfg, i, chunk, raw)
+                    for raw, (i, chunk) in todo.items()
+                ]
+                for f in futures:
+                    f.result()
+
+        if len(raw_wavs) == 1:
+            merged = raw_wavs[0]
+        else:
+            merged = td_path / "merged.wav"
+            _concat_wavs(raw_wavs, merged)
+
+        # Ensure exact playback speed
+        with span("tts.speed", speed=float(cfg.speed)) as ssp:
+            stretched = td_path / "final.wav"
+            method = _adjust_speed(merged, stretched, float(cfg.speed), cfg)
+            ssp.set(method=method)
+        _publish(stretched if method in ("wsola", "ffmpeg") else merged, final_path, td_path)
 
 
 def synthesize_tts_to_file(text: str, *, cfg: TTSConfig) -> Path:
     """
-    Returns a cached WAV path for the given text+cfg.
-    Uses OpenAI TTS then (optionally) ffmpeg speed adjustment for exact playback speed.
+    Returns a cached audio path for the given text+cfg: the ``cfg.output_format``
+    encoding (loudness-normalized Opus/MP3) of a cached WAV, or the WAV itself.
+    Uses OpenAI TTS then a speed pass (ffmpeg, or in-process WSOLA for short clips) for exact playback speed.
+    With ``cfg.chunk_cache`` the raw audio of every ~``cfg.chunk_chars`` piece is also
+    cached (<cache_dir>/chunks), so an edited script only re-synthesizes the pieces it touched.
     """
     txt = (text or "").strip()
     if not txt:
@@ -138,38 +446,18 @@ def synthesize_tts_to_file(text: str, *, cfg: TTSConfig) -> Path:
 
     key = _sha1(f"{cfg.model}|{cfg.voice}|{cfg.speed}|{cfg.response_format}|{txt}")
     final_path = cache_dir / f"{key}.wav"
-    if final_path.exists() and final_path.stat().st_size > 0:
-        return final_path
-
-    chunks = _chunk_text(txt)
-    if not chunks:
-        raise ValueError("No TTS chunks")
-
-    with tempfile.TemporaryDirectory() as td:
-        td_path = Path(td)
-        raw_wavs: List[Path] = []
-
-        # Generate per-chunk wavs
-        for i, chunk in enumerate(chunks):
-            raw = td_path / f"raw_{i}.wav"
-            # speed is documented, but some models may ignore; we still apply post-ffmpeg.
-            with openai.audio.speech.with_streaming_response.create(
-                model=cfg.model,
-                voice=cfg.voice,
-                input=chunk,
-                response_format=cfg.response_format,
-                speed=float(cfg.speed),
-            ) as resp:
-                resp.stream_to_file(raw)
-            raw_wavs.append(raw)
-
-        merged = td_path / "merged.wav"
-        if len(raw_wavs) == 1:
-            merged.write_bytes(raw_wavs[0].read_bytes())
+    out_path = _output_path(final_path, cfg)
+    with span("tts", model=cfg.model, voice=cfg.voice, chars=len(txt), format=cfg.output_format) as sp:
+        if out_path is not None and out_path.exists() and out_path.stat().st_size > 0:
+            sp.set(cache_hit=True, bytes=file_size(out_path))
+            return out_path
+
+        if final_path.exists() and final_path.stat().st_size > 0:
+            sp.set(cache_hit=True)
         else:
-            _concat_wavs(raw_wavs, merged)
-
-        # Ensure exact playback speed
-        _adjust_speed_ffmpeg(merged, final_path, float(cfg.speed))
+            _synthesize_wav(txt, cfg, cache_dir, final_path, sp)
 
-    return final_path
+        # WAV stays cached for concatenation/re-encoding; the compressed copy is what gets served
+        result = final_path if out_path is None else _encode_output(final_path, out_path, cfg)
+        sp.set(bytes=file_size(result))
+    return result
@@ -0,0 +1,55 @@
+import struct
+import wave
+from pathlib import Path
+
+import pytest
+
+from intellitube_agents.tts import _concat_wavs, _wav_data
+
+RATE = 24_000
+
+
+def _pcm(frames: int, value: int) -> bytes:
+    return value.to_bytes(2, "little", signed=True) * frames
+
+
+def _streamed_wav(path: Path, pcm: bytes, placeholder: int) -> Path:
+    # header written before the length was known, as streamed TTS responses are
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", placeholder, b"WAVE",
+        b"fmt ", 16, 1, 1, RATE, RATE * 2, 2, 16,
+        b"data", placeholder,
+    )
+    path.write_bytes(header + pcm)
+    return path
+
+
+def _normal_wav(path: Path, pcm: bytes) -> Path:
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(pcm)
+    return path
+
+
+@pytest.mark.parametrize("placeholder", [0, 0xFFFFFFFF])
+def test_placeholder_data_size_reads_to_eof(tmp_path: Path, placeholder: int) -> None:
+    wav = _streamed_wav(tmp_path / "streamed.wav", _pcm(RATE // 2, 1000), placeholder)
+    assert _wav_data(wav).seconds == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("placeholder", [0, 0xFFFFFFFF])
+def test_concat_keeps_placeholder_size_chunk(tmp_path: Path, placeholder: int) -> None:
+    streamed_pcm, normal_pcm = _pcm(RATE // 2, 1000), _pcm(RATE // 4, -1000)
+    parts = [
+        _streamed_wav(tmp_path / "a.wav", streamed_pcm, placeholder),
+        _normal_wav(tmp_path / "b.wav", normal_pcm),
+    ]
+    out = tmp_path / "out.wav"
+    _concat_wavs(parts, out)
+
+    with wave.open(str(out), "rb") as w:
+        assert w.getnframes() == RATE // 2 + RATE // 4
+        assert w.readframes(w.getnframes()) == streamed_pcm + normal_pcm
@@ -1,9 +1,22 @@
-from .interfaces import AudioDownloadClient
-from .clients import YtDlpAudioClient
-from .service import YouTubeAudioService
-
-__all__ = [
-    "AudioDownloadClient",
-    "YtDlpAudioClient",
-    "YouTubeAudioService",
-]
+"""YouTube audio download. Exports load on first access so yt-dlp is imported only when a client runs."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict
+
+from ._lazy import attach
+
+_EXPORTS: Dict[str, str] = {
+    "AudioDownloadClient": ".interfaces",
+    "YtDlpAudioClient": ".clients",
+    "YouTubeAudioService": ".service",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = attach(__name__, _EXPORTS)
+
+
+if TYPE_CHECKING:
+    from .interfaces import AudioDownloadClient
+    from .clients import YtDlpAudioClient
+    from .service import YouTubeAudioService
@@ -1,11 +1,10 @@
 from __future__ import annotations
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from pathlib import Path
 from datetime import datetime, timezone
 import json
-
-import yt_dlp
+import time
 
 from .interfaces import VideoAudioInfo
 
@@ -43,6 +42,8 @@ class YtDlpAudioClient:
         self._opts = {**default_opts, **(base_opts or {})}
 
     def _probe(self, url: str) -> Dict[str, Any]:
+        import yt_dlp  # deferred: slow to import and only needed once a video is fetched
+
         with yt_dlp.YoutubeDL({**self._opts, "skip_download": True}) as ydl:
             info = ydl.extract_info(url, download=False)
             if info.get("_type") == "playlist":
@@ -106,14 +107,17 @@ class YtDlpAudioClient:
                 return m.resolve()
         return None
 
-    def _download_and_resolve(self, url: str, info: Dict[str, Any]) -> Path:
+    def _download_and_resolve(self, url: str, info: Dict[str, Any]) -> Tuple[Path, bool]:
+        """``(audio path, was already cached)``."""
         video_id = info.get("id")
         if not video_id:
             raise RuntimeError("yt-dlp did not return a video id.")
 
         existing = self._resolve_existing_audio(video_id)
         if existing:
-            return existing
+            return existing, True
+
+        import yt_dlp
 
         # Download (no transcoding)
         with yt_dlp.YoutubeDL(self._opts) as ydl:
@@ -121,13 +125,15 @@ class YtDlpAudioClient:
 
         existing = self._resolve_existing_audio(video_id)
         if existing:
-            return existing
+            return existing, False
 
         raise RuntimeError("Audio download completed but file was not found in cache.")
 
     # ---- Public API ----
     def get_info(self, url: str) -> VideoAudioInfo:
+        t0 = time.perf_counter()
         info = self._probe(url)
+        probe_seconds = time.perf_counter() - t0
         video_id = info.get("id")
         if not video_id:
             raise RuntimeError("yt-dlp did not return a video id.")
@@ -135,7 +141,9 @@ class YtDlpAudioClient:
         title = (info.get("title") or "").strip()
         description = (info.get("description") or "").strip()
 
-        audio_path = self._download_and_resolve(url, info).resolve()
+        t1 = time.perf_counter()
+        audio_path, cached = self._download_and_resolve(url, info)
+        download_seconds = time.perf_counter() - t1
 
         # Write <id>.json beside the audio
         self._write_meta(
@@ -151,6 +159,9 @@ class YtDlpAudioClient:
             title=title,
             description=description,
             audio_path=str(audio_path),
+            cached=cached,
+            probe_seconds=probe_seconds,
+            download_seconds=download_seconds,
         )
 
     def download(self, url: str) -> str:
@@ -10,6 +10,9 @@ class VideoAudioInfo:
     title: str
     description: str
     audio_path: str
+    cached: bool = False                       # audio was already in the cache (no download)
+    probe_seconds: Optional[float] = None      # metadata extraction time
+    download_seconds: Optional[float] = None   # download (or cache resolve) time
 
 
 class AudioDownloadClient(Protocol):
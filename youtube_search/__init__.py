@@ -1,20 +1,33 @@
-from .interfaces import SearchClient, DetailClient, ResultFormatter
-from .models import SearchResult, VideoDetails, SearchError, HydrationError
-from .clients import YtDlpSearchClient, YtDlpDetailClient
-from .formatters import DictFormatter, TableFormatter
-from .service import YouTubeSearchService
+"""YouTube search. Exports load on first access so yt-dlp is imported only when a client runs."""
 
-__all__ = [
-    "SearchClient",
-    "DetailClient",
-    "ResultFormatter",
-    "SearchResult",
-    "VideoDetails",
-    "SearchError",
-    "HydrationError",
-    "YtDlpSearchClient",
-    "YtDlpDetailClient",
-    "DictFormatter",
-    "TableFormatter",
-    "YouTubeSearchService",
-]
\ No newline at end of file
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict
+
+from ._lazy import attach
+
+_EXPORTS: Dict[str, str] = {
+    "SearchClient": ".interfaces",
+    "DetailClient": ".interfaces",
+    "ResultFormatter": ".interfaces",
+    "SearchResult": ".models",
+    "VideoDetails": ".models",
+    "SearchError": ".models",
+    "HydrationError": ".models",
+    "YtDlpSearchClient": ".clients",
+    "YtDlpDetailClient": ".clients",
+    "DictFormatter": ".formatters",
+    "TableFormatter": ".formatters",
+    "YouTubeSearchService": ".service",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = attach(__name__, _EXPORTS)
+
+
+if TYPE_CHECKING:
+    from .interfaces import SearchClient, DetailClient, ResultFormatter
+    from .models import SearchResult, VideoDetails, SearchError, HydrationError
+    from .clients import YtDlpSearchClient, YtDlpDetailClient
+    from .formatters import DictFormatter, TableFormatter
+    from .service import YouTubeSearchService
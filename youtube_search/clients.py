@@ -1,5 +1,4 @@
 from typing import Optional, Dict, Any, List, Iterable
-import yt_dlp
 
 from .models import SearchResult, VideoDetails, SearchError, HydrationError
 from .interfaces import SearchClient, DetailClient
@@ -25,6 +24,8 @@ class YtDlpSearchClient(SearchClient):
             return []
         prefix = "ytsearchdate" if sort_by_date else "ytsearch"
         search_url = f"{prefix}{limit}:{query}"
+        import yt_dlp  # deferred: slow to import and only needed once a search runs
+
         try:
             with yt_dlp.YoutubeDL(self._opts) as ydl:
                 info = ydl.extract_info(search_url, download=False)
@@ -72,6 +73,8 @@ class YtDlpDetailClient(DetailClient):
         self._opts = {**default_opts, **(base_opts or {})}
 
     def get_details(self, video_ids: Iterable[str]) -> List[VideoDetails]:
+        import yt_dlp
+
         hydrated: List[VideoDetails] = []
         try:
             with yt_dlp.YoutubeDL(self._opts) as ydl:
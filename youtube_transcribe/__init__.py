@@ -1,11 +1,45 @@
-from .interfaces import TranscriptionClient, YouTubeTranscript
-from .clients import OpenAIWhisperClient, OpenAITranscribeConfig
-from .service import YouTubeTranscriptService
-
-__all__ = [
-    "TranscriptionClient",
-    "YouTubeTranscript",
-    "OpenAIWhisperClient",
-    "OpenAITranscribeConfig",
-    "YouTubeTranscriptService",
-]
+"""YouTube transcription. Exports load on first access, so importing one piece doesn't pull in the rest."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict
+
+from ._lazy import attach
+
+_EXPORTS: Dict[str, str] = {
+    "TranscriptionClient": ".interfaces",
+    "SegmentTranscriptionClient": ".interfaces",
+    "YouTubeTranscript": ".interfaces",
+    "TranscriptSegment": ".interfaces",
+    "AudioPreprocessor": ".interfaces",
+    "PreparedAudio": ".interfaces",
+    "OpenAIWhisperClient": ".clients",
+    "OpenAITranscribeConfig": ".clients",
+    "YouTubeTranscriptService": ".service",
+    "TranscriptStore": ".storage",
+    "read_header": ".storage",
+    "read_transcript": ".storage",
+    "iter_transcript": ".storage",
+    "SegmentIndex": ".segments",
+    "VADConfig": ".vad",
+    "VADTrimmer": ".vad",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = attach(__name__, _EXPORTS)
+
+
+if TYPE_CHECKING:
+    from .interfaces import (
+        TranscriptionClient,
+        SegmentTranscriptionClient,
+        YouTubeTranscript,
+        TranscriptSegment,
+        AudioPreprocessor,
+        PreparedAudio,
+    )
+    from .clients import OpenAIWhisperClient, OpenAITranscribeConfig
+    from .service import YouTubeTranscriptService
+    from .storage import TranscriptStore, read_header, read_transcript, iter_transcript
+    from .segments import SegmentIndex
+    from .vad import VADConfig, VADTrimmer
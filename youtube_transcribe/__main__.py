@@ -5,6 +5,7 @@ import os
 from youtube_audio import YtDlpAudioClient
 from .clients import OpenAIWhisperClient, OpenAITranscribeConfig
 from .service import YouTubeTranscriptService
+from .vad import VADTrimmer
 
 
 def main() -> None:
@@ -17,6 +18,9 @@ def main() -> None:
     p.add_argument("--force", action="store_true", help="Re-transcribe even if cached transcript exists")
     p.add_argument("--language", default=None, help="Optional language hint (e.g. en, hi)")
     p.add_argument("--prompt", default=None, help="Optional prompt to improve domain vocabulary")
+    p.add_argument("--vad", action="store_true", help="Trim silence/music locally before uploading (needs ffmpeg + numpy)")
+    p.add_argument("--window", nargs=2, type=float, metavar=("START", "END"), default=None,
+                   help="Also include cached timestamped segments overlapping START..END seconds")
     p.add_argument("--pretty", action="store_true", help="Pretty-print JSON")
     args = p.parse_args()
 
@@ -26,6 +30,7 @@ def main() -> None:
         audio_client=audio_client,
         transcriber=transcriber,
         transcript_cache_dir=args.transcript_cache_dir,
+        preprocessor=VADTrimmer() if args.vad else None,
     )
 
     payload = svc.get_transcript_json(
@@ -35,6 +40,13 @@ def main() -> None:
         prompt=args.prompt,
     )
 
+    if args.window:
+        start, end = args.window
+        payload["segments"] = [
+            {"start": sg.start, "end": sg.end, "text": sg.text}
+            for sg in svc.get_segments(payload["video_id"], start, end)
+        ]
+
     if args.pretty:
         print(json.dumps(payload, ensure_ascii=False, indent=2))
     else:
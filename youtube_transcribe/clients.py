@@ -1,13 +1,45 @@
 import os
+import threading
 from dataclasses import dataclass
-from typing import Optional, Any
+from functools import lru_cache
+from typing import Optional, Any, List, Tuple
 from pathlib import Path
-from dotenv import load_dotenv
+
+from .interfaces import TranscriptSegment
+
+
+@lru_cache(maxsize=1)
+def _load_env() -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def _openai_client(api_key: Optional[str], base_url: Optional[str]) -> Any:
+    try:
+        from openai import OpenAI  # type: ignore
+    except Exception as e:
+        raise ImportError("Missing dependency 'openai'. Install with: pip install openai") from e
+
+    _load_env()
+
+    resolved_key = (api_key or os.getenv("OPENAI_API_KEY") or "").strip()
+    if not resolved_key:
+        raise RuntimeError(
+            "OpenAI API key not found. Set OPENAI_API_KEY in your environment or in a .env file."
+        )
+
+    kwargs: dict[str, Any] = {"api_key": resolved_key}
+    if base_url:
+        kwargs["base_url"] = base_url
+    return OpenAI(**kwargs)
 
 @dataclass(frozen=True)
 class OpenAITranscribeConfig:
     model: str = "whisper-1"  # can also be "gpt-4o-transcribe" / "gpt-4o-mini-transcribe"
     response_format: str = "text"  # simplest for downstream usage
+    # used by transcribe_segments(); only whisper-1 supports verbose_json (segment timings)
+    segments_response_format: str = "verbose_json"
 
 
 class OpenAIWhisperClient:
@@ -16,6 +48,7 @@ class OpenAIWhisperClient:
     Auth:
       - set OPENAI_API_KEY in env, or pass api_key=
       - optionally pass base_url= for proxies
+      - the key is checked when the first transcription runs
     """
 
     def __init__(
@@ -26,68 +59,100 @@ class OpenAIWhisperClient:
         config: Optional[OpenAITranscribeConfig] = None,
     ) -> None:
         self._config = config or OpenAITranscribeConfig()
+        self._api_key = api_key
+        self._base_url = base_url
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        """The OpenAI client, created on first use (no import/HTTP setup until a transcription runs)."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = _openai_client(self._api_key, self._base_url)
+        return self._client
 
-        try:
-            from openai import OpenAI  # type: ignore
-        except Exception as e:
-            raise ImportError(
-                "Missing dependency 'openai'. Install with: pip install openai"
-            ) from e
-
-        load_dotenv()
+    def transcribe(
+        self,
+        audio_path: str,
+        *,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> str:
+        p = Path(audio_path).expanduser().resolve()
+        if not p.exists():
+            raise FileNotFoundError(f"Audio file not found: {p}")
 
-        resolved_key = (api_key or os.getenv("OPENAI_API_KEY") or "").strip()
-        if not resolved_key:
-            raise RuntimeError(
-                "OpenAI API key not found. Set OPENAI_API_KEY in your environment or in a .env file."
+        with p.open("rb") as audio_file:
+            # OpenAI Python SDK: client.audio.transcriptions.create(...)
+            res = self.client.audio.transcriptions.create(
+                model=self._config.model,
+                file=audio_file,
+                response_format=self._config.response_format,
+                language=language,
+                prompt=prompt,
             )
 
-        try:
-            from openai import OpenAI  # type: ignore
-        except Exception as e:
-            raise ImportError("Missing dependency 'openai'. Install with: pip install openai") from e
-
-        kwargs: dict[str, Any] = {"api_key": resolved_key}
-        if base_url:
-            kwargs["base_url"] = base_url
+        return _text_of(res)
 
-        self._client = OpenAI(**kwargs)
+    def supports_segments(self) -> bool:
+        return self._config.model.startswith("whisper")
 
-    def transcribe(
+    def transcribe_segments(
         self,
         audio_path: str,
         *,
         language: Optional[str] = None,
         prompt: Optional[str] = None,
-    ) -> str:
+    ) -> Tuple[str, List[TranscriptSegment]]:
+        """Transcribe and also return segment timings (empty for models without verbose_json)."""
+        if not self.supports_segments():
+            return self.transcribe(audio_path, language=language, prompt=prompt), []
+
         p = Path(audio_path).expanduser().resolve()
         if not p.exists():
             raise FileNotFoundError(f"Audio file not found: {p}")
 
         with p.open("rb") as audio_file:
-            # OpenAI Python SDK: client.audio.transcriptions.create(...)
-            res = self._client.audio.transcriptions.create(
+            res = self.client.audio.transcriptions.create(
                 model=self._config.model,
                 file=audio_file,
-                response_format=self._config.response_format,
+                response_format=self._config.segments_response_format,
+                timestamp_granularities=["segment"],
                 language=language,
                 prompt=prompt,
             )
 
-        # response_format="text" can be a raw string; otherwise it may be an object/dict with .text
-        if isinstance(res, str):
-            return res
+        raw = getattr(res, "segments", None)
+        if raw is None and isinstance(res, dict):
+            raw = res.get("segments")
+
+        segments: List[TranscriptSegment] = []
+        for seg in raw or []:
+            get = seg.get if isinstance(seg, dict) else (lambda k, _s=seg: getattr(_s, k, None))
+            start, end, text = get("start"), get("end"), get("text")
+            if isinstance(start, (int, float)) and isinstance(end, (int, float)) and isinstance(text, str):
+                segments.append(TranscriptSegment(start=float(start), end=float(end), text=text.strip()))
+
+        return _text_of(res), segments
+
+
+def _text_of(res: Any) -> str:
+    # response_format="text" can be a raw string; otherwise it may be an object/dict with .text
+    if isinstance(res, str):
+        return res
 
-        txt = getattr(res, "text", None)
-        if isinstance(txt, str):
-            return txt
+    txt = getattr(res, "text", None)
+    if isinstance(txt, str):
+        return txt
 
-        # fallback for dict-like responses
-        try:
-            t2 = res.get("text")  # type: ignore[attr-defined]
-            if isinstance(t2, str):
-                return t2
-        except Exception:
-            pass
+    # fallback for dict-like responses
+    try:
+        t2 = res.get("text")  # type: ignore[attr-defined]
+        if isinstance(t2, str):
+            return t2
+    except Exception:
+        pass
 
-        return str(res)
+    return str(res)
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Protocol, Optional
+from dataclasses import dataclass, field
+from typing import Protocol, Optional, List, Tuple
 
 
 @dataclass(frozen=True)
@@ -9,6 +9,27 @@ class YouTubeTranscript:
     title: str
     description: str
     transcript: str
+    vad_removed_seconds: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class TranscriptSegment:
+    start: float  # seconds from the start of the original video
+    end: float
+    text: str
+
+
+@dataclass(frozen=True)
+class PreparedAudio:
+    """Audio handed to the transcriber after local preprocessing.
+
+    ``spans`` are the kept ``(start, end)`` ranges in ORIGINAL seconds, in order;
+    the prepared file is their concatenation. Empty means "unchanged".
+    """
+    audio_path: str
+    original_seconds: float = 0.0
+    removed_seconds: float = 0.0
+    spans: List[Tuple[float, float]] = field(default_factory=list)
 
 
 class TranscriptionClient(Protocol):
@@ -22,3 +43,23 @@ class TranscriptionClient(Protocol):
         prompt: Optional[str] = None,
     ) -> str:
         ...
+
+
+class SegmentTranscriptionClient(Protocol):
+    """Optional contract for transcribers that can also return segment timings."""
+
+    def transcribe_segments(
+        self,
+        audio_path: str,
+        *,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> Tuple[str, List[TranscriptSegment]]:
+        ...
+
+
+class AudioPreprocessor(Protocol):
+    """Contract for local audio preparation before upload (e.g. silence trimming)."""
+
+    def prepare(self, audio_path: str) -> PreparedAudio:
+        ...
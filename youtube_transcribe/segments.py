@@ -0,0 +1,113 @@
+"""Compact, array-backed storage for timestamped transcript segments.
+
+Layout of a ``<video_id>.seg`` file (all integers/floats little-endian)::
+
+    b"ITS1"              magic
+    uint32               segment count N
+    float32[N]           start seconds
+    float32[N]           end seconds
+    uint32[N + 1]        byte offsets of each segment's text in the blob
+    bytes                UTF-8 text blob (segment texts back to back)
+
+Timing arrays are ~12 bytes per segment, so a range query loads them,
+bisects, and then reads only the text bytes of the matching segments.
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from .interfaces import TranscriptSegment
+
+MAGIC = b"ITS1"
+SUFFIX = ".seg"
+_COUNT = struct.Struct("<I")
+_BIG_ENDIAN = sys.byteorder != "little"
+
+
+def _le(arr: array) -> array:
+    if _BIG_ENDIAN:
+        arr.byteswap()
+    return arr
+
+
+def write_segments(path: str | Path, segments: Sequence[TranscriptSegment]) -> None:
+    """Atomically write ``segments`` (sorted by start) to ``path``."""
+    p = Path(path)
+    ordered = sorted(segments, key=lambda s: (s.start, s.end))
+
+    starts = array("f", [s.start for s in ordered])
+    ends = array("f", [s.end for s in ordered])
+    offsets = array("I", [0])
+    blob = bytearray()
+    for s in ordered:
+        blob += s.text.encode("utf-8")
+        offsets.append(len(blob))
+
+    tmp = p.with_name(p.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(MAGIC)
+        f.write(_COUNT.pack(len(ordered)))
+        for arr in (starts, ends, offsets):
+            f.write(_le(arr).tobytes())
+        f.write(blob)
+    tmp.replace(p)
+
+
+class SegmentIndex:
+    """Read-only view over a ``.seg`` file; only timing arrays are held in memory."""
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+        with self._path.open("rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a segment file: {self._path}")
+            (n,) = _COUNT.unpack(f.read(_COUNT.size))
+            self._starts = self._read_array(f, "f", n)
+            self._ends = self._read_array(f, "f", n)
+            self._offsets = self._read_array(f, "I", n + 1)
+            self._blob_pos = f.tell()
+        # running max of ends: segments can overlap slightly, so bisect on this instead of ends
+        self._max_ends = array("f")
+        hi = float("-inf")
+        for e in self._ends:
+            hi = max(hi, e)
+            self._max_ends.append(hi)
+
+    @staticmethod
+    def _read_array(f, typecode: str, n: int) -> array:
+        arr = array(typecode)
+        arr.frombytes(f.read(arr.itemsize * n))
+        return _le(arr)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def query(self, start: float = 0.0, end: Optional[float] = None) -> List[TranscriptSegment]:
+        """Segments overlapping ``[start, end)`` in seconds (``end=None`` means open-ended)."""
+        n = len(self._starts)
+        lo = bisect_right(self._max_ends, start)
+        hi = n if end is None else bisect_left(self._starts, end, lo=lo)
+        picked = [i for i in range(lo, hi) if self._ends[i] > start]
+        if not picked:
+            return []
+
+        first, last = picked[0], picked[-1]
+        base = self._offsets[first]
+        with self._path.open("rb") as f:
+            f.seek(self._blob_pos + base)
+            raw = f.read(self._offsets[last + 1] - base)
+
+        return [
+            TranscriptSegment(
+                start=round(self._starts[i], 3),
+                end=round(self._ends[i], 3),
+                text=raw[self._offsets[i] - base : self._offsets[i + 1] - base].decode("utf-8"),
+            )
+            for i in picked
+        ]
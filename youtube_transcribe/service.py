@@ -1,20 +1,28 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from dataclasses import asdict
 from pathlib import Path
 from datetime import datetime, timezone
-import json
 
 from youtube_audio import AudioDownloadClient
 from youtube_audio.interfaces import VideoAudioInfo
 
-from .interfaces import TranscriptionClient, YouTubeTranscript
+from .interfaces import AudioPreprocessor, PreparedAudio, TranscriptionClient, TranscriptSegment, YouTubeTranscript
+from .segments import SUFFIX as SEGMENT_SUFFIX, SegmentIndex, write_segments
+from .storage import TranscriptStore
+from .vad import to_original_time
+
+
+def _opt_float(v: Any) -> Optional[float]:
+    return float(v) if isinstance(v, (int, float)) else None
 
 
 class YouTubeTranscriptService:
     """Orchestrates:
     1) YouTube -> cached audio + metadata (via youtube_audio)
-    2) audio file -> transcript (via TranscriptionClient)
-    3) optional per-video transcript caching
+    2) audio file -> optional local preprocessing (via AudioPreprocessor, e.g. VAD trimming)
+    3) audio file -> transcript (via TranscriptionClient)
+    4) optional per-video transcript caching (compact ``.itx`` files, see storage.py)
+       plus segment timings (``.seg`` files, see segments.py) when the transcriber supports them
     """
 
     def __init__(
@@ -23,32 +31,74 @@ class YouTubeTranscriptService:
         transcriber: TranscriptionClient,
         *,
         transcript_cache_dir: str | Path = "cache/transcripts",
+        preprocessor: Optional[AudioPreprocessor] = None,
+        store_segments: bool = True,
     ) -> None:
         self._audio = audio_client
         self._tx = transcriber
+        self._pre = preprocessor
+        self._store_segments = store_segments
         self._tcache = Path(transcript_cache_dir).resolve()
-        self._tcache.mkdir(parents=True, exist_ok=True)
+        self._store = TranscriptStore(self._tcache)
 
-    def _transcript_path(self, video_id: str) -> Path:
-        return (self._tcache / f"{video_id}.json").resolve()
+    def transcript_path(self, video_id: str) -> Path:
+        """Cached transcript file for ``video_id`` (existing legacy JSON or the compact path)."""
+        return self._store.resolve(video_id) or self._store.path(video_id)
 
-    def _read_cached(self, video_id: str) -> Optional[Dict[str, Any]]:
-        p = self._transcript_path(video_id)
+    def read_header(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Cached metadata + ``transcript_chars`` without decoding the transcript body."""
+        return self._store.read_header(video_id)
+
+    def segment_path(self, video_id: str) -> Path:
+        return (self._tcache / f"{video_id}{SEGMENT_SUFFIX}").resolve()
+
+    def get_segments(
+        self,
+        video_id: str,
+        start: float = 0.0,
+        end: Optional[float] = None,
+    ) -> List[TranscriptSegment]:
+        """Cached segments overlapping ``[start, end)`` seconds of the original video.
+
+        Returns an empty list when no timings were cached for ``video_id``
+        (older cache entries, or a model without segment support).
+        """
+        p = self.segment_path(video_id)
         if not p.exists():
-            return None
-        try:
-            with p.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-            return data if isinstance(data, dict) else None
-        except Exception:
-            return None
+            return []
+        return SegmentIndex(p).query(start, end)
+
+    def _read_cached(self, video_id: str) -> Optional[Dict[str, Any]]:
+        return self._store.read(video_id)
 
     def _write_cached(self, video_id: str, payload: Dict[str, Any]) -> None:
         payload = {**payload, "updated_at": datetime.now(timezone.utc).isoformat()}
-        tmp = self._tcache / f"{video_id}.json.tmp"
-        with tmp.open("w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2, sort_keys=True)
-        tmp.replace(self._transcript_path(video_id))
+        self._store.write(video_id, payload)
+
+    def get_cached(
+        self,
+        video_id: str,
+        *,
+        url: str = "",
+        title: str = "",
+        description: str = "",
+    ) -> Optional[YouTubeTranscript]:
+        """Cached transcript for ``video_id`` without probing or downloading anything."""
+        cached = self._read_cached(video_id)
+        if not (cached and isinstance(cached.get("transcript"), str)):
+            return None
+        return YouTubeTranscript(
+            url=str(cached.get("url") or url),
+            video_id=str(cached.get("video_id") or video_id),
+            title=str(cached.get("title") or title),
+            description=str(cached.get("description") or description),
+            transcript=str(cached.get("transcript") or ""),
+            vad_removed_seconds=_opt_float(cached.get("vad_removed_seconds")),
+        )
+
+    def fetch_audio(self, url: str) -> VideoAudioInfo:
+        """Stage 1: metadata + cached/downloaded audio."""
+        return self._audio.get_info(url)
 
     def get_transcript(
         self,
@@ -58,20 +108,45 @@ class YouTubeTranscriptService:
         language: Optional[str] = None,
         prompt: Optional[str] = None,
     ) -> YouTubeTranscript:
-        info: VideoAudioInfo = self._audio.get_info(url)
+        info = self.fetch_audio(url)
 
         if not force:
-            cached = self._read_cached(info.video_id)
-            if cached and isinstance(cached.get("transcript"), str):
-                return YouTubeTranscript(
-                    url=str(cached.get("url") or url),
-                    video_id=str(cached.get("video_id") or info.video_id),
-                    title=str(cached.get("title") or info.title),
-                    description=str(cached.get("description") or info.description),
-                    transcript=str(cached.get("transcript") or ""),
-                )
+            cached = self.get_cached(info.video_id, url=url, title=info.title, description=info.description)
+            if cached:
+                return cached
+
+        return self.transcribe_audio(url, info, language=language, prompt=prompt)
+
+    def transcribe_audio(
+        self,
+        url: str,
+        info: VideoAudioInfo,
+        *,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> YouTubeTranscript:
+        """Stages 2-4 for already fetched audio: preprocess, transcribe, cache (always re-transcribes)."""
+        prepared = self._pre.prepare(info.audio_path) if self._pre else PreparedAudio(audio_path=info.audio_path)
+        segments: List[TranscriptSegment] = []
+        if self._store_segments and hasattr(self._tx, "transcribe_segments"):
+            text, segments = self._tx.transcribe_segments(prepared.audio_path, language=language, prompt=prompt)  # type: ignore[attr-defined]
+        else:
+            text = self._tx.transcribe(prepared.audio_path, language=language, prompt=prompt)
 
-        text = self._tx.transcribe(info.audio_path, language=language, prompt=prompt)
+        if prepared.spans:
+            segments = [
+                TranscriptSegment(
+                    start=to_original_time(sg.start, prepared.spans),
+                    end=to_original_time(sg.end, prepared.spans),
+                    text=sg.text,
+                )
+                for sg in segments
+            ]
+        if segments:
+            write_segments(self.segment_path(info.video_id), segments)
+        else:
+            # a .seg left by an earlier transcription would no longer match this text
+            self.segment_path(info.video_id).unlink(missing_ok=True)
 
         out = YouTubeTranscript(
             url=url,
@@ -79,15 +154,25 @@ class YouTubeTranscriptService:
             title=info.title,
             description=info.description,
             transcript=text,
+            vad_removed_seconds=prepared.removed_seconds if self._pre else None,
         )
 
-        self._write_cached(info.video_id, {
+        payload: Dict[str, Any] = {
             "url": out.url,
             "video_id": out.video_id,
             "title": out.title,
             "description": out.description,
             "transcript": out.transcript,
-        })
+            "segment_count": len(segments),
+        }
+        if self._pre:
+            # kept spans let later consumers map trimmed-audio timestamps back to the video
+            payload.update({
+                "audio_seconds": prepared.original_seconds,
+                "vad_removed_seconds": prepared.removed_seconds,
+                "vad_spans": [list(sp) for sp in prepared.spans],
+            })
+        self._write_cached(info.video_id, payload)
 
         return out
 
@@ -106,4 +191,5 @@ class YouTubeTranscriptService:
             "title": t.title,
             "description": t.description,
             "transcript": t.transcript,
+            "vad_removed_seconds": t.vad_removed_seconds,
         }
@@ -0,0 +1,199 @@
+"""Compact on-disk transcript storage.
+
+Layout of a ``<video_id>.itx`` file::
+
+    b"ITX1"        magic
+    uint32 (LE)    header length N
+    N bytes        UTF-8 JSON header (url, video_id, title, description,
+                   transcript_chars, body_bytes, codec, updated_at, ...)
+    rest           UTF-8 transcript body compressed with ``codec``
+
+The header is tiny, so title/description/length lookups never touch the body.
+The body is zstd-compressed when ``zstandard`` is installed, gzip otherwise.
+Legacy pretty-printed ``<video_id>.json`` transcripts are still readable.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+try:  # optional: better ratio and much faster decode than gzip
+    import zstandard as _zstd  # type: ignore
+except ImportError:  # pragma: no cover - depends on environment
+    _zstd = None
+
+MAGIC = b"ITX1"
+SUFFIX = ".itx"
+LEGACY_SUFFIX = ".json"
+_LEN = struct.Struct("<I")
+
+
+def default_codec() -> str:
+    return "zstd" if _zstd is not None else "gzip"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if _zstd is None:
+            raise ImportError("Missing dependency 'zstandard'. Install with: pip install zstandard")
+        return _zstd.ZstdCompressor(level=10).compress(data)
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    raise ValueError(f"Unknown transcript codec: {codec}")
+
+
+def _open_body(f: io.BufferedReader, codec: str) -> io.BufferedIOBase:
+    if codec == "zstd":
+        if _zstd is None:
+            raise ImportError("Missing dependency 'zstandard'. Install with: pip install zstandard")
+        return _zstd.ZstdDecompressor().stream_reader(f, read_across_frames=True)  # type: ignore[return-value]
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    raise ValueError(f"Unknown transcript codec: {codec}")
+
+
+def _read_header_block(f: io.BufferedReader) -> Optional[Dict[str, Any]]:
+    if f.read(len(MAGIC)) != MAGIC:
+        return None
+    raw_len = f.read(_LEN.size)
+    if len(raw_len) != _LEN.size:
+        return None
+    (n,) = _LEN.unpack(raw_len)
+    header = json.loads(f.read(n).decode("utf-8"))
+    return header if isinstance(header, dict) else None
+
+
+def _read_legacy(p: Path) -> Optional[Dict[str, Any]]:
+    with p.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, dict) else None
+
+
+def write_transcript(path: str | Path, payload: Dict[str, Any], *, codec: Optional[str] = None) -> None:
+    """Atomically write ``payload`` (must contain ``transcript``) in compact form."""
+    p = Path(path)
+    codec = codec or default_codec()
+    text = str(payload.get("transcript") or "")
+    body = text.encode("utf-8")
+
+    header = {k: v for k, v in payload.items() if k != "transcript"}
+    header.update(
+        {
+            "transcript_chars": len(text),
+            "body_bytes": len(body),
+            "codec": codec,
+        }
+    )
+    header_raw = json.dumps(header, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+    tmp = p.with_name(p.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(MAGIC)
+        f.write(_LEN.pack(len(header_raw)))
+        f.write(header_raw)
+        f.write(_compress(body, codec))
+    tmp.replace(p)
+
+
+def read_header(path: str | Path) -> Optional[Dict[str, Any]]:
+    """Return metadata only (no ``transcript`` key); ``None`` if unreadable.
+
+    For legacy JSON files the whole file has to be parsed, but the returned
+    dict has the same shape as a compact header.
+    """
+    p = Path(path)
+    try:
+        if p.suffix == LEGACY_SUFFIX:
+            data = _read_legacy(p)
+            if data is None:
+                return None
+            tx = data.pop("transcript", None)
+            data["transcript_chars"] = len(tx) if isinstance(tx, str) else 0
+            return data
+        with p.open("rb") as f:
+            return _read_header_block(f)
+    except Exception:
+        return None
+
+
+def iter_transcript(path: str | Path, *, chunk_chars: int = 64 * 1024) -> Iterator[str]:
+    """Stream the transcript body in text chunks without loading it all at once."""
+    p = Path(path)
+    if p.suffix == LEGACY_SUFFIX:
+        data = _read_legacy(p) or {}
+        tx = data.get("transcript")
+        if isinstance(tx, str):
+            for i in range(0, len(tx), chunk_chars):
+                yield tx[i : i + chunk_chars]
+        return
+
+    with p.open("rb") as f:
+        header = _read_header_block(f)
+        if header is None:
+            raise ValueError(f"Not a compact transcript file: {p}")
+        with _open_body(f, str(header.get("codec") or "gzip")) as body:
+            reader = io.TextIOWrapper(body, encoding="utf-8")
+            while True:
+                piece = reader.read(chunk_chars)
+                if not piece:
+                    break
+                yield piece
+
+
+def read_transcript(path: str | Path) -> Optional[Dict[str, Any]]:
+    """Return the full payload (header fields + ``transcript``); ``None`` if unreadable."""
+    p = Path(path)
+    try:
+        if p.suffix == LEGACY_SUFFIX:
+            return _read_legacy(p)
+        with p.open("rb") as f:
+            header = _read_header_block(f)
+            if header is None:
+                return None
+            with _open_body(f, str(header.get("codec") or "gzip")) as body:
+                header["transcript"] = body.read().decode("utf-8")
+        return header
+    except Exception:
+        return None
+
+
+class TranscriptStore:
+    """Per-video transcript files under one cache directory.
+
+    Writes ``<video_id>.itx``; reads it first and falls back to the legacy
+    ``<video_id>.json`` written by older versions.
+    """
+
+    def __init__(self, cache_dir: str | Path, *, codec: Optional[str] = None) -> None:
+        self._dir = Path(cache_dir).resolve()
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._codec = codec
+
+    def path(self, video_id: str) -> Path:
+        """Path new transcripts are written to."""
+        return (self._dir / f"{video_id}{SUFFIX}").resolve()
+
+    def resolve(self, video_id: str) -> Optional[Path]:
+        """Existing transcript file for ``video_id`` (compact preferred), or ``None``."""
+        for p in (self.path(video_id), (self._dir / f"{video_id}{LEGACY_SUFFIX}").resolve()):
+            if p.exists():
+                return p
+        return None
+
+    def read_header(self, video_id: str) -> Optional[Dict[str, Any]]:
+        p = self.resolve(video_id)
+        return read_header(p) if p else None
+
+    def read(self, video_id: str) -> Optional[Dict[str, Any]]:
+        p = self.resolve(video_id)
+        return read_transcript(p) if p else None
+
+    def write(self, video_id: str, payload: Dict[str, Any]) -> Path:
+        p = self.path(video_id)
+        write_transcript(p, payload, codec=self._codec)
+        return p
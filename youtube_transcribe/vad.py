@@ -0,0 +1,216 @@
+"""Local voice-activity detection (VAD) to trim audio before transcription upload.
+
+Everything here runs locally: ffmpeg decodes the cached audio to 16 kHz mono
+PCM, NumPy classifies fixed-size frames, and the kept speech spans are
+re-encoded (FLAC) for upload. No network calls.
+
+Frame classification:
+  - energy: frame RMS (dB) must exceed the clip's noise floor by a margin
+  - zero-crossing rate (ZCR): very high ZCR frames are hiss/noise, not speech
+  - music gate: speech has strong syllabic modulation; a ~1 s window whose
+    energy AND ZCR barely move is treated as a music bed / steady tone
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+from .interfaces import PreparedAudio
+
+
+@dataclass(frozen=True)
+class VADConfig:
+    sample_rate: int = 16_000
+    frame_ms: int = 30
+    energy_margin_db: float = 10.0     # above the 10th-percentile noise floor
+    min_energy_db: float = -50.0       # absolute floor (dBFS)
+    max_zcr: float = 0.45              # fraction of sign changes per sample
+    music_gate: bool = True
+    music_window_ms: int = 1_000
+    music_energy_std_db: float = 3.0
+    music_zcr_std: float = 0.015
+    min_speech_ms: int = 250
+    min_silence_ms: int = 600          # shorter pauses are kept (natural speech gaps)
+    pad_ms: int = 150
+    min_removed_seconds: float = 1.0   # don't bother re-encoding for tiny savings
+    cache_dir: str | Path = "cache/vad"
+
+
+def _np() -> Any:
+    try:
+        import numpy as np  # type: ignore
+    except Exception as e:
+        raise ImportError("Missing dependency 'numpy'. Install with: pip install numpy") from e
+    return np
+
+
+def _ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def decode_pcm(audio_path: str | Path, *, sample_rate: int = 16_000) -> Any:
+    """Decode any ffmpeg-readable file to mono float32 samples in [-1, 1]."""
+    np = _np()
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-i", str(audio_path),
+        "-ac", "1", "-ar", str(sample_rate),
+        "-f", "s16le", "pipe:1",
+    ]
+    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if p.returncode != 0:
+        raise RuntimeError(f"ffmpeg decode failed: {p.stderr.decode('utf-8', 'replace').strip()}")
+    return np.frombuffer(p.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _encode_pcm(samples: Any, out_path: Path, *, sample_rate: int) -> None:
+    np = _np()
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error", "-y",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+        str(out_path),
+    ]
+    p = subprocess.run(cmd, input=pcm, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if p.returncode != 0:
+        raise RuntimeError(f"ffmpeg encode failed: {p.stderr.decode('utf-8', 'replace').strip()}")
+
+
+def _rolling_std(x: Any, window: int) -> Any:
+    np = _np()
+    if window <= 1 or len(x) < window:
+        return np.full(len(x), np.inf)  # too short to judge: never gate
+    kernel = np.ones(window) / window
+    mean = np.convolve(x, kernel, mode="same")
+    mean_sq = np.convolve(x * x, kernel, mode="same")
+    return np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+
+def _runs(mask: Sequence[bool]) -> List[Tuple[int, int]]:
+    """[start, end) index runs where ``mask`` is true."""
+    out: List[Tuple[int, int]] = []
+    start: Optional[int] = None
+    for i, m in enumerate(mask):
+        if m and start is None:
+            start = i
+        elif not m and start is not None:
+            out.append((start, i))
+            start = None
+    if start is not None:
+        out.append((start, len(mask)))
+    return out
+
+
+def detect_speech(samples: Any, cfg: VADConfig = VADConfig()) -> List[Tuple[float, float]]:
+    """Return speech spans ``(start_s, end_s)`` for mono float samples."""
+    np = _np()
+    sr = cfg.sample_rate
+    flen = max(1, sr * cfg.frame_ms // 1000)
+    n = len(samples) // flen
+    if n == 0:
+        return []
+
+    frames = np.asarray(samples[: n * flen], dtype=np.float32).reshape(n, flen)
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    threshold = max(float(np.percentile(energy_db, 10)) + cfg.energy_margin_db, cfg.min_energy_db)
+    speech = (energy_db > threshold) & (zcr < cfg.max_zcr)
+
+    if cfg.music_gate:
+        w = max(1, cfg.music_window_ms // cfg.frame_ms)
+        steady = (_rolling_std(energy_db, w) < cfg.music_energy_std_db) & (
+            _rolling_std(zcr, w) < cfg.music_zcr_std
+        )
+        speech &= ~steady
+
+    # Smooth: bridge short pauses, drop blips, then pad.
+    min_sil = max(1, cfg.min_silence_ms // cfg.frame_ms)
+    min_sp = max(1, cfg.min_speech_ms // cfg.frame_ms)
+    pad = cfg.pad_ms // cfg.frame_ms
+
+    runs = _runs(speech.tolist())
+    merged: List[Tuple[int, int]] = []
+    for s, e in runs:
+        if merged and s - merged[-1][1] < min_sil:
+            merged[-1] = (merged[-1][0], e)
+        else:
+            merged.append((s, e))
+
+    spans: List[Tuple[int, int]] = []
+    for s, e in merged:
+        if e - s < min_sp:
+            continue
+        s, e = max(0, s - pad), min(n, e + pad)
+        if spans and s <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], e)
+        else:
+            spans.append((s, e))
+
+    sec = flen / sr
+    total = len(samples) / sr
+    return [(round(s * sec, 3), round(min(e * sec, total), 3)) for s, e in spans]
+
+
+def to_original_time(t: float, spans: Sequence[Tuple[float, float]]) -> float:
+    """Map a timestamp in the trimmed audio back to the original audio.
+
+    ``spans`` are the kept original ranges; empty spans means identity.
+    """
+    if not spans:
+        return t
+    starts: List[float] = []
+    acc = 0.0
+    for s, e in spans:
+        starts.append(acc)
+        acc += e - s
+    i = max(0, bisect_right(starts, t) - 1)
+    s, e = spans[i]
+    return min(s + (t - starts[i]), e)
+
+
+class VADTrimmer:
+    """AudioPreprocessor that cuts non-speech spans before transcription.
+
+    Falls back to the untouched file when ffmpeg is not installed or when
+    trimming would save less than ``min_removed_seconds``.
+    """
+
+    def __init__(self, config: Optional[VADConfig] = None) -> None:
+        self._cfg = config or VADConfig()
+        self._dir = Path(self._cfg.cache_dir).resolve()
+
+    def prepare(self, audio_path: str) -> PreparedAudio:
+        src = Path(audio_path).expanduser().resolve()
+        if not _ffmpeg_available():
+            return PreparedAudio(audio_path=str(src))
+
+        np = _np()
+        sr = self._cfg.sample_rate
+        samples = decode_pcm(src, sample_rate=sr)
+        total = len(samples) / sr
+        spans = detect_speech(samples, self._cfg)
+        kept = sum(e - s for s, e in spans)
+        removed = round(total - kept, 3)
+
+        if not spans or removed < self._cfg.min_removed_seconds:
+            # nothing (or no speech) detected -> upload as-is rather than an empty file
+            return PreparedAudio(audio_path=str(src), original_seconds=round(total, 3))
+
+        self._dir.mkdir(parents=True, exist_ok=True)
+        out = self._dir / f"{src.stem}.flac"
+        pieces = [samples[int(s * sr) : int(e * sr)] for s, e in spans]
+        _encode_pcm(np.concatenate(pieces), out, sample_rate=sr)
+
+        return PreparedAudio(
+            audio_path=str(out),
+            original_seconds=round(total, 3),
+            removed_seconds=removed,
+            spans=spans,
+        )